@@ -16,11 +16,14 @@ Requirements:
 import sys
 import time
 import logging
-import subprocess
-import configparser
 from pathlib import Path
 
-from utills import build_same_header, decode_header, fips_table, search_fips, parse_location_keys
+import config_store
+import eas_lookup
+import logqueue
+import speech
+import tts_cache
+from utills import build_same_header, decode_header, fips_table, search_fips
 
 try:
     import serial
@@ -35,31 +38,57 @@ except ImportError:
 # Configuration
 # =============================
 
+# Command types with their own settle time in [pacing] (seconds after the last
+# byte has left the UART):
+#   command  *PINnn# operations — RWT, EOM, record, play, patch, reboot, originate
+#   step     the event / location / duration entries that follow an originate
+#   stop     the bare '#' that ends an operation
+# Unset kinds fall back to [control] cmd_delay. Measure a unit from the CLI
+# menu (c — calibrate_wizard), which runs calibrate_pacing() with the operator
+# confirming each probe and stores the result with save_pacing().
+PACING_KINDS = ("command", "step", "stop")
+
 def load_config() -> dict:
     """Load config.ini, falling back to built-in defaults if missing."""
-    config_path = Path(__file__).parent / "config.ini"
     cfg = {
         'com3_port':      '/dev/tft911-cmd',
         'com3_baud':      9600,
         'com3_pin':       '911',
         'com3_cmd_delay': 0.5,
+        'pacing':         {},
         'log_level':      'INFO',
+        'log_queue_size': 10000,
         'tts_speed':      110,
         'tts_pitch':      35,
+        'tts_voice':      '',
+        'tts_cache_dir':  str(Path(__file__).parent / "alerts" / "tts_cache"),
+        'tts_cache_mb':   50,
         'tz_offset':      None,
         'callsign':       'STATION',
         'org':            'EAS',
     }
-    if config_path.exists():
-        c = configparser.ConfigParser()
-        c.read(config_path)
+    if config_store.exists():
+        c = config_store.parser()
         cfg['com3_port']      = c.get('control',    'port',      fallback=cfg['com3_port'])
         cfg['com3_baud']      = c.getint('control', 'baud',      fallback=cfg['com3_baud'])
         cfg['com3_pin']       = c.get('control',    'pin',       fallback=cfg['com3_pin'])
         cfg['com3_cmd_delay'] = c.getfloat('control', 'cmd_delay', fallback=cfg['com3_cmd_delay'])
+        for kind in PACING_KINDS:
+            if c.has_option('pacing', kind):
+                try:
+                    cfg['pacing'][kind] = c.getfloat('pacing', kind)
+                except ValueError:
+                    pass
         cfg['log_level']      = c.get('logging',    'log_level', fallback=cfg['log_level'])
+        cfg['log_queue_size'] = c.getint('logging', 'queue_size', fallback=cfg['log_queue_size'])
         cfg['tts_speed']      = c.getint('tts',     'speed',     fallback=cfg['tts_speed'])
         cfg['tts_pitch']      = c.getint('tts',     'pitch',     fallback=cfg['tts_pitch'])
+        cfg['tts_voice']      = c.get('tts',        'voice',     fallback=cfg['tts_voice'])
+        cfg['tts_cache_mb']   = c.getint('tts',     'cache_mb',  fallback=cfg['tts_cache_mb'])
+        alerts_dir = Path(c.get('alerts', 'alerts_dir', fallback='alerts'))
+        if not alerts_dir.is_absolute():
+            alerts_dir = Path(__file__).parent / alerts_dir
+        cfg['tts_cache_dir']  = str(alerts_dir / "tts_cache")
         cfg['callsign']       = c.get('station',    'callsign',  fallback=cfg['callsign'])
         cfg['org']            = c.get('station',    'org',       fallback=cfg['org'])
         raw_tz = c.get('station', 'tz_offset', fallback='')
@@ -68,34 +97,39 @@ def load_config() -> dict:
                 cfg['tz_offset'] = int(raw_tz.strip())
             except ValueError:
                 pass
+    for kind in PACING_KINDS:
+        cfg['pacing'].setdefault(kind, cfg['com3_cmd_delay'])
     return cfg
 
 
 def load_location_keys() -> dict:
     """
-    Load [location_keys] from config.ini.
+    Load [location_keys] from config.ini (cached — see config_store).
 
     Returns a dict keyed by string key number:
         {"1": {"name": "Tompkins County", "fips": ["036109", "036001"]}, ...}
 
     Returns an empty dict if the section is missing or the file doesn't exist.
     """
-    config_path = Path(__file__).parent / "config.ini"
-    if not config_path.exists():
-        return {}
-    c = configparser.ConfigParser()
-    c.read(config_path)
-    if not c.has_section("location_keys"):
-        return {}
-    keys = {}
-    for k, v in c.items("location_keys"):
-        if "|" in v:
-            name, fips_str = v.split("|", 1)
-            fips_list = [f.strip() for f in fips_str.split(",") if f.strip()]
-        else:
-            name, fips_list = v.strip(), []
-        keys[k] = {"name": name.strip(), "fips": fips_list}
-    return keys
+    return {k: {"name": v.name, "fips": list(v.fips)} for k, v in config_store.location_keys().items()}
+
+
+def setup_logging(config: dict = None) -> logging.Logger:
+    """
+    Console logging for the tft_control logger, written on a listener thread
+    (logqueue.py) so COM3 command timing never waits on stdout.
+
+    Args:
+        config: Optional config dict. If None, loads from config.ini.
+    """
+    config = config or load_config()
+    logger = logging.getLogger("tft_control")
+    logger.setLevel(getattr(logging, config['log_level'].upper(), logging.INFO))
+    logger.propagate = False
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)-8s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+    logqueue.attach(logger, [console], config['log_queue_size'])
+    return logger
 
 
 # =============================
@@ -152,7 +186,6 @@ class TFTController:
         self.config = config or load_config()
         self.ser    = None
         self.pin    = self.config['com3_pin']
-        self.delay  = self.config['com3_cmd_delay']
         self.logger = logging.getLogger("tft_control")
 
     def connect(self) -> None:
@@ -179,18 +212,30 @@ class TFTController:
     def __exit__(self, *args):
         self.disconnect()
 
-    def _send(self, cmd: str) -> None:
+    def wire_time(self, cmd: str) -> float:
+        """Seconds cmd takes to leave the UART at the configured baud (8N1 = 10 bits/char)."""
+        return len(cmd.encode('utf-8')) * 10 / self.config['com3_baud']
+
+    def _send(self, cmd: str, kind: str = "command") -> None:
         """
         Send a single DTMF command to the TFT and wait for processing.
 
+        The write is drained with flush(), then the wait is topped up to the
+        command's wire time (USB adapters can report drained early) and the
+        settle time for its kind from [pacing] is added.
+
         Args:
-            cmd: Command string e.g. '*91131#'
+            cmd:  Command string e.g. '*91131#'
+            kind: One of PACING_KINDS.
         """
         if not self.ser or not self.ser.is_open:
             raise RuntimeError("Not connected — call connect() first.")
+        t0 = time.monotonic()
         self.ser.write(cmd.encode('utf-8'))
+        self.ser.flush()
         self.logger.debug(f"Sent: {cmd!r}")
-        time.sleep(self.delay)
+        drained = t0 + self.wire_time(cmd)
+        time.sleep(max(0.0, drained - time.monotonic()) + self.config['pacing'][kind])
 
     def send_rwt(self, attention_tone: bool = True) -> None:
         """
@@ -208,9 +253,16 @@ class TFTController:
         self._send(f'*{self.pin}43#')
         self.logger.info("EOM sent")
 
-    def stop(self) -> None:
-        """Stop the current operation (recording, playback, live patch)."""
-        self._send('#')
+    def stop(self, cancel_speech: bool = True) -> None:
+        """
+        Stop the current operation (recording, playback, live patch, TTS playback).
+
+        cancel_speech=False leaves TTS playback alone, for callers that have
+        already let it finish.
+        """
+        if cancel_speech:
+            speech.cancel()
+        self._send('#', "stop")
         self.logger.info("Stop sent")
 
     def reboot(self) -> None:
@@ -264,54 +316,81 @@ class TFTController:
         originate_cmd = '41' if audio == 'p' else '40'
         dtmf_locs = locations.replace(',', '')
         self._send(f'*{self.pin}{originate_cmd}#')
-        self._send(f'*{code}#')
-        self._send(f'*{dtmf_locs}#')
-        self._send(f'*{duration}#')
+        self._send(f'*{code}#', "step")
+        self._send(f'*{dtmf_locs}#', "step")
+        self._send(f'*{duration}#', "step")
         self.logger.info(f"Originating {event} | locations={locations} | duration={duration} | audio={audio}")
 
-    def record_announcement_tts(self, text: str) -> None:
+    @property
+    def tts_cache(self) -> tts_cache.TTSCache:
+        """Shared on-disk cache of synthesised announcements."""
+        return tts_cache.get_cache(self.config['tts_cache_dir'], self.config['tts_cache_mb'] * 1024 * 1024)
+
+    def synthesize_tts(self, text: str) -> Path:
+        """WAV of text with the configured voice settings, from the cache or espeak."""
+        return self.tts_cache.get(text, self.config['tts_speed'], self.config['tts_pitch'],
+                                  self.config.get('tts_voice', ''))
+
+    def record_announcement_tts(self, text: str, wav: Path = None) -> None:
         """
         Generate TTS audio from text using espeak, play it into CH1,
         and record it as the TFT announcement — all in one step.
 
+        Audio is synthesised (or taken from the cache) before the TFT is put
+        into record mode, so the recording only spans playback.
+
         Args:
             text: The announcement text to speak.
+            wav:  Clip already returned by synthesize_tts(text), if any.
         """
-        speed = self.config['tts_speed']
-        pitch = self.config['tts_pitch']
         self.logger.info(f"Recording TTS announcement: {text!r}")
+        if wav is None:
+            wav = self.synthesize_tts(text)
 
         # Start TFT recording before audio plays
         self.record_announcement()
         time.sleep(0.3)
 
+        # Wait for aplay to exit so the recording is not cut before the last
+        # buffered audio reaches CH1
         try:
-            espeak = subprocess.Popen(
-                ['espeak', '-s', str(speed), '-p', str(pitch), text, '--stdout'],
-                stdout=subprocess.PIPE
-            )
-            aplay = subprocess.Popen(
-                ['aplay', '-D', 'default'],
-                stdin=espeak.stdout
-            )
-            espeak.stdout.close()
-            aplay.wait()
-            espeak.wait()
-        except FileNotFoundError:
+            played = speech.engine().play_wav(wav, drain=True)
+        except RuntimeError:
             self.stop()
-            raise RuntimeError("espeak not found — run: sudo apt install espeak")
+            raise
+        if not played:
+            self.stop()
+            raise RuntimeError("TTS announcement cancelled")
 
         time.sleep(0.2)
-        self.stop()
+        self.stop(cancel_speech=False)
         self.logger.info("TTS announcement recorded successfully")
 
-    def originate_with_tts(self, event: str, locations: str, duration: str) -> str:
+    def announcement_text(self, event: str, locations: str, duration: str) -> str:
+        """
+        Build a SAME header from the alert parameters and decode it to the
+        TFT-style announcement text (TFT mode + station timezone).
+        """
+        fips_list = config_store.fips_for_keys(locations)
+        if not fips_list:
+            raise ValueError(f"No FIPS codes found for location keys: {locations!r} — run setup wizard")
+
+        same = build_same_header(
+            event, fips_list, duration,
+            org=self.config.get('org', 'EAS'),
+            callsign=self.config.get('callsign', 'STATION'),
+        )
+        self.logger.debug(f"Built SAME header: {same}")
+
+        return decode_header(same, self.config.get('tz_offset'))
+
+    def originate_with_tts(self, event: str, locations: str, duration: str,
+                           text: str = None, wav: Path = None) -> str:
         """
         Auto-generate a TFT-style announcement from the alert parameters,
         record it via TTS, then originate with pre-recorded audio.
 
-        Builds a SAME header from the event/locations/duration, decodes it
-        to human-readable text using EAS2Text (TFT mode + station timezone),
+        Decodes the alert to announcement text (see announcement_text),
         records that text as the TFT announcement, then sends the originate
         command with audio='p' (pre-recorded).
 
@@ -319,39 +398,163 @@ class TFTController:
             event:     EAS event code e.g. 'TOR', 'DMO'
             locations: Location key string e.g. '13' for keys 1 and 3
             duration:  TFT duration code e.g. '01'=15min '04'=1hr
+            text:      Announcement text already decoded for these parameters
+                       (e.g. from a preview); decoded here if None.
+            wav:       Clip already synthesised for text, if any.
 
         Returns:
             The decoded announcement text that was recorded.
         """
-        loc_keys  = load_location_keys()
-        fips_list = []
-        for key in parse_location_keys(locations):
-            if key in loc_keys:
-                fips_list.extend(loc_keys[key]['fips'])
-        if not fips_list:
-            raise ValueError(f"No FIPS codes found for location keys: {locations!r} — run setup wizard")
-
-        same = build_same_header(
-            event, fips_list, duration,
-            org=self.config.get('org', 'EAS'),
-            callsign=self.config.get('callsign', 'STATION'),
-        )
-        self.logger.debug(f"Built SAME header: {same}")
-
-        text = decode_header(same, self.config.get('tz_offset'))
+        if text is None:
+            text = self.announcement_text(event, locations, duration)
         self.logger.info(f"TTS text: {text}")
 
-        self.record_announcement_tts(text)
+        self.record_announcement_tts(text, wav)
         self.originate(event, locations, duration, audio='p')
         return text
 
 
+# =============================
+# Pacing calibration
+# =============================
+
+# Probe sequences per kind: each exercises that kind's settle time followed
+# by another command. 'step' originates an RWT without audio, so only run
+# calibration against a unit that is off air or the virtual COM3 device.
+def _probe_command(tft: TFTController) -> None:
+    tft.play_voice()
+    tft.stop()
+
+def _probe_step(tft: TFTController) -> None:
+    tft.originate("RWT", "1", "01", audio='n')
+    tft.send_eom()
+
+def _probe_stop(tft: TFTController) -> None:
+    tft.stop()
+    tft.play_voice()
+    tft.stop()
+
+_PROBES = {"command": _probe_command, "step": _probe_step, "stop": _probe_stop}
+
+
+def calibrate_pacing(tft: TFTController, verify, kinds=PACING_KINDS, trials: int = 3,
+                     resolution: float = 0.01, margin: float = 1.25, report=print,
+                     discard=None) -> dict:
+    """
+    Find the shortest reliable settle time for each command kind.
+
+    Binary-searches each kind's gap between 0 and the current setting while
+    the other kinds keep theirs. A gap passes if every probe sequence in
+    `trials` runs is accepted; the returned value is the smallest passing gap
+    times `margin`.
+
+    Args:
+        tft:        Connected controller to probe.
+        verify:     verify() -> bool: True if the device accepted every command
+                    sent since the previous call (e.g. the virtual COM3 log).
+        kinds:      Kinds to calibrate.
+        trials:     Probe runs per candidate gap.
+        resolution: Stop searching once the bracket is this narrow (seconds).
+        margin:     Safety factor applied to the measured minimum.
+        report:     Progress callback, one line per candidate.
+        discard:    Called before each kind to forget earlier commands;
+                    defaults to calling verify() and ignoring the answer.
+
+    Returns:
+        {kind: settle seconds}. tft.config['pacing'] is left at these values.
+    """
+    pacing = tft.config['pacing']
+    result = {}
+    for kind in kinds:
+        probe  = _PROBES[kind]
+        lo, hi = 0.0, pacing[kind]
+        (discard or verify)()   # forget anything from before
+
+        def passes(gap: float) -> bool:
+            pacing[kind] = gap
+            for _ in range(trials):
+                probe(tft)
+                if not verify():
+                    return False
+            return True
+
+        if not passes(hi):
+            pacing[kind] = hi
+            raise RuntimeError(f"{kind}: commands are dropped even at the current {hi:.3f} s — "
+                               "check the connection or raise cmd_delay")
+        while hi - lo > resolution:
+            mid = (lo + hi) / 2
+            ok  = passes(mid)
+            report(f"  {kind:<8} {mid:6.3f} s  {'ok' if ok else 'dropped'}")
+            lo, hi = (lo, mid) if ok else (mid, hi)
+        result[kind] = pacing[kind] = round(hi * margin, 3)
+    return result
+
+
+_PROBE_HINTS = {
+    "command": "voice playback started and stopped",
+    "step":    "an RWT went out (no audio) and was ended by EOM",
+    "stop":    "playback started and each '#' stopped it",
+}
+
+def calibrate_wizard(tft: TFTController) -> None:
+    """
+    Calibrate [pacing] against a real unit, the operator judging each probe.
+
+    The step probe originates an RWT, so the unit must be off air (dummy
+    load). One trial per candidate keeps the number of questions down.
+    """
+    print("\n  Pacing calibration — each probe sends real commands to the unit.")
+    print("  The 'step' probe ORIGINATES AN RWT. Only continue off air.")
+    if input("  Is the unit off air? (y/N): ").strip().lower() != 'y':
+        return
+    current = {k: tft.config['pacing'][k] for k in PACING_KINDS}
+    hint = {"kind": None}
+
+    def verify() -> bool:
+        return input(f"    Did {_PROBE_HINTS[hint['kind']]}? (Y/n): ").strip().lower() != 'n'
+
+    settle = {}
+    try:
+        for kind in PACING_KINDS:
+            hint["kind"] = kind
+            print(f"\n  {kind}: starting at {current[kind]:.3f} s")
+            settle.update(calibrate_pacing(tft, verify, kinds=(kind,), trials=1,
+                                           resolution=0.02, discard=lambda: None))
+    except (RuntimeError, KeyboardInterrupt) as e:
+        tft.config['pacing'].update(current)
+        print(f"\n  Calibration stopped: {e or 'interrupted'} — pacing unchanged.")
+        return
+    print("\n  [pacing]")
+    for kind, secs in settle.items():
+        print(f"  {kind} = {secs:.3f}   (was {current[kind]:.3f})")
+    if input("  Save to config.ini? (y/N): ").strip().lower() == 'y':
+        save_pacing(settle)
+        print("  Saved.")
+    else:
+        tft.config['pacing'].update(current)
+        print("  Not saved — pacing unchanged.")
+
+
+def save_pacing(settle: dict) -> None:
+    """Write {kind: seconds} to the [pacing] section of config.ini."""
+    c = config_store.copy()
+    if not c.has_section('pacing'):
+        c.add_section('pacing')
+    for kind, secs in settle.items():
+        c.set('pacing', kind, f"{secs:.3f}")
+    config_store.write_config(c)
+
+
 # =============================
 # Setup wizard
 # =============================
 
 def _fips_to_name(fips: str) -> str:
-    """Look up county name from a 6-digit FIPS code via the EAS2Text table."""
+    """Look up county name from a 6-digit FIPS code via the lookup artifact or EAS2Text table."""
+    lk = eas_lookup.open_default()
+    if lk is not None:
+        return lk.fips_name(fips)
     # fips_table() uses 5-digit keys; our stored codes are 6-digit with leading '0'
     key = fips[1:] if len(fips) == 6 else fips
     return fips_table().get(key, "")
@@ -447,13 +650,9 @@ def setup_wizard():
     Returns:
         dict: The station configuration that was saved.
     """
-    config_path = Path(__file__).parent / "config.ini"
-    config = configparser.ConfigParser()
-
     # Load whatever is already in config.ini so we can show existing values
     # as defaults and avoid making the user retype things they already set.
-    if config_path.exists():
-        config.read(config_path)
+    config = config_store.copy()
 
     # Check if setup has already been completed
     already_configured = (
@@ -568,10 +767,9 @@ def setup_wizard():
         fips_str = ",".join(v["fips"])
         config.set("location_keys", k, f"{v['name']} | {fips_str}")
 
-    with open(config_path, "w") as f:
-        config.write(f)
+    config_store.write_config(config)
 
-    print(f"  Saved to {config_path}\n")
+    print(f"  Saved to {config_store.CONFIG_PATH}\n")
 
     # Return the station dict so callers can use it without re-reading the file
     return {
@@ -602,6 +800,7 @@ TFT EAS 911 Controller
   8  Originate alert
   9  Send EOM
   10 Reboot unit
+  c  Calibrate pacing (off air)
   s  Setup wizard
   q  Quit
 """)
@@ -609,11 +808,7 @@ TFT EAS 911 Controller
 
 def cli():
     """Interactive CLI for the TFT controller."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='[%(asctime)s] %(levelname)-8s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-    )
+    setup_logging()
     try:
         tft = TFTController()
         tft.connect()
@@ -708,6 +903,9 @@ def cli():
                     tft.reboot()
                     print("Reboot command sent.")
 
+            elif selection == 'c':
+                calibrate_wizard(tft)
+
             elif selection == 's':
                 setup_wizard()
 
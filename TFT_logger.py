@@ -9,13 +9,15 @@ import os
 import sys
 import re
 import time
-import json
+import queue
+import signal
 import hashlib
 import logging
-import configparser
+import threading
 from logging.handlers import RotatingFileHandler
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from importlib.util import find_spec
 
 try:
     import serial
@@ -30,12 +32,21 @@ try:
 except ImportError:
     requests = None
 
-try:
-    from EAS2Text import EAS2Text
-    EAS2TEXT_AVAILABLE = True
-except ImportError:
-    EAS2Text = None
-    EAS2TEXT_AVAILABLE = False
+# EAS2Text fetches and parses its whole dataset when first imported. Headers
+# are decoded natively by eas_render from eas_lookup.bin; EAS2Text is only the
+# fallback, and without the artifact it is imported on a background thread at
+# startup (see _warm_eas2text) so the serial port is open straight away.
+EAS2TEXT_AVAILABLE = find_spec("EAS2Text") is not None
+
+import alert_trace
+from alert_record import AlertRecord
+import config_store
+import eas_render
+import jsoncodec
+import logqueue
+import memwatch
+import metrics
+import profiler
 
 
 # =============================
@@ -44,51 +55,72 @@ except ImportError:
 
 def load_config() -> dict:
     """Load config.ini if present, otherwise fall back to built-in defaults."""
-    config_path = Path(__file__).parent / "config.ini"
-    config = configparser.ConfigParser()
 
     cfg = {
         'serial_port':          '/dev/ttyUSB0',
         'serial_baud':          1200,
         'serial_timeout':       1.0,
         'serial_retry_delay':   1.0,
+        'read_queue_size':      4096,
         'log_dir':              str(Path(__file__).parent / "logs"),
         'log_level':            'INFO',
+        'log_queue_size':       10000,
         'alerts_dir':           str(Path(__file__).parent / "alerts"),
         'dedupe_window':        120,
         'ntfy_topic':           '',
         'notification_timeout': 5.0,
         'filler_byte':          0xAB,
+        'metrics_host':         '127.0.0.1',
+        'metrics_port':         9101,
+        'debug_profiling':      False,
+        'profile_seconds':      30.0,
+        'memory_budget_mb':     0.0,
+        'memory_interval':      60.0,
+        'memory_tracemalloc':   False,
+        'memory_snapshot_every': 3600.0,
+        'memory_top':           10,
     }
 
-    if config_path.exists():
-        config.read(config_path)
-        s = config
+    found = config_store.exists()
+    if found:
+        s = config_store.parser()
         cfg['serial_port']          = s.get('serial',       'port',                 fallback=cfg['serial_port'])
         cfg['serial_baud']          = s.getint('serial',    'baud',                 fallback=cfg['serial_baud'])
         cfg['serial_timeout']       = s.getfloat('advanced','serial_timeout',       fallback=cfg['serial_timeout'])
         cfg['serial_retry_delay']   = s.getfloat('advanced','serial_retry_delay',   fallback=cfg['serial_retry_delay'])
+        cfg['read_queue_size']      = s.getint('advanced',  'read_queue_size',      fallback=cfg['read_queue_size'])
         cfg['log_dir']              = s.get('logging',      'log_dir',              fallback=cfg['log_dir'])
         cfg['log_level']            = s.get('logging',      'log_level',            fallback=cfg['log_level'])
+        cfg['log_queue_size']       = s.getint('logging',   'queue_size',           fallback=cfg['log_queue_size'])
         cfg['alerts_dir']           = s.get('alerts',       'alerts_dir',           fallback=cfg['alerts_dir'])
         cfg['dedupe_window']        = s.getint('alerts',    'dedupe_window',        fallback=cfg['dedupe_window'])
         cfg['ntfy_topic']           = s.get('notifications','ntfy_topic',           fallback=cfg['ntfy_topic'])
         cfg['notification_timeout'] = s.getfloat('advanced','notification_timeout', fallback=cfg['notification_timeout'])
         filler_str = s.get('hardware', 'filler_byte', fallback='0xAB')
         cfg['filler_byte'] = int(filler_str, 16) if filler_str.startswith('0x') else int(filler_str)
+        cfg['metrics_host']         = s.get('metrics',      'host',                 fallback=cfg['metrics_host'])
+        cfg['metrics_port']         = s.getint('metrics',   'logger_port',          fallback=cfg['metrics_port'])
+        cfg['debug_profiling']      = s.getboolean('debug', 'profiling',            fallback=cfg['debug_profiling'])
+        cfg['profile_seconds']      = s.getfloat('debug',   'profile_seconds',      fallback=cfg['profile_seconds'])
+        cfg['memory_budget_mb']     = s.getfloat('memory',  'logger_budget_mb',     fallback=cfg['memory_budget_mb'])
+        cfg['memory_interval']      = s.getfloat('memory',  'interval',             fallback=cfg['memory_interval'])
+        cfg['memory_tracemalloc']   = s.getboolean('memory','tracemalloc',          fallback=cfg['memory_tracemalloc'])
+        cfg['memory_snapshot_every'] = s.getfloat('memory', 'snapshot_every',       fallback=cfg['memory_snapshot_every'])
+        cfg['memory_top']           = s.getint('memory',    'top',                  fallback=cfg['memory_top'])
 
     def resolve(p):
         p = os.path.expanduser(p)
         return p if os.path.isabs(p) else str(Path(__file__).parent / p)
     cfg['log_dir']    = resolve(cfg['log_dir'])
     cfg['alerts_dir'] = resolve(cfg['alerts_dir'])
-    cfg['_config_found'] = config_path.exists()
+    cfg['_config_found'] = found
     return cfg
 
 
 CONFIG = load_config()
 
 IS_PI    = os.path.exists("/sys/class/gpio") or os.path.exists("/proc/device-tree/model")
+SERIAL_MODE = IS_PI   # read the serial port; off-Pi the logger reads stdin unless run with --serial
 PORT     = CONFIG['serial_port']
 BAUD     = CONFIG['serial_baud']
 FILLER   = bytes([CONFIG['filler_byte']])
@@ -98,16 +130,51 @@ ALERTS_DIR = Path(CONFIG['alerts_dir'])
 LOGS_DIR   = Path(CONFIG['log_dir'])
 JSONL_FILE = str(ALERTS_DIR / "events.jsonl")
 TEXT_FILE  = str(ALERTS_DIR / "events.log")
+TRACE_FILE = str(ALERTS_DIR / alert_trace.TRACE_FILE)
 
 for d in [ALERTS_DIR, LOGS_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
 
+# =============================
+# Metrics
+# =============================
+
+BYTES_READ     = metrics.counter("tft911_logger_bytes_read_total", "Bytes read from the serial port (or stdin)")
+FILLER_BYTES   = metrics.counter("tft911_logger_filler_bytes_total", "TFT preamble filler bytes stripped")
+BURSTS_FRAMED  = metrics.counter("tft911_logger_bursts_framed_total", "Complete ZCZC...NNNN bursts framed")
+BURSTS_DROPPED = metrics.counter("tft911_logger_bursts_discarded_total", "Bursts discarded for having no valid SAME header")
+DUPLICATES     = metrics.counter("tft911_logger_duplicates_total", "Alerts skipped as duplicates within the dedupe window")
+DECODE_FAILS   = metrics.counter("tft911_logger_decode_failures_total", "Alerts logged without a decode", ["reason"])
+NOTIFICATIONS  = metrics.counter("tft911_logger_notifications_total", "ntfy notification outcomes", ["outcome"])
+SERIAL_ERRORS  = metrics.counter("tft911_logger_serial_errors_total", "Serial read errors that forced a reopen")
+FSYNC_SECONDS  = metrics.histogram("tft911_logger_fsync_seconds", "Time to append and fsync one line", ["file"],
+                                   buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+READ_DEPTH     = metrics.gauge("tft911_logger_read_queue_depth", "Chunks read but not yet processed")
+READ_WAIT      = metrics.histogram("tft911_logger_read_queue_wait_seconds",
+                                   "Time a chunk waited between the reader and the processor")
+READ_STALLS    = metrics.histogram("tft911_logger_read_stall_seconds",
+                                   "Time the reader was blocked on a full queue (the port was not being drained)")
+
+
 # =============================
 # Logging
 # =============================
 
-def setup_logging(log_dir: str, log_level: str) -> logging.Logger:
+# extra= for the per-alert console receipt: bare text on stdout, not in the
+# log file, and never dropped on a full queue
+RECEIPT = {"receipt": True, **logqueue.KEEP}
+
+def _is_receipt(record: logging.LogRecord) -> bool:
+    return getattr(record, "receipt", False)
+
+def setup_logging(log_dir: str, log_level: str, queue_size: int = logqueue.QUEUE_SIZE) -> logging.Logger:
+    """
+    The eas_logger logger. Console and rotating-file writes happen on a
+    listener thread (logqueue.py), so logging from the serial loop only enqueues.
+    Receipts (extra=RECEIPT) share the queue, so they stay in order with the
+    log and are flushed before shutdown; filters send them to their own handler.
+    """
     logger = logging.getLogger("eas_logger")
     logger.setLevel(logging.DEBUG)
     fmt_console = logging.Formatter('[%(asctime)s] %(levelname)-8s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -115,14 +182,18 @@ def setup_logging(log_dir: str, log_level: str) -> logging.Logger:
     console = logging.StreamHandler(sys.stdout)
     console.setLevel(getattr(logging, log_level.upper(), logging.INFO))
     console.setFormatter(fmt_console)
+    console.addFilter(lambda r: not _is_receipt(r))
     fh = RotatingFileHandler(os.path.join(log_dir, "eas_logger.log"), maxBytes=10*1024*1024, backupCount=5)
     fh.setLevel(logging.DEBUG)
     fh.setFormatter(fmt_file)
-    logger.addHandler(console)
-    logger.addHandler(fh)
+    fh.addFilter(lambda r: not _is_receipt(r))
+    receipts = logging.StreamHandler(sys.stdout)
+    receipts.setFormatter(logging.Formatter('%(message)s'))
+    receipts.addFilter(_is_receipt)
+    logqueue.attach(logger, [console, fh, receipts], queue_size)
     return logger
 
-logger = setup_logging(CONFIG['log_dir'], CONFIG['log_level'])
+logger = setup_logging(CONFIG['log_dir'], CONFIG['log_level'], CONFIG['log_queue_size'])
 
 
 # =============================
@@ -161,6 +232,8 @@ def _compute_expires_utc(canonical: str) -> str | None:
 _ALERT_MAX     = 10 * 1024 * 1024  # 10 MB
 _ALERT_BACKUPS = 3
 
+_fsync_hist = {}   # path → FSYNC_SECONDS child
+
 def append_line(path: str, line: str) -> None:
     # Skip write if disk is critically full
     try:
@@ -183,10 +256,22 @@ def append_line(path: str, line: str) -> None:
         os.replace(path, f"{path}.1")
         logger.info(f"Rotated {os.path.basename(path)}")
 
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
-        f.flush()
-        os.fsync(f.fileno())
+    hist = _fsync_hist.get(path)
+    if hist is None:
+        hist = _fsync_hist[path] = FSYNC_SECONDS.labels(file=os.path.basename(path))
+    with hist.time():
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def save_record(record: AlertRecord) -> None:
+    """Append a record to the JSONL log, then the fsync stamp of its trace to trace.jsonl."""
+    append_line(JSONL_FILE, record.to_json())
+    trace = record.trace
+    if trace:
+        append_line(TRACE_FILE, jsoncodec.dumps_line(alert_trace.stamp({"id": trace["id"]}, "fsynced")))
 
 
 # =============================
@@ -196,16 +281,20 @@ def append_line(path: str, line: str) -> None:
 def send_notification(title: str, message: str) -> dict:
     """Push alert to phone via ntfy.sh. Returns delivery receipt."""
     if not NTFY_URL or requests is None:
+        NOTIFICATIONS.labels(outcome="skipped").inc()
         return {"attempted": False}
     try:
         r = requests.post(NTFY_URL, data=message.encode(), headers={"Title": title}, timeout=CONFIG['notification_timeout'])
         if r.status_code == 200:
             logger.info(f"Notification sent: {title}")
+            NOTIFICATIONS.labels(outcome="sent").inc()
             return {"attempted": True, "sent": True, "http_status": r.status_code}
         logger.warning(f"Notification failed (HTTP {r.status_code})")
+        NOTIFICATIONS.labels(outcome="http_error").inc()
         return {"attempted": True, "sent": False, "http_status": r.status_code}
     except Exception as e:
         logger.warning(f"Notification failed: {e}")
+        NOTIFICATIONS.labels(outcome="error").inc()
         return {"attempted": True, "sent": False, "error": str(e)}
 
 
@@ -215,7 +304,7 @@ def send_notification(title: str, message: str) -> dict:
 
 def open_serial(port: str, baud: int):
     """Open serial port, waiting indefinitely if not present yet."""
-    if not IS_PI:
+    if not SERIAL_MODE:
         logger.info("Test mode — reading from stdin.")
         return None
     if not SERIAL_AVAILABLE:
@@ -237,6 +326,105 @@ def open_serial(port: str, baud: int):
             time.sleep(CONFIG['serial_retry_delay'])
 
 
+RESYNC = "resync"   # queued after a reconnect: the partial burst can't continue
+EOF    = None       # queued when stdin ends
+
+class SerialReader:
+    """
+    Drains the serial port (or stdin) into a bounded queue on its own thread.
+
+    The reader does nothing but read, so decoding, the ntfy POST and fsyncs
+    in the processor never leave bytes waiting in the UART. Items are
+    (time read, bytes — or a str line from stdin), RESYNC or EOF. A full
+    queue blocks the reader; the time blocked is READ_STALLS.
+
+    Usage:
+        reader = SerialReader().start()
+        item   = reader.queue.get()
+    """
+
+    def __init__(self, maxsize: int = 4096, open_port=None):
+        self.queue  = queue.Queue(maxsize=max(1, maxsize))
+        self.ser    = None
+        self._open  = open_port or (lambda: open_serial(PORT, BAUD))
+        self._stop  = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="serial-reader")
+        READ_DEPTH.set_function(self.queue.qsize)
+
+    def start(self) -> "SerialReader":
+        """Open the port (waiting for it, as open_serial does), then start reading."""
+        self.ser = self._open()
+        self.thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            if self.ser: self.ser.close()
+        except Exception:
+            pass
+
+    def _put(self, item) -> None:
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        t0 = time.perf_counter()
+        self.queue.put(item)
+        READ_STALLS.observe(time.perf_counter() - t0)
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self.ser is None:
+                        data = sys.stdin.readline()
+                        if not data:
+                            break
+                    else:
+                        data = self.ser.read(256)
+                        if not data:
+                            continue
+                except SerialException as e:
+                    if self._stop.is_set():
+                        break
+                    logger.error(f"Serial error: {e}")
+                    SERIAL_ERRORS.inc()
+                    try:
+                        self.ser.close()
+                    except Exception:
+                        pass
+                    self._put(RESYNC)
+                    self.ser = self._open()
+                    continue
+                BYTES_READ.inc(len(data))
+                self._put((time.time(), data))
+        except Exception as ex:
+            if not self._stop.is_set():
+                logger.exception(f"Serial reader stopped: {ex}")
+        finally:
+            if self._stop.is_set():
+                try:
+                    self.queue.put_nowait(EOF)   # nobody may be left to make room
+                except queue.Full:
+                    pass
+            else:
+                self._put(EOF)
+
+
+def chunk_text(data) -> str:
+    """A queued chunk as text: serial bytes without TFT filler, or a stdin line minus # comments."""
+    if isinstance(data, str):
+        text = data.strip()
+        return "" if text.startswith("#") else text
+    n = len(data)
+    data = data.replace(FILLER, b"")   # strip TFT911 preamble bytes
+    if len(data) != n:
+        FILLER_BYTES.inc(n - len(data))
+    return data.decode("ascii", errors="ignore")
+
+
 # =============================
 # Main Loop
 # =============================
@@ -244,6 +432,50 @@ def open_serial(port: str, baud: int):
 # Match a SAME header — printable ASCII only to filter serial noise
 HEADER_RE = re.compile(r"(ZCZC-[\x20-\x7E]*?-)(?=ZCZC|NNNN|$)")
 
+MAX_PENDING = 4096   # a real burst is well under 1 KB; longer means its NNNN was lost
+
+def split_bursts(buf: str) -> tuple[list, str]:
+    """
+    Complete ZCZC...NNNN bursts in buf, plus the tail to keep buffering.
+
+    The tail stays bounded on a noisy line: text before any ZCZC is dropped
+    (bar a possible split "ZCZ"), and a burst pending past MAX_PENDING
+    resyncs on the next ZCZC.
+    """
+    bursts = []
+    while True:
+        start = buf.find("ZCZC")
+        if start < 0:
+            return bursts, buf[-3:]
+        end = buf.find("NNNN", start)
+        if end < 0:
+            if len(buf) - start > MAX_PENDING:
+                nxt = buf.find("ZCZC", start + 4)
+                return bursts, buf[nxt:] if nxt >= 0 else buf[-3:]
+            return bursts, buf[start:]
+        bursts.append(buf[start:end + 4])
+        buf = buf[end + 4:]
+
+def _eas2text():
+    """The EAS2Text class, imported on first use (blocks until a warm-up import finishes)."""
+    from EAS2Text import EAS2Text
+    return EAS2Text
+
+def _warm_eas2text() -> None:
+    try:
+        _eas2text()
+    except Exception as ex:
+        logger.warning(f"EAS2Text failed to load: {ex}")
+
+
+def _on_sigusr2(signum, frame) -> None:
+    """Profile the processor (main thread) and serial reader for profile_seconds into the logs directory."""
+    threads = {t.ident for t in threading.enumerate() if t is threading.main_thread() or t.name == "serial-reader"}
+    path = profiler.profile_to_file(LOGS_DIR, CONFIG['profile_seconds'], prefix="logger-profile",
+                                    threads=threads, report=logger.info)
+    logger.info(f"SIGUSR2: profiling for {CONFIG['profile_seconds']:g}s → {path}")
+
+
 def main() -> None:
     logger.info(f"EAS Logger starting | Platform: {'Raspberry Pi' if IS_PI else 'Dev/Test'}")
     if CONFIG['_config_found']:
@@ -251,70 +483,71 @@ def main() -> None:
     else:
         logger.warning("config.ini not found — using built-in defaults.")
 
+    if CONFIG['metrics_port']:
+        try:
+            metrics.serve(CONFIG['metrics_port'], CONFIG['metrics_host'])
+            logger.info(f"Metrics on http://{CONFIG['metrics_host']}:{CONFIG['metrics_port']}/metrics")
+        except OSError as ex:
+            logger.warning(f"Metrics listener not started on port {CONFIG['metrics_port']}: {ex}")
+
+    if CONFIG['debug_profiling'] and hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, _on_sigusr2)
+        logger.info(f"Profiling enabled — kill -USR2 {os.getpid()} writes a profile to {LOGS_DIR}")
+
+    if EAS2TEXT_AVAILABLE and not eas_render.native_available():
+        threading.Thread(target=_warm_eas2text, daemon=True, name="eas2text-warm").start()
+
+    watch = memwatch.MemoryWatch("logger", LOGS_DIR, CONFIG['memory_interval'], CONFIG['memory_budget_mb'],
+                                 CONFIG['memory_tracemalloc'], CONFIG['memory_snapshot_every'],
+                                 CONFIG['memory_top'], on_exceed=lambda rss: None).start()
+
     seen: dict[str, float] = {}  # fingerprint → timestamp for deduplication
     buf  = ""
-    ser  = open_serial(PORT, BAUD)
+    reader = SerialReader(CONFIG['read_queue_size']).start()
 
     try:
         while True:
-            # --- Read from serial or stdin ---
+            # Over the memory budget: finish here, between bursts, and let systemd restart us
+            if watch.exceeded.is_set():
+                logger.warning("Memory budget exceeded — exiting for restart.")
+                sys.exit(memwatch.EXIT_RESTART)
+
+            # --- Next chunk from the reader thread ---
             try:
-                if not IS_PI:
-                    line = sys.stdin.readline()
-                    if not line:
-                        break
-                    text = line.strip()
-                    if not text or text.startswith("#"):
-                        continue
-                else:
-                    if ser is None:
-                        logger.error("No serial connection.")
-                        break
-                    chunk = ser.read(256)
-                    if not chunk:
-                        continue
-                    chunk = chunk.replace(FILLER, b"")  # strip TFT911 preamble bytes
-                    if not chunk:
-                        continue
-                    text = chunk.decode("ascii", errors="ignore")
-                    if not text:
-                        continue
-
-            except KeyboardInterrupt:
-                raise
-            except SerialException as e:
-                logger.error(f"Serial error: {e}")
-                try:
-                    if ser: ser.close()
-                except Exception:
-                    pass
-                ser = open_serial(PORT, BAUD)
+                item = reader.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if item is EOF:
+                break
+            if item is RESYNC:
+                buf = ""   # a burst cut off by the disconnect can't continue on the new connection
+                continue
+            t_read, data = item
+            READ_WAIT.observe(time.time() - t_read)
+            text = chunk_text(data)
+            if not text:
                 continue
 
             buf += text
 
             # --- Extract complete ZCZC...NNNN bursts ---
-            while True:
-                start = buf.find("ZCZC")
-                if start < 0:
-                    break
-                end = buf.find("NNNN", start)
-                if end < 0:
-                    if start > 0:
-                        buf = buf[start:]
-                    break
-
-                raw_burst = buf[start:end + 4]
-                buf = buf[end + 4:]
+            bursts, buf = split_bursts(buf)
+            if bursts:
+                BURSTS_FRAMED.inc(len(bursts))
+            for raw_burst in bursts:
+                # The burst is framed once the chunk holding its NNNN has been read
+                trace = alert_trace.start(t_read)
 
                 # Pull the first clean header from the burst
                 # The TFT has already majority-voted the three copies internally
                 headers = [h for h in HEADER_RE.findall(raw_burst) if h.startswith("ZCZC-")]
                 if not headers:
                     logger.warning("Burst had no valid SAME headers — discarding.")
+                    BURSTS_DROPPED.inc()
                     continue
 
                 canonical = " ".join(headers[0].split())
+                alert_trace.stamp(trace, "parsed")
 
                 logger.info("SAME burst detected")
 
@@ -323,39 +556,45 @@ def main() -> None:
                 now = time.time()
                 if now - seen.get(fp, 0) < CONFIG['dedupe_window']:
                     logger.info("Duplicate alert — skipping.")
+                    DUPLICATES.inc()
                     continue
                 seen[fp] = now
                 seen = {k: v for k, v in seen.items() if now - v < CONFIG['dedupe_window']}
 
-                # --- Decode with EAS2Text ---
+                # --- Decode (native, falling back to EAS2Text) ---
                 received_local = now_local()
-                if not EAS2TEXT_AVAILABLE:
+                oof = eas_render.decode(canonical)
+                if oof is None and not EAS2TEXT_AVAILABLE:
                     logger.warning("EAS2Text not installed — alert logged without decode")
-                    record = {
-                        "received_utc":     now_utc(),
-                        "received_local":   received_local,
-                        "canonical_header": canonical,
-                        "expires_utc":      _compute_expires_utc(canonical),
-                        "decode_error":     "EAS2Text not installed",
-                        "notification":     {"attempted": False},
-                    }
-                    append_line(JSONL_FILE, json.dumps(record, ensure_ascii=False))
+                    DECODE_FAILS.labels(reason="eas2text_missing").inc()
+                    record = AlertRecord(
+                        received_utc     = now_utc(),
+                        received_local   = received_local,
+                        canonical_header = canonical,
+                        expires_utc      = _compute_expires_utc(canonical),
+                        decode_error     = "EAS2Text not installed",
+                        trace            = trace,
+                    )
+                    save_record(record)
                     continue
                 try:
-                    oof = EAS2Text(canonical)  # type: ignore[misc]
+                    oof = oof or _eas2text()(canonical)
                 except Exception as ex:
                     logger.exception(f"EAS2Text decode failed: {ex}")
-                    record = {
-                        "received_utc":     now_utc(),
-                        "received_local":   received_local,
-                        "canonical_header": canonical,
-                        "expires_utc":      _compute_expires_utc(canonical),
-                        "decode_error":     str(ex),
-                        "notification":     {"attempted": False},
-                    }
-                    append_line(JSONL_FILE, json.dumps(record, ensure_ascii=False))
+                    DECODE_FAILS.labels(reason="error").inc()
+                    record = AlertRecord(
+                        received_utc     = now_utc(),
+                        received_local   = received_local,
+                        canonical_header = canonical,
+                        expires_utc      = _compute_expires_utc(canonical),
+                        decode_error     = str(ex),
+                        trace            = trace,
+                    )
+                    save_record(record)
                     continue
 
+                alert_trace.stamp(trace, "decoded")
+
                 eas_text  = getattr(oof, "EASText",  None) or "EAS Event"
                 title     = eas_text.split('\n')[0]
                 fips_list = getattr(oof, "FIPSText", []) or []
@@ -380,37 +619,40 @@ def main() -> None:
 
                 # --- Notify ---
                 ntfy_receipt = send_notification(title, text_block)
+                alert_trace.stamp(trace, "notified")
 
                 # --- Save to files ---
-                record = {
-                    "received_utc":     now_utc(),
-                    "received_local":   received_local,
-                    "canonical_header": canonical,
-                    "expires_utc":      _compute_expires_utc(canonical),
-                    "event_code":       getattr(oof, "evnt",     None) or "",
-                    "originator_code":  getattr(oof, "org",      None) or "",
-                    "sender":           sender,
-                    "event_text":       evt_text,
-                    "org_text":         org_text,
-                    "eas_text":         eas_text,
-                    "locations_pretty": locations,
-                    "notification":     ntfy_receipt,
-                }
-
-                append_line(JSONL_FILE, json.dumps(record, ensure_ascii=False))
+                record = AlertRecord(
+                    received_utc     = now_utc(),
+                    received_local   = received_local,
+                    canonical_header = canonical,
+                    expires_utc      = _compute_expires_utc(canonical),
+                    event_code       = getattr(oof, "evnt", None) or "",
+                    originator_code  = getattr(oof, "org",  None) or "",
+                    sender           = sender,
+                    event_text       = evt_text,
+                    org_text         = org_text,
+                    eas_text         = eas_text,
+                    locations_pretty = locations,
+                    notification     = ntfy_receipt,
+                    trace            = trace,
+                )
+
+                save_record(record)
                 append_line(TEXT_FILE,  text_block + "\n")
                 logger.info(f"Logged: {title} | {len(locations)} location(s)")
-                print(f"\n{text_block}\n", flush=True)
+                logger.info(f"\n{text_block}\n", extra=RECEIPT)
 
     except KeyboardInterrupt:
         logger.info("Stopped by user.")
     finally:
-        try:
-            if ser: ser.close()
-        except Exception:
-            pass
+        reader.close()
         logger.info("Logger shut down.")
 
 
 if __name__ == "__main__":
+    # --serial [PORT]: read a serial port off-Pi too, e.g. the pty from `virtual_tft.py pty`
+    if sys.argv[1:2] == ["--serial"]:
+        SERIAL_MODE = True
+        PORT = sys.argv[2] if len(sys.argv) > 2 else PORT
     main()
\ No newline at end of file
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+The alert record written by TFT_logger and read back by the dashboard.
+
+One line of events.jsonl is one AlertRecord. It is a slotted dataclass, so
+no per-instance dict is kept. Strings that repeat across alerts are interned
+on the way in: codes, sender, texts and every location name. Notification
+receipts share one dict per distinct receipt. The dashboard can therefore
+keep a long history in memory; `python3 bench.py records` measures the
+per-record footprint against plain json.loads() dicts.
+
+Serialisation has one path each way. to_dict() gives the JSON key order,
+and from_dict() accepts any schema version. Fields a newer writer added are
+kept in `extra` and written back out unchanged.
+
+Schema versions:
+  0  records written before the "schema" key existed
+  1  adds "schema" and the optional "trace" (alert_trace.py)
+
+    python3 alert_record.py --verify [events.jsonl]   round-trip every line byte for byte
+"""
+
+import os
+import sys
+from dataclasses import dataclass, field
+
+import jsoncodec
+
+SCHEMA = 1
+
+_REQUIRED = ("received_utc", "received_local", "canonical_header")
+
+# Decoded fields; records that failed to decode carry decode_error instead
+_DECODED = ("event_code", "originator_code", "sender", "event_text", "org_text", "eas_text", "locations_pretty")
+_KNOWN   = frozenset(("schema", "received_utc", "received_local", "canonical_header", "expires_utc",
+                      "decode_error", "notification", "trace") + _DECODED)
+
+_intern   = sys.intern
+_receipts = {}   # sorted items of a notification receipt → the shared dict
+
+
+def _receipt(d: dict) -> dict:
+    """One shared dict per distinct receipt. Callers treat receipts as read-only."""
+    if not d:
+        d = {"attempted": False}
+    try:
+        key = tuple(sorted(d.items()))
+        r = _receipts.get(key)
+    except TypeError:   # a nested value — not worth sharing
+        return d
+    if r is None:
+        r = _receipts[key] = d if len(_receipts) < 256 else dict(d)
+    return r
+
+
+@dataclass(slots=True)
+class AlertRecord:
+    received_utc:     str
+    received_local:   str
+    canonical_header: str
+    expires_utc:      str | None  = None
+    event_code:       str         = ""
+    originator_code:  str         = ""
+    sender:           str         = ""
+    event_text:       str         = ""
+    org_text:         str         = ""
+    eas_text:         str         = ""
+    locations_pretty: tuple       = ()
+    notification:     dict        = field(default_factory=lambda: _receipt({}))
+    decode_error:     str         = ""     # set for alerts logged without a decode
+    trace:            dict | None = None
+    schema:           int         = SCHEMA
+    extra:            dict | None = None   # keys this version doesn't know, kept for round trips
+
+    def __post_init__(self):
+        self.event_code       = _intern(self.event_code)
+        self.originator_code  = _intern(self.originator_code)
+        self.sender           = _intern(self.sender)
+        self.event_text       = _intern(self.event_text)
+        self.org_text         = _intern(self.org_text)
+        self.locations_pretty = tuple(_intern(str(x)) for x in self.locations_pretty)
+        self.notification     = _receipt(self.notification)
+
+    # ── dict-style reads, for templates and code written against plain records ──
+
+    def get(self, key: str, default=None):
+        try:
+            v = getattr(self, key)
+        except AttributeError:
+            return (self.extra or {}).get(key, default)
+        return default if v is None else v
+
+    def __getitem__(self, key: str):
+        v = self.get(key, KeyError)
+        if v is KeyError:
+            raise KeyError(key)
+        return v
+
+    # ── serialisation ──
+
+    @property
+    def decoded(self) -> bool:
+        return not self.decode_error
+
+    def to_dict(self) -> dict:
+        """The JSON object, in the logger's key order; decoded fields only when decoded."""
+        d = {
+            "schema":           self.schema,
+            "received_utc":     self.received_utc,
+            "received_local":   self.received_local,
+            "canonical_header": self.canonical_header,
+            "expires_utc":      self.expires_utc,
+        }
+        if self.decode_error:
+            d["decode_error"] = self.decode_error
+        else:
+            d["event_code"]       = self.event_code
+            d["originator_code"]  = self.originator_code
+            d["sender"]           = self.sender
+            d["event_text"]       = self.event_text
+            d["org_text"]         = self.org_text
+            d["eas_text"]         = self.eas_text
+            d["locations_pretty"] = list(self.locations_pretty)
+        d["notification"] = self.notification
+        if self.trace is not None:
+            d["trace"] = self.trace
+        if self.extra:
+            d.update(self.extra)
+        if not self.schema:
+            del d["schema"]
+        return d
+
+    def to_json(self) -> str:
+        return jsoncodec.dumps_line(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "AlertRecord":
+        """
+        Build from a parsed JSONL object of any schema version.
+
+        Raises:
+            ValueError: if d is not an object, or a required field is not a string or null.
+            KeyError:   if received_utc, received_local or canonical_header is missing.
+        """
+        if not isinstance(d, dict):
+            raise ValueError(f"expected a JSON object, got {type(d).__name__}")
+        for k in _REQUIRED:   # null is kept as None (and written back as null); readers guard it
+            if not isinstance(d[k], (str, type(None))):
+                raise ValueError(f"{k} must be a string, got {type(d[k]).__name__}")
+        extra = {k: v for k, v in d.items() if k not in _KNOWN} or None
+        return cls(
+            received_utc     = d["received_utc"],
+            received_local   = d["received_local"],
+            canonical_header = d["canonical_header"],
+            expires_utc      = d.get("expires_utc"),
+            event_code       = d.get("event_code") or "",
+            originator_code  = d.get("originator_code") or "",
+            sender           = d.get("sender") or "",
+            event_text       = d.get("event_text") or "",
+            org_text         = d.get("org_text") or "",
+            eas_text         = d.get("eas_text") or "",
+            locations_pretty = d.get("locations_pretty") or (),
+            notification     = d.get("notification") or {},
+            decode_error     = d.get("decode_error") or "",
+            trace            = d.get("trace"),
+            schema           = d.get("schema", 0),
+            extra            = extra,
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "AlertRecord":
+        """
+        Raises:
+            ValueError: on malformed JSON.
+            KeyError:   if a required field is missing.
+        """
+        return cls.from_dict(jsoncodec.loads(line))
+
+
+def _verify(path: str) -> int:
+    if not os.path.exists(path):
+        print(f"no archive at {path} — nothing to verify")
+        return 0
+    bad = total = 0
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            total += 1
+            try:
+                out = AlertRecord.from_json(line).to_json()
+            except (ValueError, KeyError) as ex:
+                print(f"  line {n}: unreadable: {ex}")
+                bad += 1
+                continue
+            if out != line:
+                print(f"  line {n}: round trip differs")
+                bad += 1
+    print(f"{total - bad}/{total} records round-trip unchanged")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--verify"]:
+        sys.exit(_verify(sys.argv[2] if len(sys.argv) > 2 else "alerts/events.jsonl"))
+    print(__doc__.strip())
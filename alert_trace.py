@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency tracing, from serial byte to browser.
+
+TFT_logger starts a trace when a ZCZC…NNNN burst is framed and stamps the
+stages it owns into the JSONL record's "trace" field. A record cannot carry
+its own fsync time, so once it is on disk the logger appends
+{"id", "fsynced"} to trace.jsonl beside it. The dashboard stamps the stages
+it owns when it reads the record and pushes it out, and the first browser to
+paint the alert acknowledges it over the socket:
+
+  framed → parsed → decoded → notified → fsynced      TFT_logger
+  → received → emitted → rendered                     web
+
+Stamps are time.time() on the Pi, so both processes share one clock.
+"rendered" is stamped by the server when the ack arrives — browser clocks
+never enter the numbers, at the cost of including the ack's trip back.
+"""
+
+import math
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+
+STAGES        = ("framed", "parsed", "decoded", "notified", "fsynced", "received", "emitted", "rendered")
+TRACE_FILE    = "trace.jsonl"   # fsync stamps, beside events.jsonl
+TRACE_HISTORY = 200             # traces kept by the dashboard for timelines and percentiles
+PERCENTILES   = (50, 95, 99)
+
+
+def start(t: float = None) -> dict:
+    """A new trace framed at t (default now)."""
+    return {"id": uuid.uuid4().hex[:12], "framed": round(time.time() if t is None else t, 6)}
+
+
+def stamp(trace: dict, stage: str, t: float = None) -> dict:
+    """Record stage at t (default now); returns trace."""
+    trace[stage] = round(time.time() if t is None else t, 6)
+    return trace
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[k]
+
+
+def timeline(trace: dict) -> dict:
+    """Stages in order with milliseconds since framing and since the previous stage."""
+    t0, prev, out = trace.get("framed"), None, []
+    for stage in STAGES:
+        t = trace.get(stage)
+        if t is None:
+            continue
+        out.append({
+            "stage":    stage,
+            "t":        t,
+            "since_ms": round((t - t0) * 1000, 2) if t0 is not None else None,
+            "step_ms":  round((t - prev) * 1000, 2) if prev is not None else 0.0,
+        })
+        prev = t
+    return {
+        "id":         trace.get("id"),
+        "event_code": trace.get("event_code", ""),
+        "header":     trace.get("header", ""),
+        "stages":     out,
+        "total_ms":   out[-1]["since_ms"] if out else None,
+    }
+
+
+class TraceStore:
+    """The dashboard's bounded table of recent traces, keyed by trace id."""
+
+    def __init__(self, history: int = TRACE_HISTORY):
+        self.history = history
+        self._lk     = threading.Lock()
+        self._traces = OrderedDict()   # id → {"id", stage: epoch, ...}, oldest first
+
+    def _entry(self, trace_id: str) -> dict:
+        tr = self._traces.get(trace_id)
+        if tr is None:
+            tr = self._traces[trace_id] = {"id": trace_id}
+            while len(self._traces) > self.history:
+                self._traces.popitem(last=False)
+        return tr
+
+    def merge(self, trace: dict, **info) -> None:
+        """Add stages (and labels such as event_code) from a record or trace.jsonl line."""
+        trace_id = trace.get("id")
+        if not trace_id:
+            return
+        with self._lk:
+            tr = self._entry(trace_id)
+            tr.update((k, v) for k, v in trace.items() if k in STAGES)
+            tr.update(info)
+
+    def stamp(self, trace_id: str, stage: str, t: float = None) -> bool:
+        """Stamp stage once; False if the trace is unknown or already has it."""
+        with self._lk:
+            tr = self._traces.get(trace_id)
+            if tr is None or stage in tr:
+                return False
+            stamp(tr, stage, t)
+            return True
+
+    def get(self, trace_id: str) -> dict | None:
+        with self._lk:
+            tr = self._traces.get(trace_id)
+            return timeline(tr) if tr is not None else None
+
+    def recent(self, limit: int = 50) -> list:
+        """Timelines, newest first."""
+        with self._lk:
+            trs = list(self._traces.values())[-limit:] if limit > 0 else []
+            return [timeline(tr) for tr in reversed(trs)]
+
+    def percentiles(self) -> dict:
+        """
+        Milliseconds from framing to each stage over the traces held.
+
+        Returns:
+            {"n": traces, "stages": {stage: {"p50": ms, "p95": ms, "p99": ms, "n": samples}}}
+        """
+        with self._lk:
+            trs = [dict(tr) for tr in self._traces.values()]
+        stages = {}
+        for stage in STAGES[1:]:
+            ms = sorted((tr[stage] - tr["framed"]) * 1000 for tr in trs if stage in tr and "framed" in tr)
+            if ms:
+                stages[stage] = {f"p{p}": round(percentile(ms, p), 1) for p in PERCENTILES}
+                stages[stage]["n"] = len(ms)
+        return {"n": len(trs), "stages": stages}
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Browser → Pi audio transport for PTT and VoIP announcement recording.
+
+The browser can send mic audio in one of several transport modes. Lower modes
+trade fidelity for bandwidth so PTT still works over a weak link (e.g. a phone
+hotspot). Every mode is turned back into what the aplay sink expects —
+S16_LE mono at SINK_RATE — before it reaches the TFT CH1 input.
+
+  pcm44   44.1 kHz S16     ~706 kbit/s  (original behaviour)
+  pcm16   16 kHz   S16     ~256 kbit/s
+  pcm8    8 kHz    S16     ~128 kbit/s
+  ulaw8   8 kHz    G.711 µ-law  ~64 kbit/s
+
+Resampling and µ-law decode are vectorised with NumPy when it is installed.
+Without NumPy, aplay is opened at the transport rate/format instead and does
+the conversion itself.
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+SINK_RATE = 44100   # rate the aplay → TFT CH1 sink is opened at
+
+# Transport modes, best quality first. kbps is the raw payload bitrate.
+MODES = {
+    "pcm44": {"rate": 44100, "codec": "s16",  "kbps": 706},
+    "pcm16": {"rate": 16000, "codec": "s16",  "kbps": 256},
+    "pcm8":  {"rate": 8000,  "codec": "s16",  "kbps": 128},
+    "ulaw8": {"rate": 8000,  "codec": "ulaw", "kbps": 64},
+}
+
+# Measured throughput must be this many times the mode's bitrate to pick it —
+# leaves room for socket.io framing, acks and link jitter.
+HEADROOM = 2.0
+
+
+def pick_mode(measured_kbps) -> str:
+    """
+    Pick the best transport mode the measured link throughput can sustain.
+
+    Args:
+        measured_kbps: Throughput measured by the browser's probe, in kbit/s.
+                       None/0/garbage selects the lowest-bandwidth mode.
+    """
+    try:
+        kbps = float(measured_kbps or 0)
+    except (TypeError, ValueError):
+        kbps = 0.0
+    for name, mode in MODES.items():
+        if kbps >= mode["kbps"] * HEADROOM:
+            return name
+    return "ulaw8"
+
+
+def _ulaw_table() -> list:
+    """G.711 µ-law byte → linear Int16 sample."""
+    table = []
+    for b in range(256):
+        u    = ~b & 0xFF
+        t    = (((u & 0x0F) << 3) + 0x84) << ((u >> 4) & 0x07)
+        table.append(0x84 - t if u & 0x80 else t - 0x84)
+    return table
+
+ULAW_TABLE = _ulaw_table()
+
+
+class Resampler:
+    """
+    Streaming linear-interpolation resampler.
+
+    Keeps the last input sample and the fractional output position between
+    calls so consecutive frames join without clicks.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.step  = src_rate / dst_rate
+        self.pos   = 0.0                        # next output position, in input samples
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    def process(self, x):
+        buf  = np.concatenate((self._tail, x.astype(np.float32)))
+        last = len(buf) - 1
+        if last < self.pos:
+            self._tail = buf
+            return np.zeros(0, dtype=np.float32)
+        n   = int((last - self.pos) // self.step) + 1
+        idx = self.pos + self.step * np.arange(n)
+        out = np.interp(idx, np.arange(len(buf)), buf)
+        self.pos   = idx[-1] + self.step - last
+        self._tail = buf[-1:]
+        return out
+
+
+class Decoder:
+    """
+    Per-session decoder: transport payload bytes → bytes for the aplay sink.
+
+    Use sink_args() to build the matching aplay command line.
+    """
+
+    def __init__(self, rate: int, codec: str = "s16"):
+        self.rate  = rate
+        self.codec = codec
+        self.convert = NUMPY_AVAILABLE and (codec != "s16" or rate != SINK_RATE)
+        if self.convert:
+            self._ulaw = np.array(ULAW_TABLE, dtype=np.int16)
+            self._rs   = Resampler(rate, SINK_RATE) if rate != SINK_RATE else None
+
+    def sink_args(self) -> list:
+        """aplay arguments for this session's output."""
+        if self.convert or (self.codec == "s16" and self.rate == SINK_RATE):
+            return ['aplay', '-r', str(SINK_RATE), '-f', 'S16_LE', '-c', '1', '-']
+        fmt = 'MU_LAW' if self.codec == "ulaw" else 'S16_LE'
+        return ['aplay', '-r', str(self.rate), '-f', fmt, '-c', '1', '-']
+
+    def decode(self, payload: bytes) -> bytes:
+        if not self.convert:
+            return payload
+        if self.codec == "ulaw":
+            pcm = self._ulaw[np.frombuffer(payload, dtype=np.uint8)]
+        else:
+            pcm = np.frombuffer(payload[:len(payload) & ~1], dtype='<i2')
+        if self._rs is None:
+            return pcm.astype('<i2').tobytes()
+        out = self._rs.process(pcm)
+        return np.clip(np.rint(out), -32768, 32767).astype('<i2').tobytes()
@@ -0,0 +1,889 @@
+#!/usr/bin/env python3
+"""
+TFT EAS 911 benchmarks.
+
+Usage:
+  python3 bench.py                          run every group
+  python3 bench.py fanout micro             run selected groups by name
+  python3 bench.py --json out.json micro    also write the results as JSON
+  python3 bench.py --json bench_reference.json --label pi4 micro archive
+                                            store the run under a label in a shared file
+  python3 bench.py --compare old.json new.json[:label]
+                                            per-metric ratios between two runs
+
+Reference runs for Raspberry Pi 3/4/5 are kept in bench_reference.json under
+the labels pi3, pi4 and pi5 (record them on the device with --label).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+
+GROUPS = {}   # name → benchmark function
+
+def group(fn):
+    """Register a benchmark function under its name minus the 'bench_' prefix."""
+    GROUPS[fn.__name__.removeprefix("bench_")] = fn
+    return fn
+
+
+# =============================
+# WebSocket fan-out
+# =============================
+
+@group
+def bench_fanout(clients: int = 50, log_viewers: int = 5, frames: int = 400) -> dict:
+    """
+    Socket.IO fan-out: the same stream of log frames sent as a global
+    broadcast vs. to the 'logs' room, with `clients` connected browsers of
+    which only `log_viewers` have the Logs page open.
+    """
+    import web
+
+    conns = [web.socketio.test_client(web.app) for _ in range(clients)]
+    for i, c in enumerate(conns):
+        topics = ["alerts", "logs"] if i < log_viewers else ["alerts"]
+        c.emit("subscribe", {"topics": topics})
+        c.get_received()
+
+    payload = {"lines": [f"[2026-01-01 00:00:00] INFO     | benchmark line {i}" for i in range(5)]}
+
+    def run(to):
+        t0 = time.process_time()
+        for _ in range(frames):
+            web.socketio.emit("log_lines", payload, to=to)
+        delivered = sum(len(c.get_received()) for c in conns)
+        return delivered, time.process_time() - t0
+
+    b_frames, b_cpu = run(None)
+    r_frames, r_cpu = run("logs")
+    for c in conns:
+        c.disconnect()
+
+    print(f"  fanout: {clients} clients, {log_viewers} on Logs page, {frames} log frames")
+    print(f"    broadcast  {b_frames:>7} frames delivered  {b_cpu * 1000:8.1f} ms CPU")
+    print(f"    rooms      {r_frames:>7} frames delivered  {r_cpu * 1000:8.1f} ms CPU")
+    print(f"    reduction  {1 - r_frames / b_frames:7.1%} frames        {1 - r_cpu / b_cpu:8.1%} CPU")
+    return {
+        "broadcast_frames": b_frames, "broadcast_cpu_s": b_cpu,
+        "rooms_frames":     r_frames, "rooms_cpu_s":     r_cpu,
+    }
+
+
+# =============================
+# FIPS county search
+# =============================
+
+def _percentile(samples: list, pct: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * pct / 100))]
+
+@group
+def bench_fips(limit: int = 8) -> dict:
+    """
+    /api/fips/search workload: every 2..8-character prefix of a spread of
+    county names — what the config page sends while someone types.
+    Compares the indexed search with the original full linear scan.
+    """
+    import utills
+
+    table = utills.fips_table()
+    if not table:
+        print("  fips: EAS2Text FIPS table unavailable — skipped")
+        return {}
+
+    t0 = time.perf_counter()
+    index = utills.FipsIndex(table)
+    build_s = time.perf_counter() - t0
+
+    names   = sorted(table.values())[::40]
+    queries = [n.lower()[:k] for n in names for k in range(2, 9)]
+
+    def linear(q):
+        return [(f"0{k}", v) for k, v in table.items() if q in v.lower()][:limit]
+
+    results = {"build_ms": build_s * 1000, "queries": len(queries)}
+    for label, fn in (("linear", linear), ("indexed", lambda q: index.search(q, limit))):
+        lat = []
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            lat.append(time.perf_counter() - t0)
+        results[f"{label}_p50_us"] = _percentile(lat, 50) * 1e6
+        results[f"{label}_p99_us"] = _percentile(lat, 99) * 1e6
+
+    print(f"  fips: {len(table)} entries, {len(queries)} queries, index build {results['build_ms']:.1f} ms")
+    for label in ("linear", "indexed"):
+        print(f"    {label:<8} p50 {results[f'{label}_p50_us']:9.1f} µs   p99 {results[f'{label}_p99_us']:9.1f} µs")
+    return results
+
+
+# =============================
+# Lookup table cold start
+# =============================
+
+@group
+def bench_lookup(runs: int = 5) -> dict:
+    """
+    Cold-start cost of the county table in a fresh interpreter: mapping
+    eas_lookup.bin vs. importing EAS2Text (which fetches/parses its dataset).
+    """
+    import subprocess
+    import eas_lookup
+
+    if eas_lookup.open_default() is None:
+        print("  lookup: eas_lookup.bin missing or stale — run: python3 eas_lookup.py build")
+        return {}
+
+    snippets = {
+        "artifact": "import eas_lookup; eas_lookup.open_default().fips_name('036109')",
+        "eas2text": "from EAS2Text import EAS2Text; EAS2Text.same_us['SAME']['36109']",
+    }
+    results = {}
+    for label, code in snippets.items():
+        wall = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            wall.append(time.perf_counter() - t0)
+        results[f"{label}_ms"] = _percentile(wall, 50) * 1000
+
+    print(f"  lookup: median of {runs} fresh interpreters (includes ~interpreter start)")
+    for label in snippets:
+        print(f"    {label:<9} {results[f'{label}_ms']:8.1f} ms")
+    return results
+
+
+# =============================
+# Header rendering
+# =============================
+
+@group
+def bench_render(rounds: int = 3) -> dict:
+    """
+    decode_header/logger decode cost per header: the native renderer vs.
+    constructing EAS2Text, over the eas_render golden corpus.
+    """
+    import eas_render
+    from EAS2Text import EAS2Text
+
+    corpus = [(s, tz) for s, tz in eas_render.golden_corpus() if eas_render.render_tft(s, tz)]
+    if not corpus:
+        print("  render: no lookup tables available — skipped")
+        return {}
+
+    def tz_kw(tz):
+        return {} if tz is None else {"timeZone": tz}
+
+    cases = {
+        "tft_native":   lambda s, tz: eas_render.render_tft(s, tz),
+        "tft_eas2text": lambda s, tz: EAS2Text(sameData=s, mode="TFT", **tz_kw(tz)).EASText,
+        "default_native":   lambda s, tz: eas_render.decode(s, tz),
+        "default_eas2text": lambda s, tz: EAS2Text(s, **tz_kw(tz)),
+    }
+    results = {"headers": len(corpus)}
+    for label, fn in cases.items():
+        lat = []
+        for _ in range(rounds):
+            for s, tz in corpus:
+                t0 = time.perf_counter()
+                fn(s, tz)
+                lat.append(time.perf_counter() - t0)
+        results[f"{label}_p50_us"] = _percentile(lat, 50) * 1e6
+        results[f"{label}_p99_us"] = _percentile(lat, 99) * 1e6
+
+    print(f"  render: {len(corpus)} golden headers x {rounds}")
+    for label in cases:
+        print(f"    {label:<17} p50 {results[f'{label}_p50_us']:8.1f} µs   p99 {results[f'{label}_p99_us']:8.1f} µs")
+    for mode in ("tft", "default"):
+        print(f"    {mode} speedup   {results[f'{mode}_eas2text_p50_us'] / results[f'{mode}_native_p50_us']:6.1f}x (p50)")
+    return results
+
+
+# =============================
+# TTS time-to-first-audio
+# =============================
+
+@group
+def bench_speech(runs: int = 5, text: str = "This is a test of the emergency alert system.") -> dict:
+    """
+    Time from request to the first synthesised PCM: a fresh `espeak --stdout`
+    process per announcement (the old chain, before aplay even starts) vs.
+    the persistent libespeak worker in speech.py (cold = includes start-up).
+    """
+    import shutil
+    import subprocess
+    import speech
+
+    results = {}
+    if shutil.which("espeak"):
+        lat = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            p  = subprocess.Popen(['espeak', '-s', '110', '-p', '35', text, '--stdout'], stdout=subprocess.PIPE)
+            p.stdout.read(44 + 2)     # WAV header + first sample
+            lat.append(time.perf_counter() - t0)
+            p.stdout.close()
+            p.wait()
+        results["subprocess_ms"] = _percentile(lat, 50) * 1000
+    else:
+        print("  speech: espeak CLI not installed — subprocess chain skipped")
+
+    t0  = time.perf_counter()
+    eng = speech.SpeechEngine()
+    if eng.available:
+        def first_pcm() -> float:
+            start, first = time.perf_counter(), []
+            eng.stream(text, 110, 35, "", lambda pcm: first or first.append(time.perf_counter()))
+            return first[0] - start
+        results["engine_cold_ms"] = (time.perf_counter() - t0 + first_pcm()) * 1000
+        results["engine_ms"] = _percentile([first_pcm() for _ in range(runs)], 50) * 1000
+    else:
+        print("  speech: libespeak not found — persistent engine skipped")
+
+    if results:
+        print(f"  speech: time to first PCM, median of {runs}")
+        for label, v in results.items():
+            print(f"    {label.removesuffix('_ms'):<12} {v:8.1f} ms")
+    return results
+
+
+# =============================
+# COM3 command throughput
+# =============================
+
+@group
+def bench_com3(rounds: int = 4) -> dict:
+    """
+    TFTController driving the virtual COM3 device end to end: originate + EOM
+    rounds with the configured [pacing] vs. settle times at the emulator's
+    processing times × the calibration margin (what calibrate_pacing finds).
+    Latency is write() → the device accepting the sequence.
+    """
+    import virtual_com3
+    from TFT_Control import TFTController, load_config
+
+    results = {}
+    with virtual_com3.VirtualCOM3() as dev:
+        for label in ("configured", "calibrated"):
+            cfg = load_config()
+            cfg.update(com3_port=dev.port, com3_pin=dev.pin, com3_baud=dev.baud)
+            if label == "calibrated":
+                cfg['pacing'] = {k: round(dev.timings[k] * 1.25, 3) for k in cfg['pacing']}
+            tft = TFTController(cfg)
+            tft.connect()
+            writes, write = [], tft.ser.write
+            tft.ser.write = lambda b: writes.append(time.monotonic()) or write(b)
+            first = len(dev.entries)
+
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                tft.originate("RWT", "1", "01", audio='n')
+                tft.send_eom()
+            wall = time.perf_counter() - t0
+            dev.verify()
+            tft.disconnect()
+
+            got  = dev.entries[first:]
+            lat  = [e.at - w for e, w in zip(got, writes)]
+            lost = sum(1 for e in got if not e.accepted)
+            results[f"{label}_round_ms"]  = wall / rounds * 1000
+            results[f"{label}_cmds_per_s"] = len(writes) / wall
+            results[f"{label}_p50_ms"]    = _percentile(lat, 50) * 1000
+            results[f"{label}_p99_ms"]    = _percentile(lat, 99) * 1000
+            results[f"{label}_lost"]      = lost
+
+    print(f"  com3: {rounds} x (originate + EOM) against virtual_com3 at {dev.baud} baud")
+    for label in ("configured", "calibrated"):
+        print(f"    {label:<10} {results[f'{label}_round_ms']:7.0f} ms/round  "
+              f"{results[f'{label}_cmds_per_s']:5.1f} cmd/s  "
+              f"latency p50 {results[f'{label}_p50_ms']:5.1f} ms  p99 {results[f'{label}_p99_ms']:5.1f} ms  "
+              f"lost {results[f'{label}_lost']}")
+    return results
+
+
+# =============================
+# Hot-path microbenchmarks
+# =============================
+
+def _micro(fn, cases: list, min_time: float = 0.25, repeat: int = 5) -> dict:
+    """
+    Per-call time of fn(*case) averaged over `cases`: median and best of
+    `repeat` passes, each looping long enough to take min_time / repeat.
+    """
+    def one_pass(loops: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            for c in cases:
+                fn(*c)
+        return time.perf_counter() - t0
+
+    loops, target = 1, min_time / repeat
+    while (dt := one_pass(loops)) < target:
+        loops *= 2
+    per_call = [dt] + [one_pass(loops) for _ in range(repeat - 1)]
+    per_call = sorted(t / (loops * len(cases)) for t in per_call)
+    return {"median_us": per_call[len(per_call) // 2] * 1e6, "best_us": per_call[0] * 1e6,
+            "calls": loops * len(cases) * repeat}
+
+
+@group
+def bench_micro() -> dict:
+    """
+    Per-call cost of the logger, controller and dashboard hot paths, over the
+    eas_render golden corpus of headers.
+    """
+    import TFT_logger
+    import eas_render
+    import utills
+    import web
+
+    headers = [s for s, _ in eas_render.golden_corpus()]
+    bursts  = [(h * 3) + "NNNN" for h in headers]
+    stream  = "".join(bursts)
+    rng     = random.Random(42)
+    table   = utills.fips_table()
+    names   = sorted(table.values())[::40] or ["Tompkins"]
+    queries = [(n.lower()[:rng.randint(2, 8)],) for n in names]
+    fips    = [f"0{k}" for k in sorted(table)[::97]] or ["036109"]
+    records = [json.dumps({"received_utc": "2026-01-01T00:00:00Z", "canonical_header": h,
+                           "eas_text": h, "locations_pretty": []}) for h in headers[:200]]
+
+    cases = {
+        "split_bursts":     (lambda: TFT_logger.split_bursts(stream), [()], len(bursts)),
+        "header_re":        (TFT_logger.HEADER_RE.findall, [(b,) for b in bursts], 1),
+        "fingerprint":      (TFT_logger.fingerprint, [(h,) for h in headers], 1),
+        "expires_utc":      (TFT_logger._compute_expires_utc, [(h,) for h in headers], 1),
+        "decode_native":    (eas_render.decode, [(h,) for h in headers], 1),
+        "search_fips":      (utills.search_fips, queries, 1),
+        "build_same_header": (utills.build_same_header,
+                              [("RWT", fips[i:i + 3], "01") for i in range(0, len(fips), 3)], 1),
+    }
+    if TFT_logger.EAS2TEXT_AVAILABLE:
+        cases["decode_eas2text"] = (TFT_logger._eas2text(), [(h,) for h in headers[:100]], 1)
+
+    results = {}
+    for label, (fn, args, per) in cases.items():
+        r = _micro(fn, args)
+        if per > 1:   # one call covers `per` items — report per item
+            r["median_us"] /= per
+            r["best_us"]   /= per
+        results[label] = r
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "events.jsonl")
+        it   = iter(records * 1000)
+        results["append_line"] = _micro(lambda: TFT_logger.append_line(path, next(it)), [()],
+                                        min_time=0.5)
+
+    alerts = [json.loads(r) for r in records]
+    stats  = {"today_count": 0, "last_alert": "None", "last_rwt": "None", "total": len(alerts),
+              "logger_ok": True, "serial_ok": True, "control_ok": False, "control_error": ""}
+    with web.app.test_request_context():
+        results["render_index"] = _micro(
+            lambda: web.render_template_string(web.HTML, alerts=alerts, stats=stats), [()])
+
+    print(f"  micro: {len(headers)} corpus headers (per item, median of 5 passes)")
+    for label, r in results.items():
+        print(f"    {label:<18} {r['median_us']:10.2f} µs   best {r['best_us']:10.2f} µs")
+    return results
+
+
+# =============================
+# Alert archive reads
+# =============================
+
+@group
+def bench_archive(sizes: tuple = (1_000, 100_000, 1_000_000), runs: int = 3) -> dict:
+    """
+    web.read_alerts() (newest 200 of events.jsonl) against synthetic archives
+    of logger records. The 1M archive is ~700 MB on disk.
+    """
+    import eas_render
+    import web
+
+    rng     = random.Random(7)
+    headers = [s for s, _ in eas_render.golden_corpus()]
+    lines   = []
+    for i, h in enumerate(headers):
+        lines.append(json.dumps({
+            "received_utc": f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "received_local": f"2026-01-{1 + i % 28:02d} {i % 24:02d}:00:00",
+            "canonical_header": h, "expires_utc": None,
+            "event_code": h[9:12], "originator_code": h[5:8], "sender": "",
+            "event_text": "Required Weekly Test", "org_text": "An EAS Participant",
+            "eas_text": h * 3, "locations_pretty": [f"County {rng.randint(1, 999)}, ST"] * 3,
+            "notification": {"attempted": False},
+        }, ensure_ascii=False) + "\n")
+
+    results = {}
+    saved   = web.JSONL
+    with tempfile.TemporaryDirectory() as d:
+        web.JSONL = path = os.path.join(d, "events.jsonl")
+        try:
+            written = 0
+            for n in sorted(sizes):
+                with open(path, "a", encoding="utf-8") as f:
+                    while written < n:
+                        k = min(len(lines), n - written)
+                        f.writelines(lines[:k])
+                        written += k
+                wall = []
+                for _ in range(runs):
+                    t0 = time.perf_counter()
+                    web.read_alerts()
+                    wall.append(time.perf_counter() - t0)
+                results[f"read_{n}_ms"] = _percentile(wall, 50) * 1000
+                results[f"bytes_{n}"]   = os.path.getsize(path)
+        finally:
+            web.JSONL = saved
+
+    print(f"  archive: web.read_alerts() newest 200, median of {runs}")
+    for n in sorted(sizes):
+        print(f"    {n:>9,} records  {results[f'bytes_{n}'] / 1e6:8.1f} MB  {results[f'read_{n}_ms']:10.1f} ms")
+    return results
+
+
+# =============================
+# Metrics overhead
+# =============================
+
+@group
+def bench_metrics() -> dict:
+    """
+    Cost of metrics.py updates, and the logger's per-burst instrumentation
+    as a share of the per-burst work it measures (split, parse, decode and
+    the three fsynced appends, made on the alerts filesystem).
+    """
+    import metrics
+    import TFT_logger
+    import eas_render
+
+    reg = metrics.Registry()
+    c   = metrics.counter("bench_total", "bench", registry=reg)
+    lc  = metrics.counter("bench_labelled_total", "bench", ["outcome"], registry=reg)
+    h   = metrics.histogram("bench_seconds", "bench", ["file"], registry=reg)
+    for i in range(50):
+        lc.labels(outcome=f"o{i}").inc()
+        h.labels(file=f"f{i}").observe(i / 1000)
+
+    child = h.labels(file="events.jsonl")   # append_line keeps its child per path
+
+    def timed():
+        with child.time():
+            pass
+
+    results = {
+        "counter_inc":       _micro(c.inc, [()]),
+        "labelled_inc":      _micro(lambda: lc.labels(outcome="o1").inc(), [()]),
+        "histogram_observe": _micro(h.labels(file="f1").observe, [(0.003,)]),
+        "histogram_time":    _micro(timed, [()]),
+        "render_100_series": _micro(reg.render, [()], min_time=0.5),
+    }
+
+    # Per burst the logger does: bytes read + bursts framed + a labelled
+    # notification outcome, and times three appends (record, trace, text).
+    per_burst_us = (2 * results["counter_inc"]["median_us"] + results["labelled_inc"]["median_us"]
+                    + 3 * results["histogram_time"]["median_us"])
+
+    headers = [s for s, _ in eas_render.golden_corpus()][:200]
+    bursts  = [(hd * 3) + "NNNN" for hd in headers]
+    with tempfile.TemporaryDirectory(dir=TFT_logger.ALERTS_DIR) as d:
+        path = os.path.join(d, "events.jsonl")
+        it   = iter(bursts * 1000)
+
+        def one_burst():
+            b = next(it)
+            TFT_logger.split_bursts(b)
+            hd = TFT_logger.HEADER_RE.findall(b)[0]
+            TFT_logger.fingerprint(hd)
+            eas_render.decode(hd)
+            for _ in range(3):
+                TFT_logger.append_line(path, hd)
+        work = _micro(one_burst, [()], min_time=0.5)
+
+    results["burst_work"]       = work
+    results["per_burst_us"]     = per_burst_us
+    results["per_burst_pct"]    = 100 * per_burst_us / work["median_us"]
+
+    print("  metrics: per update (median of 5 passes)")
+    for label in ("counter_inc", "labelled_inc", "histogram_observe", "histogram_time", "render_100_series"):
+        print(f"    {label:<18} {results[label]['median_us']:10.2f} µs")
+    print(f"    logger per burst   {per_burst_us:10.2f} µs of {work['median_us']:.0f} µs work"
+          f"  = {results['per_burst_pct']:.2f}%")
+    return results
+
+
+# =============================
+# Alert record footprint
+# =============================
+
+def _record_lines(n: int) -> list:
+    """n realistic events.jsonl lines decoded from the golden header corpus."""
+    import eas_render
+    import TFT_logger
+    from alert_record import AlertRecord
+
+    headers = [s for s, _ in eas_render.golden_corpus()]
+    lines   = []
+    for i in range(n):
+        h   = headers[i % len(headers)]
+        oof = eas_render.decode(h)
+        fips = getattr(oof, "FIPSText", []) or []
+        lines.append(AlertRecord(
+            received_utc=f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z",
+            received_local=f"2026-01-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00",
+            canonical_header=h, expires_utc=TFT_logger._compute_expires_utc(h),
+            event_code=getattr(oof, "evnt", "") or "", originator_code=getattr(oof, "org", "") or "",
+            sender=getattr(oof, "fromText", "") or "", event_text=getattr(oof, "evntText", "") or "",
+            org_text=getattr(oof, "orgText", "") or "", eas_text=getattr(oof, "EASText", "") or "",
+            locations_pretty=[str(x) for x in fips] if isinstance(fips, list) else [str(fips)],
+            trace={"id": f"{i:012x}", "framed": 1.7e9 + i, "parsed": 1.7e9 + i, "decoded": 1.7e9 + i,
+                   "notified": 1.7e9 + i},
+        ).to_json())
+    return lines
+
+
+@group
+def bench_records(n: int = 5000) -> dict:
+    """
+    Memory per cached alert — json.loads() dicts against AlertRecords — and
+    the cost of each serialise/deserialise path, over n realistic records.
+    """
+    import gc
+    import tracemalloc
+    from alert_record import AlertRecord
+
+    lines = _record_lines(n)
+
+    def footprint(parse) -> float:
+        gc.collect()
+        tracemalloc.start()
+        kept = [parse(l) for l in lines]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        return size / n
+
+    results = {
+        "dict_bytes":   footprint(json.loads),
+        "record_bytes": footprint(AlertRecord.from_json),
+    }
+    results["ratio"] = results["dict_bytes"] / results["record_bytes"]
+    sample = [(l,) for l in lines[:500]]
+    recs   = [(AlertRecord.from_json(l),) for l in lines[:500]]
+    results["from_json"]  = _micro(AlertRecord.from_json, sample)
+    results["to_json"]    = _micro(AlertRecord.to_json, recs)
+    results["json_loads"] = _micro(json.loads, sample)
+
+    print(f"  records: {n} cached alerts (tracemalloc, bytes per record incl. strings)")
+    print(f"    dict          {results['dict_bytes']:10.0f} B")
+    print(f"    AlertRecord   {results['record_bytes']:10.0f} B   ({results['ratio']:.1f}× smaller)")
+    for label in ("json_loads", "from_json", "to_json"):
+        print(f"    {label:<12} {results[label]['median_us']:10.2f} µs")
+    return results
+
+
+# =============================
+# JSON codec
+# =============================
+
+@group
+def bench_json(n: int = 5000, runs: int = 5) -> dict:
+    """
+    Dashboard history load (n events.jsonl lines → AlertRecords) and the
+    /api/alerts export, stdlib json against jsoncodec's backend.
+    """
+    import jsoncodec
+    from alert_record import AlertRecord
+
+    lines = _record_lines(n)
+
+    def load(parse) -> float:
+        wall = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            for l in lines:
+                AlertRecord.from_dict(parse(l))
+            wall.append(time.perf_counter() - t0)
+        return _percentile(wall, 50) * 1000
+
+    recs = [AlertRecord.from_json(l).to_dict() for l in lines[:200]]
+    results = {
+        "load_json_ms": load(json.loads),
+        "load_ms":      load(jsoncodec.loads),
+        "export_json":  _micro(lambda: json.dumps(recs, ensure_ascii=False, indent=2), [()]),
+        "export":       _micro(lambda: jsoncodec.dumps(recs, indent=True), [()]),
+    }
+    results["load_speedup"] = results["load_json_ms"] / results["load_ms"]
+
+    print(f"  json: {n}-record history load, median of {runs} (backend {jsoncodec.BACKEND})")
+    print(f"    json.loads    {results['load_json_ms']:10.1f} ms")
+    print(f"    jsoncodec     {results['load_ms']:10.1f} ms   ({results['load_speedup']:.2f}× faster)")
+    print(f"    /api/alerts export, 200 records: json {results['export_json']['median_us']:.0f} µs,"
+          f" jsoncodec {results['export']['median_us']:.0f} µs")
+    return results
+
+
+# =============================
+# Logging on the serial loop
+# =============================
+
+@group
+def bench_logging(calls: int = 20_000) -> dict:
+    """
+    Caller-side latency of logger.info() with the logger's file formatter:
+    the rotating file written directly, against the same handler behind
+    logqueue (the caller only enqueues). The file lives on the alerts
+    filesystem, as the logger's does.
+    """
+    import logging
+    import logqueue
+    import TFT_logger
+    from logging.handlers import RotatingFileHandler
+
+    fmt = logging.Formatter('%(asctime)s | %(levelname)-8s | %(funcName)s | %(message)s')
+    results = {}
+    with tempfile.TemporaryDirectory(dir=TFT_logger.ALERTS_DIR) as d:
+        for label in ("direct", "queued"):
+            fh = RotatingFileHandler(os.path.join(d, f"{label}.log"), maxBytes=10 * 1024 * 1024, backupCount=1)
+            fh.setFormatter(fmt)
+            log = logging.getLogger(f"bench.logging.{label}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            if label == "direct":
+                log.addHandler(fh)
+            else:
+                qh = logqueue.attach(log, [fh], maxsize=1_000_000)
+            lat = []
+            for i in range(calls):
+                t0 = time.perf_counter()
+                log.info("SAME burst detected | %d location(s)", i)
+                lat.append(time.perf_counter() - t0)
+            results[label] = {f"p{p}_us": _percentile(lat, p) * 1e6 for p in (50, 99)}
+            results[label]["max_us"] = max(lat) * 1e6
+            if label == "queued":
+                qh.close()
+                log.removeHandler(qh)
+            else:
+                log.removeHandler(fh)
+            fh.close()
+
+    print(f"  logging: {calls} logger.info() calls as seen by the serial loop")
+    for label in ("direct", "queued"):
+        r = results[label]
+        print(f"    {label:<8} p50 {r['p50_us']:8.1f} µs   p99 {r['p99_us']:8.1f} µs   max {r['max_us']:9.1f} µs")
+    return results
+
+
+# =============================
+# Serial reader / processor pipeline
+# =============================
+
+class _FakeUART:
+    """A serial port fed at `rate` bytes/s into a `cap`-byte buffer; overflow is lost, as in the tty layer."""
+
+    def __init__(self, data: bytes, rate: float, cap: int = 4096):
+        self.data, self.rate, self.cap = data, rate, cap
+        self.t0      = time.monotonic()
+        self.arrived = 0
+        self.buf     = bytearray()
+        self.dropped = 0
+
+    def _fill(self) -> None:
+        arrived = min(len(self.data), int((time.monotonic() - self.t0) * self.rate))
+        new = self.data[self.arrived:arrived]
+        self.arrived = arrived
+        take = new[:max(0, self.cap - len(self.buf))]
+        self.buf += take
+        self.dropped += len(new) - len(take)
+
+    def read(self, n: int) -> bytes:
+        self._fill()
+        if not self.buf:
+            time.sleep(0.01)   # the port's read timeout, shortened
+            self._fill()
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def close(self) -> None:
+        pass
+
+
+@group
+def bench_pipeline(bursts: int = 40, stall_s: float = 40.0, scale: float = 50.0) -> dict:
+    """
+    Bytes lost when the first alert of a back-to-back run stalls for `stall_s`
+    (a hung ntfy POST, an SD card fsync) while the rest keep arriving at 1200
+    baud into a 4 KB port buffer: the original single loop against the
+    SerialReader thread. Time is compressed `scale`× so the run takes seconds.
+    """
+    import queue
+    import TFT_logger
+
+    header = "ZCZC-WXR-TOR-048453+0030-2920002-KEWX/NWS-"
+    data   = (b"\xab" * 16 + (header * 3 + "NNNN").encode()) * bursts
+    rate   = 120 * scale
+    stall  = stall_s / scale
+
+    def process(text: str, buf: str, done: int) -> tuple[int, str]:
+        framed, buf = TFT_logger.split_bursts(buf + text)
+        if framed and not done:
+            time.sleep(stall)
+        return len(framed), buf
+
+    results = {}
+    deadline = len(data) / rate + stall + 2.0
+
+    uart, framed, buf, t_end = _FakeUART(data, rate), 0, "", time.monotonic() + deadline
+    while framed < bursts and time.monotonic() < t_end:
+        chunk = uart.read(256)
+        if chunk:
+            n, buf = process(TFT_logger.chunk_text(chunk), buf, framed)
+            framed += n
+    results["inline"] = {"framed": framed, "bytes_lost": uart.dropped}
+
+    uart = _FakeUART(data, rate)
+    reader = TFT_logger.SerialReader(maxsize=4096, open_port=lambda: uart).start()
+    framed, buf, depth, t_end = 0, "", 0, time.monotonic() + deadline
+    stalls0 = TFT_logger.READ_STALLS.count
+    while framed < bursts and time.monotonic() < t_end:
+        try:
+            _, chunk = reader.queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        depth = max(depth, reader.queue.qsize())
+        n, buf = process(TFT_logger.chunk_text(chunk), buf, framed)
+        framed += n
+    reader.close()
+    results["pipeline"] = {"framed": framed, "bytes_lost": uart.dropped, "max_depth": depth,
+                           "reader_stalls": TFT_logger.READ_STALLS.count - stalls0}
+
+    print(f"  pipeline: {bursts} back-to-back bursts at 1200 baud, first alert stalls {stall_s:g} s (time /{scale:g})")
+    for label in ("inline", "pipeline"):
+        r = results[label]
+        print(f"    {label:<9} {r['framed']}/{bursts} bursts framed   {r['bytes_lost']:6d} bytes lost"
+              + (f"   max queue depth {r['max_depth']}, reader stalls {r['reader_stalls']}" if label == "pipeline" else ""))
+    return results
+
+
+# =============================
+# Entry point
+# =============================
+
+def _meta() -> dict:
+    import jsoncodec
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        with open("/proc/device-tree/model", encoding="utf-8", errors="replace") as f:
+            model = f.read().strip("\0\n ")
+    except OSError:
+        model = ""
+    return {
+        "when":     datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit":   commit,
+        "python":   platform.python_version(),
+        "machine":  platform.machine(),
+        "platform": platform.platform(),
+        "model":    model,
+        "json":     jsoncodec.BACKEND,
+    }
+
+
+def save_results(path: str, results: dict, label: str = None) -> None:
+    """Write {"meta", "groups"} to path, or merge it in under `label`."""
+    run = {"meta": _meta(), "groups": results}
+    if label:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        data[label] = run
+    else:
+        data = run
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _load_run(spec: str) -> dict:
+    path, _, label = spec.partition(":") if not os.path.exists(spec) else (spec, "", "")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    run = data[label] if label else data
+    if not run.get("groups"):
+        raise SystemExit(f"{spec}: no results recorded")
+    return run
+
+
+def _flatten(groups: dict) -> dict:
+    out = {}
+    for g, res in groups.items():
+        for k, v in res.items():
+            if isinstance(v, dict):
+                for kk, vv in v.items():
+                    out[f"{g}.{k}.{kk}"] = vv
+            else:
+                out[f"{g}.{k}"] = v
+    return {k: v for k, v in out.items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and not k.endswith(".calls")}
+
+
+def compare(old_spec: str, new_spec: str) -> int:
+    """Print new/old for every metric both runs have (times: < 1.00 is faster)."""
+    old, new = _load_run(old_spec), _load_run(new_spec)
+    a, b = _flatten(old["groups"]), _flatten(new["groups"])
+    print(f"old: {old_spec} ({old['meta'].get('commit') or '?'}, {old['meta'].get('model') or old['meta'].get('machine')})")
+    print(f"new: {new_spec} ({new['meta'].get('commit') or '?'}, {new['meta'].get('model') or new['meta'].get('machine')})")
+    for k in sorted(a.keys() & b.keys()):
+        ratio = f"{b[k] / a[k]:7.2f}x" if a[k] else "      -"
+        print(f"  {k:<40} {a[k]:14.3f} {b[k]:14.3f}  {ratio}")
+    return 0
+
+
+def main(argv: list) -> int:
+    if argv[:1] == ["--compare"]:
+        if len(argv) != 3:
+            print("Usage: python3 bench.py --compare OLD.json[:label] NEW.json[:label]")
+            return 2
+        return compare(argv[1], argv[2])
+    json_path = label = None
+    names = []
+    it = iter(argv)
+    for a in it:
+        if a == "--json":
+            json_path = next(it, None)
+        elif a == "--label":
+            label = next(it, None)
+        else:
+            names.append(a)
+    names = names or list(GROUPS)
+    unknown = [n for n in names if n not in GROUPS]
+    if unknown:
+        print(f"Unknown group(s): {', '.join(unknown)} — available: {', '.join(GROUPS)}")
+        return 2
+    results = {}
+    for name in names:
+        print(f"[{name}]")
+        results[name] = GROUPS[name]()
+    if json_path:
+        save_results(json_path, results, label)
+        print(f"Results written to {json_path}" + (f" under {label!r}" if label else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
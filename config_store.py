@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Shared config.ini access for the logger, controller and web dashboard.
+
+The parsed file is cached and revalidated with a single stat() per access:
+it is only re-read when mtime/size change, and only re-parsed when the
+content hash changes too. Location keys are resolved once per config version
+into FIPS tuples and county names, so hot paths (/api/decode, TTS origination)
+never touch the file. Writes go through write_config(), which replaces the
+file atomically and notifies subscribers.
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+import configparser
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from utills import fips_table, parse_location_keys
+
+
+CONFIG_PATH = Path(__file__).parent / "config.ini"
+
+
+class LocationKey(NamedTuple):
+    """One TFT encoder location key from [location_keys]."""
+    name:   str
+    fips:   tuple   # 6-digit FIPS strings, e.g. ('036109', '036001')
+    pretty: tuple   # 'County, ST' per FIPS code, '' where unknown
+
+
+_lk        = threading.RLock()
+_stat      = None    # (mtime_ns, size) of the parsed file; None if missing
+_digest    = ""      # sha1 of the parsed content
+_text      = ""
+_parser    = configparser.ConfigParser()
+_loaded    = False
+_loc_keys  = None    # resolved {key: LocationKey}, per version
+_listeners: list = []
+
+
+def _revalidate() -> None:
+    global _stat, _digest, _text, _parser, _loaded, _loc_keys
+    try:
+        st  = os.stat(CONFIG_PATH)
+        key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        key = None
+    with _lk:
+        if _loaded and key == _stat:
+            return
+        try:
+            text = CONFIG_PATH.read_text(encoding="utf-8") if key else ""
+        except FileNotFoundError:
+            key, text = None, ""
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        first  = not _loaded
+        _stat, _loaded = key, True
+        if not first and digest == _digest:
+            return   # touched but unchanged
+        p = configparser.ConfigParser()
+        p.read_string(text)
+        _text, _digest, _parser, _loc_keys = text, digest, p, None
+    if not first:
+        _notify()
+
+
+def _notify() -> None:
+    for fn in list(_listeners):
+        try:
+            fn(_parser)
+        except Exception:
+            pass
+
+
+def exists() -> bool:
+    """True if config.ini is present."""
+    _revalidate()
+    return _stat is not None
+
+
+def parser() -> configparser.ConfigParser:
+    """The current parsed config.ini (empty if missing). Shared — treat as read-only."""
+    _revalidate()
+    return _parser
+
+
+def copy() -> configparser.ConfigParser:
+    """A private, mutable parser of the current config — for building a write."""
+    _revalidate()
+    p = configparser.ConfigParser()
+    p.read_string(_text)
+    return p
+
+
+def subscribe(fn: Callable) -> None:
+    """Call fn(parser) whenever the config changes (via write_config or an external edit)."""
+    _listeners.append(fn)
+
+
+def write_config(p: configparser.ConfigParser) -> None:
+    """Atomically replace config.ini with p, then notify subscribers."""
+    fd, tmp = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=CONFIG_PATH.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            p.write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if CONFIG_PATH.exists():
+            os.chmod(tmp, CONFIG_PATH.stat().st_mode & 0o777)
+        os.replace(tmp, CONFIG_PATH)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _revalidate()
+
+
+def location_keys() -> dict:
+    """
+    [location_keys] resolved once per config version.
+
+    Returns {"1": LocationKey(name, fips, pretty), ...}; empty if none configured.
+    Entries are 'Name | 036109,036001' or a bare name with no FIPS codes.
+    """
+    global _loc_keys
+    p = parser()
+    with _lk:
+        if _loc_keys is not None:
+            return _loc_keys
+        names = fips_table()
+        keys  = {}
+        if p.has_section("location_keys"):
+            for k, v in p.items("location_keys"):
+                if "|" in v:
+                    name, fips_str = v.split("|", 1)
+                    fips = tuple(f.strip() for f in fips_str.split(",") if f.strip())
+                else:
+                    name, fips = v, ()
+                pretty = tuple(names.get(f[1:] if len(f) == 6 else f, "") for f in fips)
+                keys[k] = LocationKey(name.strip(), fips, pretty)
+        _loc_keys = keys
+        return keys
+
+
+def fips_for_keys(locations: str) -> list:
+    """All FIPS codes for a location key string ('1,3' or '13'), in key order."""
+    keys = location_keys()
+    out  = []
+    for k in parse_location_keys(locations):
+        if k in keys:
+            out.extend(keys[k].fips)
+    return out
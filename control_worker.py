@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Single-threaded command worker for the TFT COM3 controller.
+
+Every TFT operation is a DTMF sequence paced by sleeps — originate alone takes
+4 × cmd_delay and a TTS origination plays a whole announcement — so running
+them on request threads under a lock ties those threads up and queues every
+other request behind the lock. Instead one worker thread owns the
+TFTController and runs submitted jobs one at a time from a priority queue:
+
+  URGENT   stop, EOM — jump ahead of anything queued
+  NORMAL   everything else, first come first served
+
+submit() returns a Job straight away; its state moves
+queued → [preparing →] running → done | error | cancelled and every change is
+reported through on_update(job), which the dashboard pushes to browsers.
+
+A job may have a prepare step (TTS synthesis) that runs on its own thread
+before the job joins the queue, so slow preparation never holds the port.
+stop() additionally cancels queued jobs and silences TTS playback in
+progress, which makes a running TTS job give up at once.
+"""
+
+import time
+import uuid
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+
+import speech
+from TFT_Control import TFTController
+
+
+URGENT = 0
+NORMAL = 10
+
+JOB_HISTORY = 100   # finished jobs kept for /api/control/jobs/<id>
+
+QUEUED, PREPARING, RUNNING = "queued", "preparing", "running"
+DONE, ERROR, CANCELLED     = "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+
+class Job:
+    """One submitted TFT operation."""
+
+    def __init__(self, name: str, run, priority: int, seq: int, prepare=None, needs_port: bool = True):
+        self.id       = uuid.uuid4().hex[:12]
+        self.name     = name
+        self.priority = priority
+        self.seq      = seq
+        self.state    = QUEUED
+        self.result   = None
+        self.error    = ""
+        self.created  = time.time()
+        self.started  = None
+        self.finished = None
+        self._run     = run
+        self._prepare = prepare
+        self._needs   = needs_port
+        self._done    = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job has finished; False on timeout."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "id":       self.id,
+            "name":     self.name,
+            "state":    self.state,
+            "priority": self.priority,
+            "result":   self.result,
+            "error":    self.error,
+            "created":  self.created,
+            "started":  self.started,
+            "finished": self.finished,
+        }
+
+
+class ControlWorker:
+    """
+    Owns the TFTController and runs jobs against it on one thread.
+
+    Usage:
+        worker = ControlWorker(on_update=print)
+        worker.reconnect()
+        job = worker.submit("rwt", lambda tft: tft.send_rwt())
+        job.wait()
+    """
+
+    def __init__(self, factory=TFTController, on_update=None):
+        self.tft        = None
+        self.last_error = ""   # last connection error
+        self._factory   = factory
+        self._on_update = on_update
+        self._queue     = queue.PriorityQueue()
+        self._seq       = itertools.count()
+        self._lk        = threading.Lock()
+        self._jobs      = OrderedDict()   # id → Job, oldest first
+        self._running   = None
+        self._thread    = threading.Thread(target=self._loop, daemon=True, name="tft-control")
+        self._thread.start()
+
+    # ── state ──
+
+    @property
+    def connected(self) -> bool:
+        t = self.tft
+        return t is not None and getattr(getattr(t, 'ser', None), 'is_open', False)
+
+    def job(self, job_id: str) -> Job | None:
+        with self._lk:
+            return self._jobs.get(job_id)
+
+    def summary(self) -> dict:
+        """Queue depth and the running job's name, for the status model."""
+        with self._lk:
+            queued = sum(1 for j in self._jobs.values() if j.state in (QUEUED, PREPARING))
+            return {"queued": queued, "running": self._running.name if self._running else None}
+
+    # ── submission ──
+
+    def submit(self, name: str, run, priority: int = NORMAL, prepare=None, needs_port: bool = True) -> Job:
+        """
+        Queue run(tft) — or run(tft, prepare(tft)) when prepare is given.
+
+        Args:
+            name:       Short label shown to browsers, e.g. 'originate'.
+            run:        Called on the worker thread with the controller.
+            priority:   URGENT or NORMAL; lower runs first.
+            prepare:    Optional slow step run on its own thread before queueing.
+            needs_port: Fail the job if COM3 is not connected when it runs.
+        """
+        job = Job(name, run, priority, next(self._seq), prepare, needs_port)
+        with self._lk:
+            self._jobs[job.id] = job
+            self._trim()
+        if prepare is None:
+            self._enqueue(job)
+        else:
+            self._set(job, PREPARING)
+            threading.Thread(target=self._run_prepare, args=(job,), daemon=True,
+                             name=f"tft-prepare-{name}").start()
+        return job
+
+    def _enqueue(self, job: Job) -> None:
+        self._queue.put((job.priority, job.seq, job))
+        self._notify(job)
+
+    def _run_prepare(self, job: Job) -> None:
+        try:
+            prepared = job._prepare(self.tft)
+        except Exception as ex:
+            self._finish(job, ERROR, error=str(ex))
+            return
+        with self._lk:
+            if job.state != PREPARING:   # cancelled meanwhile
+                return
+            job.state = QUEUED
+            run = job._run
+            job._run = lambda tft: run(tft, prepared)
+        self._enqueue(job)
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a job that has not started running; False if it already has."""
+        with self._lk:
+            if job.state not in (QUEUED, PREPARING):
+                return False
+            # Under the same lock as the check, so _loop can't start it in between
+            self._finish_locked(job, CANCELLED)
+        job._done.set()
+        self._notify(job)
+        return True
+
+    def stop(self, cancel_queued: bool = True, cancel_speech: bool = True) -> Job:
+        """
+        Send '#' ahead of everything else.
+
+        With cancel_speech, TTS synthesis and playback in this process are cut
+        off at once — including other jobs' and preview pre-renders, so only
+        an operator's explicit stop should ask for it. With cancel_queued,
+        jobs still waiting (including ones mid-prepare) are cancelled so
+        nothing queued before the stop runs after it.
+        """
+        if cancel_speech:
+            speech.cancel()
+        if cancel_queued:
+            with self._lk:
+                waiting = [j for j in self._jobs.values() if j.state in (QUEUED, PREPARING)]
+            for j in waiting:
+                self.cancel(j)
+        return self.submit("stop", lambda tft: tft.stop(cancel_speech=cancel_speech), URGENT)
+
+    def reconnect(self) -> Job:
+        """Close and reopen COM3 on the worker thread."""
+        return self.submit("reconnect", self._reconnect, needs_port=False)
+
+    def _reconnect(self, _tft) -> dict:
+        if self.tft is not None:
+            try:
+                self.tft.disconnect()
+            except Exception:
+                pass
+        try:
+            t = self._factory()
+            t.connect()
+            self.tft, self.last_error = t, ""
+        except Exception as ex:
+            self.tft, self.last_error = None, str(ex)
+        return {"connected": self.connected, "error": self.last_error}
+
+    # ── worker thread ──
+
+    def _loop(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            with self._lk:
+                if job.state != QUEUED:
+                    continue
+                job.state, job.started = RUNNING, time.time()
+                self._running = job
+            self._notify(job)
+            try:
+                if job._needs and not self.connected:
+                    raise RuntimeError("COM3 not connected")
+                result = job._run(self.tft)
+            except Exception as ex:
+                self._finish(job, ERROR, error=str(ex))
+            else:
+                self._finish(job, DONE, result=result)
+
+    def _set(self, job: Job, state: str) -> None:
+        with self._lk:
+            job.state = state
+        self._notify(job)
+
+    def _finish(self, job: Job, state: str, result=None, error: str = "") -> None:
+        with self._lk:
+            if job.state in FINISHED:
+                return
+            self._finish_locked(job, state, result, error)
+        job._done.set()
+        self._notify(job)
+
+    def _finish_locked(self, job: Job, state: str, result=None, error: str = "") -> None:
+        job.state, job.result, job.error = state, result, error
+        job.finished = time.time()
+        job._run = job._prepare = None
+        if self._running is job:
+            self._running = None
+
+    def _trim(self) -> None:
+        finished = [i for i, j in self._jobs.items() if j.state in FINISHED]
+        for i in finished[:max(0, len(self._jobs) - JOB_HISTORY)]:
+            del self._jobs[i]
+
+    def _notify(self, job: Job) -> None:
+        if self._on_update is not None:
+            try:
+                self._on_update(job)
+            except Exception:
+                pass
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mapped EAS lookup tables.
+
+EAS2Text fetches and parses its full JSON dataset every time the class is
+first imported — in every process, on every restart. The tables the logger,
+controller and web dashboard actually need (FIPS county names, subdivisions,
+event and originator phrases, NWS offices) are written once by a build step
+into eas_lookup.bin and memory-mapped read-only afterwards, so opening them
+costs a header read and the pages are shared between processes.
+
+Usage:
+  python3 eas_lookup.py build     write eas_lookup.bin from the installed EAS2Text
+  python3 eas_lookup.py info      print the tables in an existing artifact
+
+File layout (little-endian):
+  header     magic, version, table count, source tag, string table offsets
+  directory  per table: name, code width, entry count, codes offset, ids offset
+  codes      sorted fixed-width ASCII codes, one block per table
+  ids        uint32 string id per code, one block per table
+  strings    interned UTF-8 strings: uint32 offsets[n + 1], then the blob
+
+Lookups are a binary search over a table's fixed-width codes. If the file is
+missing, unreadable or was built from a different EAS2Text release, open()
+returns None and callers fall back to EAS2Text.
+"""
+
+import os
+import sys
+import mmap
+import struct
+import tempfile
+import threading
+from pathlib import Path
+
+
+ARTIFACT_PATH = Path(__file__).parent / "eas_lookup.bin"
+
+MAGIC   = b"EASLKUP\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH24sIII")   # magic, version, ntables, source, nstrings, offsets, blob
+_TABLE  = struct.Struct("<8sHHIII")      # name, width, reserved, count, codes, ids
+
+# name → code width. WFO maps 5-digit FIPS to the NWS office (''= none listed).
+TABLES = {"SAME": 5, "SUBDIV": 1, "ORGS": 3, "EVENTS": 3, "WFO": 5}
+
+EAS2TEXT_DIST = "EAS2Text-Remastered"
+
+
+def _source_tag() -> str:
+    """Installed EAS2Text release, '' if not installed."""
+    try:
+        from importlib.metadata import version
+        return version(EAS2TEXT_DIST)
+    except Exception:
+        return ""
+
+
+# =============================
+# Build
+# =============================
+
+def _source_tables() -> dict:
+    """The tables to pack, read from EAS2Text's class data."""
+    from EAS2Text import EAS2Text
+    us = EAS2Text.same_us
+    wfo = {k: (v[0].get("wfo") or "") for k, v in EAS2Text.wfo_us.get("SAME", {}).items() if v}
+    return {
+        "SAME":   us.get("SAME", {}),
+        "SUBDIV": us.get("SUBDIV", {}),
+        "ORGS":   us.get("ORGS", {}),
+        "EVENTS": us.get("EVENTS", {}),
+        "WFO":    wfo,
+    }
+
+
+def build(path: Path = ARTIFACT_PATH, tables: dict | None = None) -> dict:
+    """
+    Write the lookup artifact atomically.
+
+    Args:
+        path:   Output file.
+        tables: {name: {code: text}} to pack; defaults to EAS2Text's data.
+
+    Returns:
+        {table: entry count} plus 'strings' and 'bytes'.
+    """
+    tables  = tables if tables is not None else _source_tables()
+    strings = {}   # text → id, in first-seen order
+
+    def intern(s: str) -> int:
+        return strings.setdefault(s, len(strings))
+
+    packed = []
+    for name, width in TABLES.items():
+        rows = sorted((k, v) for k, v in tables.get(name, {}).items()
+                      if len(k) == width and k.isascii())
+        codes = b"".join(k.encode("ascii") for k, _ in rows)
+        ids   = struct.pack(f"<{len(rows)}I", *(intern(v) for _, v in rows))
+        packed.append((name, width, len(rows), codes, ids))
+
+    blobs   = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+
+    pos = _HEADER.size + _TABLE.size * len(packed)
+    directory, body = [], []
+    for name, width, count, codes, ids in packed:
+        directory.append(_TABLE.pack(name.encode(), width, 0, count, pos, pos + len(codes)))
+        body += [codes, ids]
+        pos += len(codes) + len(ids)
+    pos += -pos % 4
+    off_pos  = pos
+    blob_pos = off_pos + 4 * len(offsets)
+
+    header = _HEADER.pack(MAGIC, VERSION, len(packed), _source_tag().encode()[:24],
+                          len(strings), off_pos, blob_pos)
+    data = b"".join([header, *directory, *body])
+    data += b"\0" * (off_pos - len(data))
+    data += struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(blobs)
+
+    fd, tmp = tempfile.mkstemp(prefix=".eas_lookup.", suffix=".tmp", dir=Path(path).parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    stats = {name: count for name, _, count, _, _ in packed}
+    stats.update(strings=len(strings), bytes=len(data))
+    return stats
+
+
+# =============================
+# Read
+# =============================
+
+class Lookup:
+    """Read-only view of an eas_lookup.bin artifact."""
+
+    def __init__(self, path: Path = ARTIFACT_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise ValueError("truncated lookup artifact")
+        magic, version, ntables, source, nstrings, off_pos, blob_pos = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a version-%d lookup artifact" % VERSION)
+        self.source    = source.rstrip(b"\0").decode()
+        self._nstrings = nstrings
+        self._off_pos  = off_pos
+        self._blob_pos = blob_pos
+        self._tables   = {}   # name → (width, count, codes, ids)
+        for i in range(ntables):
+            name, width, _, count, codes, ids = _TABLE.unpack_from(mm, _HEADER.size + i * _TABLE.size)
+            self._tables[name.rstrip(b"\0").decode()] = (width, count, codes, ids)
+
+    def string(self, i: int) -> str:
+        a, b = struct.unpack_from("<II", self._mm, self._off_pos + 4 * i)
+        return self._mm[self._blob_pos + a:self._blob_pos + b].decode("utf-8")
+
+    def get(self, table: str, code: str) -> str | None:
+        """Text for code in table, or None if the code is not listed."""
+        t = self._tables.get(table)
+        if t is None:
+            return None
+        width, count, codes, ids = t
+        key = code.encode("ascii", "replace")
+        if len(key) != width:
+            return None
+        mm, lo, hi = self._mm, 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at  = codes + mid * width
+            probe = mm[at:at + width]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return self.string(struct.unpack_from("<I", mm, ids + 4 * mid)[0])
+        return None
+
+    def items(self, table: str):
+        """(code, text) for every entry in table, in code order."""
+        width, count, codes, ids = self._tables.get(table, (0, 0, 0, 0))
+        mm = self._mm
+        for n, sid in enumerate(struct.unpack_from(f"<{count}I", mm, ids)):
+            at = codes + n * width
+            yield mm[at:at + width].decode("ascii"), self.string(sid)
+
+    def counts(self) -> dict:
+        return {name: t[1] for name, t in self._tables.items()}
+
+    def fips_name(self, fips: str) -> str:
+        """'County, ST' for a 5- or 6-digit FIPS code; '' if unknown."""
+        return self.get("SAME", fips[1:] if len(fips) == 6 else fips) or ""
+
+
+_lookup    = None
+_lookup_lk = threading.Lock()
+_opened    = False
+
+def open_default() -> Lookup | None:
+    """
+    The process-wide artifact, opened on first use.
+
+    Returns None if eas_lookup.bin is missing or unreadable, or was built from
+    a different EAS2Text release than the one installed (rebuild with
+    `python3 eas_lookup.py build`).
+    """
+    global _lookup, _opened
+    if _opened:
+        return _lookup
+    with _lookup_lk:
+        if not _opened:
+            try:
+                lk = Lookup(ARTIFACT_PATH)
+                installed = _source_tag()
+                _lookup = lk if not installed or installed == lk.source else None
+            except (OSError, ValueError, struct.error):
+                _lookup = None
+            _opened = True
+    return _lookup
+
+
+# =============================
+# CLI
+# =============================
+
+def main(argv: list) -> int:
+    cmd = argv[0] if argv else "info"
+    if cmd == "build":
+        try:
+            stats = build()
+        except ImportError:
+            print("EAS2Text not installed — run: pip install EAS2Text-Remastered")
+            return 1
+        print(f"Wrote {ARTIFACT_PATH.name}: {stats.pop('bytes')} bytes, "
+              + ", ".join(f"{k} {v}" for k, v in stats.items()))
+        return 0
+    if cmd == "info":
+        try:
+            lk = Lookup(ARTIFACT_PATH)
+        except (OSError, ValueError) as ex:
+            print(f"{ARTIFACT_PATH.name}: {ex}")
+            return 1
+        installed = _source_tag()
+        print(f"{ARTIFACT_PATH.name}: built from EAS2Text {lk.source or '?'}"
+              + ("" if not installed or installed == lk.source else f" (installed {installed} — stale, rebuild)"))
+        for name, count in lk.counts().items():
+            print(f"  {name:<7} {count:>5} entries")
+        return 0
+    print("Usage: python3 eas_lookup.py [build|info]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
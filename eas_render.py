@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Native SAME header renderer — EAS2Text-compatible text without EAS2Text.
+
+Reproduces the United States branch of EAS2Text (old-WFO mode) for the two
+modes this project uses:
+
+  TFT    announcement text spoken by originate_with_tts and shown by /api/decode
+  NONE   default text, orgText/evntText/FIPSText as stored by the logger
+
+Phrases come from precomputed per-originator/per-event templates and an
+interned per-FIPS name cache built over the eas_lookup.bin artifact (or
+EAS2Text's own tables when the artifact is missing). Anything unusual —
+malformed fields, end-of-message headers, unexpected data — returns None so
+callers fall back to EAS2Text, which stays the reference.
+
+Usage:
+  python3 eas_render.py --verify     compare against EAS2Text on a golden corpus
+  python3 eas_render.py HEADER       print both renderings of one header
+"""
+
+import sys
+import calendar
+import threading
+from datetime import datetime as DT, timedelta, timezone
+from typing import NamedTuple
+
+import eas_lookup
+
+
+class Decoded(NamedTuple):
+    """Decode result, attribute names matching the EAS2Text instance fields."""
+    org:      str
+    evnt:     str
+    orgText:  str
+    evntText: str
+    FIPS:     list    # 6-digit codes, header order, de-duplicated
+    FIPSText: list    # sorted, last entry prefixed 'and ' when there are several
+    callsign: str
+    EASText:  str
+
+
+# =============================
+# Tables
+# =============================
+
+class _DictTables:
+    """EAS2Text's class data behind the eas_lookup.Lookup.get() interface."""
+
+    def __init__(self):
+        from EAS2Text import EAS2Text
+        us = EAS2Text.same_us
+        self._t = {name: us.get(name, {}) for name in ("SAME", "SUBDIV", "ORGS", "EVENTS")}
+        self._t["WFO"] = {k: (v[0].get("wfo") or "")
+                          for k, v in EAS2Text.wfo_us.get("SAME", {}).items() if v}
+
+    def get(self, table: str, code: str):
+        return self._t.get(table, {}).get(code)
+
+    def items(self, table: str):
+        return sorted(self._t.get(table, {}).items())
+
+
+_tables    = None
+_tables_lk = threading.Lock()
+
+def _lookup():
+    """Lookup artifact if available, else EAS2Text's tables; None if neither."""
+    global _tables
+    if _tables is None:
+        with _tables_lk:
+            if _tables is None:
+                lk = eas_lookup.open_default()
+                if lk is None:
+                    try:
+                        lk = _DictTables()
+                    except Exception:
+                        lk = False
+                _tables = lk
+    return _tables or None
+
+
+def native_available() -> bool:
+    """True if headers can be rendered from the artifact without loading EAS2Text."""
+    return eas_lookup.open_default() is not None
+
+
+# Per-code caches. Entries are computed once and interned so repeated headers
+# share the same strings.
+_place:   dict = {}   # 6-digit FIPS → (FIPSText entry, known, WFO or None, 'State' in name)
+_tft_loc: dict = {}   # FIPSText entry → TFT location phrase (upper case)
+_org:     dict = {}   # ORG → orgText
+_evnt:    dict = {}   # EVT → evntText
+_tft_head: dict = {}  # (ORG, EVT) → TFT sentence head (upper case)
+
+
+def _place_info(code: str) -> tuple:
+    hit = _place.get(code)
+    if hit is None:
+        lk     = _lookup()
+        subdiv = lk.get("SUBDIV", code[0])
+        same   = lk.get("SAME", code[1:])
+        if subdiv is None or same is None:
+            hit = (sys.intern(f"FIPS Code {code}"), False, None, False)
+        else:
+            text = f"{subdiv + ' ' if subdiv != '' else ''}{same}"
+            hit  = (sys.intern(text), True, lk.get("WFO", code[1:]), "State" in same)
+        _place[code] = hit
+    return hit
+
+
+def _org_text(org: str) -> str:
+    hit = _org.get(org)
+    if hit is None:
+        hit = _lookup().get("ORGS", org)
+        _org[org] = hit = sys.intern(hit if hit is not None else f"An Unknown Originator ({org});")
+    return hit
+
+
+def _evnt_text(evnt: str) -> str:
+    hit = _evnt.get(evnt)
+    if hit is None:
+        hit = _lookup().get("EVENTS", evnt)
+        _evnt[evnt] = hit = sys.intern(hit if hit is not None else f"an Unknown Event ({evnt})")
+    return hit
+
+
+def _tft_location(entry: str) -> str:
+    hit = _tft_loc.get(entry)
+    if hit is None:
+        hit = entry.replace(",", "").replace(";", ",").replace("FIPS Code", "AREA").upper()
+        _tft_loc[entry] = hit = sys.intern(hit)
+    return hit
+
+
+def _tft_template(org: str, evnt: str) -> str:
+    hit = _tft_head.get((org, evnt))
+    if hit is None:
+        if org == "EAS" or evnt in ("NPT", "EAN"):
+            hit = f"{_evnt_text(evnt)} has been issued for the following counties/areas: "
+        else:
+            hit = f"{_org_text(org)} has issued {_evnt_text(evnt)} for the following counties/areas: "
+        _tft_head[(org, evnt)] = hit = hit.upper()
+    return hit
+
+
+# =============================
+# Parsing and times
+# =============================
+
+class _Header(NamedTuple):
+    org:       str
+    evnt:      str
+    fips:      list
+    purge:     tuple
+    timestamp: str
+    callsign:  str
+
+
+def _parse(same: str) -> _Header | None:
+    same = same.strip()
+    if not same.startswith("ZCZC"):
+        return None   # empty, NNNN or invalid — let EAS2Text produce its result/error
+    eas = same.replace("ZCZC-", "").replace("+", "-").split("-")
+    eas.remove("")
+    codes = eas[2:-3]
+    for i in codes:
+        if len(i) != 6 or not (i.isascii() and i.isdigit()):
+            return None
+    fips = list(dict.fromkeys(codes))
+    if not fips or len(eas[0]) != 3 or len(eas[1]) != 3:
+        return None
+    return _Header(eas[0], eas[1], fips, (eas[-3][:2], eas[-3][2:]), eas[-2], eas[-1].strip())
+
+
+def _leap_adjust(t: DT) -> DT:
+    # Mirrors EAS2Text's day-of-year correction, quirks included
+    leap = calendar.isleap(t.year)
+    day  = t.date() - timedelta(days=1)
+    if day == DT(day.year, 12, 31).date() and leap:
+        day = DT(day.year + 1, 12, 31).date()
+        t  += timedelta(days=366)
+    if leap and day > DT(day.year, 2, 29).date():
+        t -= timedelta(days=1)
+    return t
+
+
+_JAN1_1900 = DT(1900, 1, 1)
+
+def _strptime_jhm(ts: str) -> DT:
+    # DT.strptime(ts, "%j%H%M") for the 7-digit form, without the regex machinery
+    if len(ts) != 7 or not (ts.isascii() and ts.isdigit()):
+        raise ValueError(ts)
+    j, hh, mm = int(ts[:3]), int(ts[3:5]), int(ts[5:])
+    if not (1 <= j <= 366 and hh < 24 and mm < 60):
+        raise ValueError(ts)
+    return _JAN1_1900 + timedelta(days=j - 1, hours=hh, minutes=mm)
+
+
+def _times(h: _Header, tz_offset: int | None) -> tuple:
+    dt_offset = 0 if tz_offset is None else -tz_offset * 3600
+    year  = DT.now(timezone.utc).year
+    start = _strptime_jhm(h.timestamp).replace(year=year).timestamp()
+    end   = start + int(h.purge[0]) * 3600 + int(h.purge[1]) * 60
+    return (_leap_adjust(DT.fromtimestamp(start - dt_offset)),
+            _leap_adjust(DT.fromtimestamp(end - dt_offset)))
+
+
+# =============================
+# Rendering
+# =============================
+
+def render_tft(same: str, tz_offset: int | None = None) -> str | None:
+    """
+    TFT-mode announcement text, identical to
+    EAS2Text(sameData=same, mode="TFT", timeZone=tz_offset).EASText.
+
+    Returns None if the header can't be rendered natively.
+    """
+    try:
+        h = _parse(same)
+        if h is None or _lookup() is None:
+            return None
+        start, end = _times(h, tz_offset)
+        locs = [_tft_location(_place_info(c)[0]) for c in sorted(h.fips)]
+        if len(locs) > 1:
+            locs[-1] = "AND " + locs[-1]
+        start_text = start.strftime("%I:%M %p ON %b %d, %Y")
+        end_text   = end.strftime("%I:%M %p") if start.day == end.day else end.strftime("%I:%M %p ON %b %d, %Y")
+        tail = f" at {start_text} effective until {end_text}. message from {h.callsign}.".upper()
+        return _tft_template(h.org, h.evnt) + ", ".join(locs) + tail
+    except Exception:
+        return None
+
+
+def decode(same: str, tz_offset: int | None = None) -> Decoded | None:
+    """
+    Default-mode decode, field-for-field identical to EAS2Text(same) for
+    the attributes listed on Decoded.
+
+    Returns None if the header can't be rendered natively.
+    """
+    try:
+        h = _parse(same)
+        if h is None or _lookup() is None:
+            return None
+        start, end = _times(h, tz_offset)
+        wxr   = h.org == "WXR"
+        names, wfos, state = [], [], False
+        for c in sorted(h.fips):
+            name, known, wfo, has_state = _place_info(c)
+            names.append(name)
+            if not known or (wxr and not has_state):
+                wfos.append(wfo or f"Unknown WFO for FIPS Code {c}")
+            elif has_state:
+                state = True
+        if len(names) > 1:
+            names[-1] = f"and {names[-1]}"
+        str_fips = "; ".join(names).strip() + ";"
+
+        if start.day == end.day:
+            fmt_s = fmt_e = "%I:%M %p"
+        elif start.year == end.year:
+            fmt_s = fmt_e = "%I:%M %p %B %d"
+        else:
+            fmt_s = fmt_e = "%I:%M %p %B %d, %Y"
+
+        org_text = _org_text(h.org)
+        if wxr:
+            if state:
+                org_text = "The National Weather Service"
+            else:
+                seen = list(dict.fromkeys(wfos))
+                if len(wfos) > 1:
+                    if len(seen) > 1:
+                        seen[-1] = f"and {seen[-1]}"
+                    wfo_text = "; ".join(seen).strip() + ";"
+                else:
+                    wfo_text = f"{wfos[0]};"
+                org_text = ("The National Weather Service" if wfo_text == "Unknown WFO;"
+                            else f"The National Weather Service in {wfo_text}")
+
+        evnt_text = _evnt_text(h.evnt)
+        text = (f"{org_text} has issued {evnt_text} for {str_fips} beginning at "
+                f"{start.strftime(fmt_s)} and ending at {end.strftime(fmt_e)}. "
+                f"Message from {h.callsign}.")
+        return Decoded(h.org, h.evnt, org_text, evnt_text, list(h.fips), names, h.callsign, text)
+    except Exception:
+        return None
+
+
+# =============================
+# Golden corpus
+# =============================
+
+def golden_corpus() -> list:
+    """
+    (header, tz_offset) pairs covering every originator and event code,
+    subdivisions, unknown and statewide FIPS codes, multi-county lists with
+    duplicates, purge times crossing midnight and year end, and offsets.
+    """
+    import random
+    rng = random.Random(911)
+    lk  = _lookup()
+    if lk is None:
+        return []
+    orgs   = ["EAS", "WXR", "CIV", "PEP", "EAN", "XYZ"]
+    events = [k for k, _ in lk.items("EVENTS")] + ["ZZZ"]
+    counties = [k for k, _ in lk.items("SAME")]
+    special  = ["036109", "136109", "936109", "000000", "099999", "010000", "036000", "099998"]
+    stamps   = ["0010000", "0011200", "0592359", "0600005", "1802330", "3651200", "3652345", "3660030"]
+    purges   = ["0015", "0030", "0100", "0130", "0600", "9900"]
+    tzs      = [None, -5, -10, 0, 9]
+    callsigns = ["KITH/EAS", "STATION ", "EAS_TEST"]
+
+    def header(org, evt, fips, purge, stamp, call):
+        return f"ZCZC-{org}-{evt}-{'-'.join(fips)}+{purge}-{stamp}-{call}-"
+
+    corpus = []
+    for org in orgs:
+        for evt in events:
+            fips = [f"0{rng.choice(counties)}" for _ in range(rng.randint(1, 4))]
+            corpus.append((header(org, evt, fips, rng.choice(purges), rng.choice(stamps),
+                                  rng.choice(callsigns)), rng.choice(tzs)))
+    for code in special:
+        for org in ("WXR", "EAS"):
+            corpus.append((header(org, "TOR", [code], "0100", "1802330", "KITH/EAS"), None))
+    for _ in range(300):
+        n    = rng.randint(1, 31)
+        fips = [f"{rng.randint(0, 9)}{rng.choice(counties)}" for _ in range(n)]
+        if rng.random() < 0.3:
+            fips.append(fips[0])   # duplicate
+        corpus.append((header(rng.choice(orgs), rng.choice(events), fips, rng.choice(purges),
+                              rng.choice(stamps), rng.choice(callsigns)), rng.choice(tzs)))
+    for stamp in stamps:
+        for purge in purges:
+            corpus.append((header("WXR", "SVR", ["036109", "036001"], purge, stamp, "KBGM/NWS"), rng.choice(tzs)))
+    # Malformed — must fall back (render None), never diverge
+    corpus += [("ZCZC-WXR-TOR-36109+0100-1802330-KBGM/NWS-", None),
+               ("ZCZC-WXR-TORN-036109+0100-1802330-KBGM/NWS-", None),
+               ("NNNN", None), ("", None)]
+    return corpus
+
+
+def verify(verbose: bool = False) -> int:
+    """Render the golden corpus natively and with EAS2Text; report mismatches."""
+    from EAS2Text import EAS2Text
+
+    def reference(fn):
+        try:
+            return fn()
+        except Exception as ex:
+            return f"<{type(ex).__name__}>"
+
+    corpus = golden_corpus()
+    if not corpus:
+        print("No lookup tables available — build eas_lookup.bin or install EAS2Text")
+        return 1
+    checked = fallback = bad = 0
+    for same, tz in corpus:
+        kw = {} if tz is None else {"timeZone": tz}
+        tft = render_tft(same, tz)
+        dec = decode(same, tz)
+        if tft is None or dec is None:
+            fallback += 1
+            continue
+        ref_tft = reference(lambda: EAS2Text(sameData=same, mode="TFT", **kw).EASText)
+        ref     = reference(lambda: EAS2Text(same, **kw))
+        checked += 1
+        diffs = []
+        if tft != ref_tft:
+            diffs.append(("TFT", tft, ref_tft))
+        for field in Decoded._fields:
+            mine, theirs = getattr(dec, field), getattr(ref, field, ref)
+            if mine != theirs:
+                diffs.append((field, mine, theirs))
+        if diffs:
+            bad += 1
+            if bad <= 10 or verbose:
+                print(f"MISMATCH {same!r} tz={tz}")
+                for field, mine, theirs in diffs:
+                    print(f"  {field}:\n    native   {mine!r}\n    EAS2Text {theirs!r}")
+    print(f"{checked} headers compared, {fallback} fell back to EAS2Text, {bad} mismatched")
+    return 1 if bad else 0
+
+
+def main(argv: list) -> int:
+    if not argv or argv[0] in ("-h", "--help"):
+        print(__doc__.strip().split("Usage:")[1].rstrip())
+        return 0 if argv else 2
+    if argv[0] == "--verify":
+        return verify("-v" in argv)
+    same = " ".join(argv)
+    print(f"TFT:     {render_tft(same)}")
+    dec = decode(same)
+    print(f"Default: {dec.EASText if dec else None}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
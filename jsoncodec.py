@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+JSON encoding and decoding, accelerated when orjson is installed.
+
+Everything that reads or writes alert JSON goes through here: events.jsonl
+and trace.jsonl, the dashboard's alert history, the Flask API responses and
+the Socket.IO packets. With orjson available (pip install orjson) parsing is
+several times faster, which is what a Pi notices when the dashboard loads
+its alert history. Without it the stdlib json module is used and nothing
+else changes.
+
+    loads(s)          str or bytes → object
+    dumps(obj)        compact text for API responses and socket packets
+    dumps_line(obj)   one JSONL line, in the layout events.jsonl has always
+                      used (json.dumps(obj, ensure_ascii=False)), so old and
+                      new lines — and both backends — are byte-identical
+
+Output from dumps() is the same JSON on either backend but not necessarily
+the same bytes. dumps_line() is always the same bytes.
+
+    python3 jsoncodec.py --verify [file.jsonl ...]   prove archives round-trip byte for byte
+"""
+
+import sys
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+BACKEND = "orjson" if ORJSON_AVAILABLE else "json"
+
+
+# =============================
+# stdlib backend
+# =============================
+
+def _std_loads(s):
+    return json.loads(s)
+
+
+def _std_dumps(obj, indent: bool = False, sort_keys: bool = False, default=None) -> str:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default)
+
+
+# =============================
+# orjson backend
+# =============================
+
+if ORJSON_AVAILABLE:
+    # With a default= hook, hand datetimes and dataclasses to it as the stdlib would
+    _PASSTHROUGH = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def _fast_loads(s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity literals and >64-bit integers are valid to the stdlib only;
+            # malformed text raises the same ValueError from here
+            return json.loads(s)
+
+    def _fast_dumps(obj, indent: bool = False, sort_keys: bool = False, default=None) -> str:
+        opt = orjson.OPT_NON_STR_KEYS
+        if indent:
+            opt |= orjson.OPT_INDENT_2
+        if sort_keys:
+            opt |= orjson.OPT_SORT_KEYS
+        if default is not None:
+            opt |= _PASSTHROUGH
+        try:
+            return orjson.dumps(obj, default=default, option=opt).decode()
+        except orjson.JSONEncodeError:
+            # >64-bit integers, mixed-type keys under sort_keys — let the stdlib decide
+            return _std_dumps(obj, indent, sort_keys, default)
+
+
+# =============================
+# Public interface
+# =============================
+
+def loads(s):
+    """
+    Parse JSON text.
+
+    Raises:
+        ValueError: on malformed JSON (json.JSONDecodeError on both backends).
+    """
+    return _fast_loads(s) if ORJSON_AVAILABLE else _std_loads(s)
+
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False, default=None, separators=None) -> str:
+    """
+    Compact JSON text (two-space indented with indent=True), non-ASCII kept as UTF-8.
+
+    separators is accepted for callers written against json.dumps (python-socketio
+    passes the compact pair) and otherwise ignored.
+
+    Raises:
+        TypeError: if obj holds a value neither the backend nor default can encode.
+    """
+    if ORJSON_AVAILABLE:
+        return _fast_dumps(obj, indent, sort_keys, default)
+    return _std_dumps(obj, indent, sort_keys, default)
+
+
+def dumps_line(obj) -> str:
+    """One JSONL line (no newline) in the archive layout, identical on every backend."""
+    # The ", " / ": " separators are part of the archive format and only the stdlib
+    # writes them; one line per alert is nowhere near a hot path
+    return json.dumps(obj, ensure_ascii=False)
+
+
+# =============================
+# Compatibility check
+# =============================
+
+# Lines in the archive layout that exercise the awkward corners: non-ASCII,
+# escapes, control characters, float formatting, nulls, nesting, legacy records
+_SAMPLES = (
+    '{"schema": 1, "received_utc": "2026-10-19T00:02:26Z", "received_local": "2026-10-18 20:02:26", '
+    '"canonical_header": "ZCZC-WXR-TOR-048453+0030-2920002-KEWX/NWS-", "expires_utc": "2026-10-19T00:32:00Z", '
+    '"event_code": "TOR", "originator_code": "WXR", "sender": "KEWX/NWS", "event_text": "a Tornado Warning", '
+    '"org_text": "The National Weather Service", "eas_text": "The National Weather Service has issued a Tornado '
+    'Warning for Travis County, TX; beginning at 07:02 PM and ending at 07:32 PM. Message from KEWX/NWS.", '
+    '"locations_pretty": ["Travis County, TX"], "notification": {"attempted": true, "sent": true, "http_status": 200}, '
+    '"trace": {"id": "3f0a9c1e2b7d", "framed": 1760832146.123456, "parsed": 1760832146.1241, "decoded": 1760832146.2, '
+    '"notified": 1760832147.0}}',
+    '{"schema": 1, "received_utc": "2026-10-19T00:05:00Z", "received_local": "2026-10-18 20:05:00", '
+    '"canonical_header": "ZCZC-CIV-EVI-000000+0100-2920005-KXYZ    -", "expires_utc": null, '
+    '"decode_error": "bad \\"header\\"\\n\\ttab \\u0001 \\\\ backslash", "notification": {"attempted": false}}',
+    '{"schema": 1, "received_utc": "2026-10-19T00:06:00Z", "received_local": "2026-10-18 20:06:00", '
+    '"canonical_header": "ZCZC-EAS-RWT-072001+0015-2920006-WKAQ/AM -", "expires_utc": "2026-10-19T00:21:00Z", '
+    '"event_code": "RWT", "originator_code": "EAS", "sender": "WKAQ/AM", "event_text": "una Prueba Semanal Requerida", '
+    '"org_text": "Sistema de Alerta", "eas_text": "Adjuntas, PR — prueba “semanal” ✓ 🌪", '
+    '"locations_pretty": ["Adjuntas Municipio, PR", "Añasco Municipio, PR"], '
+    '"notification": {"attempted": true, "sent": false, "error": "timed out"}}',
+    '{"received_utc": "2025-01-01T00:00:00Z", "received_local": "2025-01-01 00:00:00", '
+    '"canonical_header": "ZCZC-WXR-SVR-048453+0045-0010000-KEWX/NWS-", "expires_utc": "2025-01-01T00:45:00Z", '
+    '"event_code": "SVR", "originator_code": "WXR", "sender": "KEWX/NWS", "event_text": "a Severe Thunderstorm Warning", '
+    '"org_text": "The National Weather Service", "eas_text": "", "locations_pretty": [], '
+    '"notification": {"attempted": true, "sent": false, "http_status": 403}, '
+    '"custom": {"n": [1, 2.5, -0.0, 1e-07, 12345678901234567890], "ok": [true, false, null]}}',
+    '{"id": "3f0a9c1e2b7d", "fsynced": 1760832147.004211}',
+)
+
+
+def verify_lines(lines, label: str = "") -> int:
+    """
+    Check each line with every available backend: it parses to the same object,
+    dumps_line() writes it back byte for byte, dumps() output parses back equal,
+    and — for alert records — AlertRecord round-trips it unchanged.
+    Returns the number of failing lines.
+    """
+    from alert_record import AlertRecord
+
+    backends = [("json", _std_loads, _std_dumps)]
+    if ORJSON_AVAILABLE:
+        backends.append(("orjson", _fast_loads, _fast_dumps))
+    bad = 0
+    for n, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        errors = []
+        try:
+            ref = _std_loads(line)
+        except ValueError as ex:
+            print(f"  {label}{n}: unreadable: {ex}")
+            bad += 1
+            continue
+        for name, load, dump in backends:
+            obj = load(line)
+            if obj != ref:
+                errors.append(f"{name} parses differently")
+            if dumps_line(obj) != line:
+                errors.append(f"{name} line differs")
+            for indent in (False, True):
+                if _std_loads(dump(obj, indent)) != ref:
+                    errors.append(f"{name} dumps(indent={indent}) differs")
+            if isinstance(obj, dict) and "canonical_header" in obj:
+                if AlertRecord.from_dict(obj).to_json() != line:
+                    errors.append(f"{name} AlertRecord round trip differs")
+        if errors:
+            print(f"  {label}{n}: " + "; ".join(errors))
+            bad += 1
+    return bad
+
+
+def _verify(paths: list) -> int:
+    print(f"backend: {BACKEND}")
+    bad = verify_lines(_SAMPLES, "sample ")
+    print(f"  {len(_SAMPLES) - bad}/{len(_SAMPLES)} sample lines round-trip")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        total = sum(1 for l in lines if l.strip())
+        failed = verify_lines(lines, f"{path}:")
+        print(f"  {total - failed}/{total} lines of {path} round-trip")
+        bad += failed
+    print("ok" if not bad else f"FAILED — {bad} lines")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--verify"]:
+        import os
+        default = [p for p in ("alerts/events.jsonl", "alerts/trace.jsonl") if os.path.exists(p)]
+        sys.exit(_verify(sys.argv[2:] or default))
+    print(__doc__.strip())
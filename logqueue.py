@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Asynchronous logging: the caller only enqueues, a listener thread writes.
+
+attach(logger, handlers) replaces the logger's handlers with one
+DroppingQueueHandler in front of a bounded queue. A QueueListener thread
+feeds the records to the real handlers (console, rotating file), so a
+logger.info() on the serial loop never waits on the SD card, stdout or a
+rotation. When the queue is full the record is dropped and counted rather
+than blocking the caller. Once there is room again, one WARNING says how many
+records were lost. Records logged with extra=KEEP are the exception: they wait
+for room instead of being dropped.
+
+logging.shutdown() closes the queue handler, and that drains the queue
+before the real handlers are closed. logging runs shutdown at exit and
+memwatch.restart() calls it before exiting, so records already queued
+reach the file.
+
+    python3 logqueue.py --verify     overflow a stalled handler, check drops are counted and the rest flushed
+"""
+
+import sys
+import time
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+import metrics
+
+
+QUEUE_SIZE    = 10000   # records; ~1000 bursts' worth of logger output
+FLUSH_TIMEOUT = 5.0     # seconds shutdown waits for the listener to drain
+
+KEEP = {"keep": True}   # extra= for records that must never be dropped
+
+DROPPED = metrics.counter("tft911_log_records_dropped_total", "Log records dropped on a full queue", ["logger"])
+DEPTH   = metrics.gauge("tft911_log_queue_depth", "Log records waiting for the writer thread", ["logger"])
+
+
+class _Listener(QueueListener):
+    """QueueListener whose stop() waits at most FLUSH_TIMEOUT, even on a full queue."""
+
+    def enqueue_sentinel(self):
+        try:
+            self.queue.put(self._sentinel, timeout=FLUSH_TIMEOUT)
+        except queue.Full:
+            pass
+
+    def stop(self):
+        if self._thread is not None:
+            self.enqueue_sentinel()
+            self._thread.join(FLUSH_TIMEOUT)
+            self._thread = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: full queue → drop and count (KEEP records wait instead)."""
+
+    def __init__(self, q: queue.Queue, name: str):
+        super().__init__(q)
+        self.listener = None
+        self.dropped  = 0   # since the last notice; guarded by the handler lock
+        self._drops   = DROPPED.labels(logger=name)
+        DEPTH.labels(logger=name).set_function(q.qsize)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        keep = getattr(record, "keep", False)
+        try:
+            if self.dropped:
+                self.queue.put(self._notice(record), block=keep)
+                self.dropped = 0
+            self.queue.put(record, block=keep)
+        except queue.Full:
+            self.dropped += 1
+            self._drops.inc()
+
+    def _notice(self, after: logging.LogRecord) -> logging.LogRecord:
+        r = logging.LogRecord(after.name, logging.WARNING, __file__, 0,
+                              f"log queue full — dropped {self.dropped} records", None, None, "enqueue")
+        r.created, r.msecs = after.created, after.msecs
+        return r
+
+    def close(self) -> None:
+        # Drain before logging.shutdown() reaches (and closes) the real handlers
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def attach(logger: logging.Logger, handlers: list, maxsize: int = QUEUE_SIZE) -> DroppingQueueHandler:
+    """
+    Route logger's records through a bounded queue to handlers on a listener thread.
+
+    Handler levels still apply (respect_handler_level). Returns the queue handler;
+    its .listener is the running QueueListener.
+    """
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+        if isinstance(h, DroppingQueueHandler):   # attached before: stop its writer
+            h.close()
+    q  = queue.Queue(maxsize=max(1, int(maxsize)))
+    qh = DroppingQueueHandler(q, logger.name)
+    qh.listener = _Listener(q, *handlers, respect_handler_level=True)
+    qh.listener.start()
+    qh.listener._thread.name = f"log-{logger.name}"
+    logger.addHandler(qh)
+    return qh
+
+
+def _verify() -> int:
+    gate = threading.Event()
+    seen = []
+
+    class Stalled(logging.Handler):
+        def emit(self, record):
+            gate.wait()
+            seen.append(record.getMessage())
+
+    log = logging.getLogger("logqueue.verify")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    qh = attach(log, [Stalled()], maxsize=10)
+    log.info("record 0")
+    while qh.queue.qsize():   # until the writer holds record 0
+        time.sleep(0.001)
+    for i in range(1, 50):    # 10 queue, 39 drop
+        log.info(f"record {i}")
+    dropped = qh.dropped
+    gate.set()
+    while qh.queue.qsize():
+        time.sleep(0.001)
+    log.info("after")
+    qh.close()
+    notice = [m for m in seen if "dropped" in m]
+    ok = (dropped == 39 and seen[0] == "record 0" and seen[-1] == "after"
+          and notice == ["log queue full — dropped 39 records"] and len(seen) == 1 + 10 + 1 + 1)
+    print(f"{len(seen)} written, {dropped} dropped, notice {notice} — {'ok' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--verify"]:
+        sys.exit(_verify())
+    print(__doc__.strip())
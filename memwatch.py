@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Memory watchdog for the long-running services.
+
+A daemon thread samples resident set size every `interval` seconds and
+publishes it as metrics gauges (metrics.py). With tracemalloc enabled it
+also snapshots the Python heap every `snapshot_every` seconds and logs the
+top-N allocation sites by growth since the previous snapshot. Both go to a
+rotating diagnostics file, logs/memwatch-<service>.log.
+
+When RSS stays above the configured budget for EXCEED_SAMPLES samples in a
+row the watchdog logs a final heap report and calls on_exceed(rss). By
+default that exits with EXIT_RESTART, and systemd (Restart=always) starts the
+service again. A service that needs to finish its current work first can
+pass its own on_exceed and exit itself; if it is still running
+RESTART_GRACE seconds later the watchdog exits it anyway.
+
+    python3 memwatch.py --verify     grow a list past a small budget and check it trips
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+
+import metrics
+
+
+EXIT_RESTART   = 75    # EX_TEMPFAIL — "try again"
+EXCEED_SAMPLES = 3     # consecutive samples over budget before restarting
+RESTART_GRACE  = 30.0  # seconds a custom on_exceed gets to exit cleanly
+
+RSS_BYTES    = metrics.gauge("tft911_memory_rss_bytes", "Resident set size", ["service"])
+PEAK_BYTES   = metrics.gauge("tft911_memory_rss_peak_bytes", "Peak resident set size", ["service"])
+BUDGET_BYTES = metrics.gauge("tft911_memory_budget_bytes", "RSS budget before a restart (0 = none)", ["service"])
+TRACED_BYTES = metrics.gauge("tft911_memory_traced_bytes", "Python heap traced by tracemalloc", ["service"])
+GROWTH_BYTES = metrics.gauge("tft911_memory_growth_bytes",
+                             "Growth of the top allocation sites between the last two heap snapshots",
+                             ["service", "site"])
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc; elsewhere the peak from getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def restart(rss: int) -> None:
+    """Default on_exceed: flush logging and exit so systemd restarts the service."""
+    logging.shutdown()
+    os._exit(EXIT_RESTART)
+
+
+def _mb(n: float) -> str:
+    return f"{n / 1048576:.1f} MB"
+
+
+class MemoryWatch:
+    """
+    Samples one process's memory on a daemon thread.
+
+    Usage:
+        watch = MemoryWatch("web", "logs", budget_mb=256).start()
+    """
+
+    def __init__(self, service: str, log_dir, interval: float = 60.0, budget_mb: float = 0,
+                 trace: bool = False, snapshot_every: float = 3600.0, top: int = 10, on_exceed=None):
+        self.service        = service
+        self.interval       = interval
+        self.budget         = int(budget_mb * 1048576)
+        self.trace          = trace
+        self.snapshot_every = snapshot_every
+        self.top            = top
+        self.on_exceed      = on_exceed or restart
+        self.exceeded       = threading.Event()
+        self._over          = 0
+        self._snapshot      = None
+        self._snapshot_at   = 0.0
+        self._stop          = threading.Event()
+        self.log = logging.getLogger(f"memwatch.{service}")
+        self.log.propagate = False
+        if not self.log.handlers:
+            fh = RotatingFileHandler(os.path.join(str(log_dir), f"memwatch-{service}.log"),
+                                     maxBytes=1024 * 1024, backupCount=3)
+            fh.setFormatter(logging.Formatter('%(asctime)s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+            self.log.addHandler(fh)
+            self.log.setLevel(logging.INFO)
+        BUDGET_BYTES.labels(service=service).set(self.budget)
+
+    def start(self) -> "MemoryWatch":
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        self.log.info(f"watching {self.service} (pid {os.getpid()}) every {self.interval:g}s, "
+                      f"budget {_mb(self.budget) if self.budget else 'none'}, "
+                      f"tracemalloc {'on' if self.trace else 'off'}")
+        threading.Thread(target=self._loop, daemon=True, name=f"memwatch-{self.service}").start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ── sampling ──
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as ex:
+                self.log.warning(f"sample failed: {ex}")
+
+    def check(self, now: float = None) -> int:
+        """Take one sample (the thread calls this every interval); returns RSS in bytes."""
+        now  = time.monotonic() if now is None else now
+        rss  = rss_bytes()
+        peak = max(peak_rss_bytes(), rss)
+        RSS_BYTES.labels(service=self.service).set(rss)
+        PEAK_BYTES.labels(service=self.service).set(peak)
+        line = f"rss {_mb(rss)} peak {_mb(peak)}"
+        if tracemalloc.is_tracing():
+            traced, _ = tracemalloc.get_traced_memory()
+            TRACED_BYTES.labels(service=self.service).set(traced)
+            line += f" traced {_mb(traced)}"
+        self.log.info(line)
+
+        if self.trace and tracemalloc.is_tracing() and now - self._snapshot_at >= self.snapshot_every:
+            self._snapshot_at = now
+            self.heap_report()
+
+        if self.budget and rss > self.budget:
+            self._over += 1
+            self.log.warning(f"over budget {_mb(rss)} > {_mb(self.budget)} ({self._over}/{EXCEED_SAMPLES})")
+            if self._over >= EXCEED_SAMPLES and not self.exceeded.is_set():
+                self._exceed(rss)
+        else:
+            self._over = 0
+        return rss
+
+    def heap_report(self) -> list:
+        """Log the top-N sites by growth since the last snapshot (by size on the first)."""
+        snap = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        if self._snapshot is None:
+            stats, what = snap.statistics("lineno")[:self.top], "largest"
+        else:
+            stats, what = snap.compare_to(self._snapshot, "lineno")[:self.top], "growth"
+        self._snapshot = snap
+        GROWTH_BYTES.clear()
+        rows = []
+        for st in stats:
+            frame = st.traceback[0]
+            site  = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            delta = getattr(st, "size_diff", st.size)
+            rows.append((site, delta, st.size, st.count))
+            GROWTH_BYTES.labels(service=self.service, site=site).set(delta)
+        self.log.info(f"heap top {len(rows)} by {what}:")
+        for site, delta, size, count in rows:
+            self.log.info(f"  {delta / 1024:+10.1f} KiB  {size / 1024:10.1f} KiB  {count:8d} blocks  {site}")
+        return rows
+
+    def _exceed(self, rss: int) -> None:
+        self.exceeded.set()
+        self.log.error(f"RSS {_mb(rss)} over budget {_mb(self.budget)} — restarting {self.service}")
+        if tracemalloc.is_tracing():
+            self.heap_report()
+        for h in self.log.handlers:
+            h.flush()
+        self.on_exceed(rss)
+        if self.on_exceed is not restart:
+            t = threading.Timer(RESTART_GRACE, restart, args=(rss,))
+            t.daemon = True
+            t.start()
+
+
+def _verify() -> int:
+    import tempfile
+    tripped = []
+    with tempfile.TemporaryDirectory() as d:
+        hoard = []
+        watch = MemoryWatch("verify", d, budget_mb=rss_bytes() / 1048576 + 16, trace=True,
+                            snapshot_every=0, top=5, on_exceed=tripped.append)
+        tracemalloc.start(1)
+        watch.check(now=0)
+        for i in range(EXCEED_SAMPLES + 1):
+            hoard.append(bytearray(12 * 1048576))
+            hoard.append([str(n) for n in range(50_000)])
+            watch.check(now=i + 1)
+        tracemalloc.stop()
+        with open(os.path.join(d, "memwatch-verify.log")) as f:
+            log = f.read()
+        logging.getLogger("memwatch.verify").handlers[0].close()
+    print(log.rstrip())
+    last = log.split("heap top")[-1]
+    grew = "by growth" in last and "memwatch.py:" in last
+    ok = len(tripped) == 1 and grew
+    print(f"{'ok' if ok else 'FAILED'} — restart requested {len(tripped)}×")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--verify"]:
+        sys.exit(_verify())
+    print(__doc__.strip())
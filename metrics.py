@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus-style metrics, no dependencies.
+
+Counters, gauges and histograms live in a process-wide registry and are
+rendered in the Prometheus text exposition format (0.0.4), so any scraper
+or a plain `curl` can read them:
+
+    BURSTS = metrics.counter("tft911_logger_bursts_framed_total", "Complete bursts framed")
+    BURSTS.inc()
+    FSYNC = metrics.histogram("tft911_logger_fsync_seconds", "append+fsync time", ["file"])
+    with FSYNC.labels(file="events.jsonl").time():
+        ...
+
+Updates are one short lock and an add — cheap enough for the logger's
+per-chunk path on a Pi Zero (python3 bench.py metrics). The logger serves
+the registry with serve() on a local port; the dashboard adds a /metrics
+route.
+"""
+
+import math
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_perf = time.perf_counter
+
+# Seconds — covers sub-millisecond fsyncs through multi-second TFT jobs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+# =============================
+# Metric types
+# =============================
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self._lk        = threading.Lock()
+        self._children  = {}   # label values → child
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, **kv):
+        """The child for one combination of label values, created on first use."""
+        key = tuple([str(kv[n]) for n in self.labelnames])
+        child = self._children.get(key)
+        if child is None:
+            with self._lk:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        """Drop every labelled child (e.g. a top-N whose members change)."""
+        if self.labelnames:
+            with self._lk:
+                self._children.clear()
+
+    def _series(self):
+        """(suffix, {label: value}, number) tuples for exposition."""
+        for key, child in sorted(list(self._children.items())):
+            labels = dict(zip(self.labelnames, key))
+            for suffix, extra, v in child._samples():
+                yield suffix, {**labels, **extra}, v
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, v in self._series():
+            lbl = ",".join(f'{k}="{_escape(x)}"' for k, x in labels.items())
+            out.append(f"{self.name}{suffix}{{{lbl}}} {_fmt(v)}" if lbl else f"{self.name}{suffix} {_fmt(v)}")
+        return out
+
+
+class _CounterChild:
+    __slots__ = ("_v", "_lk")
+
+    def __init__(self):
+        self._v, self._lk = 0.0, threading.Lock()
+
+    def inc(self, n: float = 1) -> None:
+        with self._lk:
+            self._v += n
+
+    @property
+    def value(self) -> float:
+        return self._v
+
+    def _samples(self):
+        yield "", {}, self._v
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; names end in _total by convention."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, n: float = 1) -> None:
+        self._default.inc(n)
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+
+class _GaugeChild:
+    __slots__ = ("_v", "_lk", "_fn")
+
+    def __init__(self):
+        self._v, self._lk, self._fn = 0.0, threading.Lock(), None
+
+    def set(self, v: float) -> None:
+        self._v = float(v)
+
+    def inc(self, n: float = 1) -> None:
+        with self._lk:
+            self._v += n
+
+    def dec(self, n: float = 1) -> None:
+        self.inc(-n)
+
+    def set_function(self, fn) -> None:
+        """Read the value from fn() at scrape time instead."""
+        self._fn = fn
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return math.nan
+        return self._v
+
+    def _samples(self):
+        yield "", {}, self.value
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, v: float) -> None:
+        self._default.set(v)
+
+    def inc(self, n: float = 1) -> None:
+        self._default.inc(n)
+
+    def dec(self, n: float = 1) -> None:
+        self._default.dec(n)
+
+    def set_function(self, fn) -> None:
+        self._default.set_function(fn)
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+
+class _Timer:
+    __slots__ = ("_observe", "_t0")
+
+    def __init__(self, observe):
+        self._observe = observe
+        self._t0      = _perf()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._observe(_perf() - self._t0)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lk")
+
+    def __init__(self, bounds: tuple):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self._sum    = 0.0
+        self._lk     = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        i = bisect.bisect_left(self._bounds, v)
+        with self._lk:
+            self._counts[i] += 1
+            self._sum += v
+
+    def time(self) -> _Timer:
+        """Context manager observing the seconds spent inside it."""
+        return _Timer(self.observe)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def _samples(self):
+        with self._lk:
+            counts, total = list(self._counts), self._sum
+        cum = 0
+        for le, n in zip(self._bounds + (math.inf,), counts):
+            cum += n
+            yield "_bucket", {"le": _fmt(le)}, cum
+        yield "_sum", {}, total
+        yield "_count", {}, cum
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative le buckets, plus _sum and _count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, v: float) -> None:
+        self._default.observe(v)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    @property
+    def count(self) -> int:
+        return self._default.count
+
+    @property
+    def sum(self) -> float:
+        return self._default.sum
+
+
+# =============================
+# Registry
+# =============================
+
+class Registry:
+    """Named metrics of one process, in registration order."""
+
+    def __init__(self):
+        self._lk      = threading.Lock()
+        self._metrics = {}
+
+    def get_or_create(self, cls, name: str, help: str, labelnames=(), **kw):
+        """
+        The metric called name, registering it on first use — modules that
+        are imported into both processes (or re-imported) share one metric.
+
+        Raises:
+            ValueError: if name is already registered as another type or label set.
+        """
+        with self._lk:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labelnames, **kw)
+            elif type(m) is not cls or m.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered as {m.kind} {m.labelnames}")
+            return m
+
+    def render(self) -> str:
+        with self._lk:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+def counter(name: str, help: str, labelnames=(), registry: Registry = REGISTRY) -> Counter:
+    return registry.get_or_create(Counter, name, help, labelnames)
+
+def gauge(name: str, help: str, labelnames=(), registry: Registry = REGISTRY) -> Gauge:
+    return registry.get_or_create(Gauge, name, help, labelnames)
+
+def histogram(name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+              registry: Registry = REGISTRY) -> Histogram:
+    return registry.get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+def render(registry: Registry = REGISTRY) -> str:
+    """The registry in text exposition format."""
+    return registry.render()
+
+
+# =============================
+# HTTP listener
+# =============================
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics on a daemon thread; returns the server (call shutdown() to stop).
+
+    Raises:
+        OSError: if the port cannot be bound.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Sampling profiler producing collapsed stacks.
+
+A daemon thread snapshots the other threads' Python stacks with
+sys._current_frames() every `interval` seconds and counts identical stacks.
+The result is one line per distinct stack, root first:
+
+    MainThread;main (TFT_logger.py:310);read (serialposix.py:565) 412
+
+which flamegraph.pl, speedscope and similar tools load directly.
+Nothing is installed or hooked until profile() is called, so the
+profiler costs nothing while it is idle.
+
+The dashboard serves it at /debug/profile and TFT_logger runs it on SIGUSR2.
+Both are enabled by [debug] profiling in config.ini.
+
+    python3 profiler.py --verify     sample a busy loop and check it shows up
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+
+DEFAULT_INTERVAL = 0.005   # 200 Hz
+MAX_SECONDS      = 300
+
+_busy = threading.Lock()   # one profile at a time per process
+
+
+def _frame_label(code, lineno: int) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})".replace(";", ":")
+
+
+def _stack(frame) -> list:
+    out = []
+    while frame is not None:
+        out.append(_frame_label(frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+def sample(seconds: float, interval: float = DEFAULT_INTERVAL, threads=None) -> Counter:
+    """
+    Sample thread stacks for `seconds`.
+
+    Args:
+        seconds:  How long to sample (capped at MAX_SECONDS).
+        interval: Seconds between samples.
+        threads:  Thread idents to include; None for every thread but the sampler.
+
+    Returns:
+        Counter of collapsed stack string → samples.
+
+    Raises:
+        RuntimeError: if another profile is already running in this process.
+    """
+    if not _busy.acquire(blocking=False):
+        raise RuntimeError("a profile is already running")
+    try:
+        me       = threading.get_ident()
+        names    = {}
+        counts   = Counter()
+        deadline = time.monotonic() + min(max(seconds, 0), MAX_SECONDS)
+        while True:
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == me or (threads is not None and ident not in threads):
+                    continue
+                name = names.get(ident)
+                if name is None:
+                    t = next((t for t in threading.enumerate() if t.ident == ident), None)
+                    name = names[ident] = (t.name if t else f"thread-{ident}").replace(";", ":")
+                counts[";".join([name] + _stack(frame))] += 1
+            del frames, frame   # don't keep other threads' frames alive between samples
+            if time.monotonic() >= deadline:
+                return counts
+            time.sleep(interval)
+    finally:
+        _busy.release()
+
+
+def collapse(counts: Counter) -> str:
+    """Collapsed-stack text, heaviest stacks first."""
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def profile(seconds: float, interval: float = DEFAULT_INTERVAL, threads=None) -> str:
+    """sample() then collapse()."""
+    return collapse(sample(seconds, interval, threads))
+
+
+def profile_to_file(directory, seconds: float, prefix: str = "profile", threads=None, report=None) -> str:
+    """
+    Profile on a background thread and write <directory>/<prefix>-<UTC time>.collapsed.
+
+    report(message) is called with the path when done, or with the error.
+    Returns the path that will be written.
+    """
+    path = os.path.join(directory, f"{prefix}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}.collapsed")
+
+    def run():
+        try:
+            text = profile(seconds, threads=threads)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            if report:
+                report(f"Profile written: {path} ({sum(1 for _ in text.splitlines())} stacks)")
+        except Exception as ex:
+            if report:
+                report(f"Profile failed: {ex}")
+
+    threading.Thread(target=run, daemon=True, name="profiler").start()
+    return path
+
+
+def _verify() -> int:
+    stop = threading.Event()
+
+    def spin_marker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    t = threading.Thread(target=spin_marker, name="spinner", daemon=True)
+    t.start()
+    try:
+        counts = sample(0.5, threads={t.ident})
+    finally:
+        stop.set()
+        t.join()
+    text = collapse(counts)
+    ok = bool(counts) and all(s.startswith("spinner;") for s in counts) and "spin_marker" in text
+    busy = False
+    with _busy:
+        try:
+            sample(0)
+        except RuntimeError:
+            busy = True
+    print(text.splitlines()[0] if text else "(no samples)")
+    print(f"{sum(counts.values())} samples, {len(counts)} stacks — {'ok' if ok and busy else 'FAILED'}")
+    return 0 if ok and busy else 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--verify"]:
+        sys.exit(_verify())
+    print(__doc__.strip())
@@ -143,6 +143,7 @@ if $IS_PI; then
     pip install --upgrade pip > /dev/null 2>&1
     pip install -r requirements.txt
     ok "Python dependencies installed"
+    python3 eas_lookup.py build && ok "EAS lookup tables built" || warn "Could not build eas_lookup.bin — EAS2Text data will be loaded at runtime"
 
     step "4b" "Configuring serial ports"
     echo ""
@@ -314,6 +315,7 @@ else
     pip install --upgrade pip > /dev/null 2>&1
     pip install -r requirements.txt
     ok "Dependencies installed"
+    python3 eas_lookup.py build && ok "EAS lookup tables built" || warn "Could not build eas_lookup.bin — EAS2Text data will be loaded at runtime"
 
     step "3" "Configure push notifications (optional)"
     echo ""
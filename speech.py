@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Persistent speech engine for TTS announcements.
+
+Spawning `espeak ... --stdout | aplay` per announcement pays for two process
+starts and for espeak loading its voice data every time. Instead, one worker
+thread owns libespeak-ng (or libespeak) through ctypes: the library is
+initialised once, the current voice stays loaded, and synthesised PCM is
+delivered by callback as it is produced. Playback goes to a long-lived aplay
+process reading raw S16_LE from a pipe, which is closed again after
+SINK_IDLE_SECS so PTT and other ALSA users can have the device.
+
+cancel() aborts synthesis at the next callback and kills the sink, dropping
+anything still buffered — TFTController.stop() calls it.
+
+If neither library is installed, engine().available is False and callers
+use the espeak command line as before.
+"""
+
+import time
+import wave
+import queue
+import ctypes
+import ctypes.util
+import threading
+import subprocess
+from concurrent.futures import Future
+
+
+SINK_IDLE_SECS = 2.0   # keep aplay open this long after playback for back-to-back clips
+DRAIN_SLACK    = 3.0   # drain() waits this long past the estimated end before killing aplay
+
+# speak_lib.h
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+POS_CHARACTER            = 1
+espeakRATE               = 1
+espeakPITCH              = 3
+espeakCHARS_UTF8         = 1
+espeakENDPAUSE           = 0x1000
+
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short),
+                                   ctypes.c_int, ctypes.c_void_p)
+
+
+def _bind(lib):
+    c = ctypes
+    lib.espeak_Initialize.argtypes     = [c.c_int, c.c_int, c.c_char_p, c.c_int]
+    lib.espeak_Initialize.restype      = c.c_int
+    lib.espeak_SetSynthCallback.argtypes = [_SYNTH_CALLBACK]
+    lib.espeak_SetSynthCallback.restype = None
+    lib.espeak_SetVoiceByName.argtypes = [c.c_char_p]
+    lib.espeak_SetVoiceByName.restype  = c.c_int
+    lib.espeak_SetParameter.argtypes   = [c.c_int, c.c_int, c.c_int]
+    lib.espeak_SetParameter.restype    = c.c_int
+    lib.espeak_Synth.argtypes          = [c.c_void_p, c.c_size_t, c.c_uint, c.c_int, c.c_uint,
+                                          c.c_uint, c.POINTER(c.c_uint), c.c_void_p]
+    lib.espeak_Synth.restype           = c.c_int
+    lib.espeak_Synchronize.argtypes    = []
+    lib.espeak_Synchronize.restype     = c.c_int
+    return lib
+
+
+def _load_library():
+    names = [ctypes.util.find_library(n) for n in ("espeak-ng", "espeak")]
+    for path in [n for n in names if n] + ["libespeak-ng.so.1", "libespeak.so.1"]:
+        try:
+            return _bind(ctypes.CDLL(path))
+        except (OSError, AttributeError):
+            pass
+    return None
+
+
+class Cancelled(Exception):
+    """Synthesis or playback was cancelled."""
+
+    def __init__(self, msg: str = "speech cancelled by a stop"):
+        super().__init__(msg)
+
+
+# =============================
+# Audio sink
+# =============================
+
+class PCMSink:
+    """
+    A long-lived `aplay` reading raw mono S16_LE from stdin.
+
+    Reopened when the sample rate changes, after cancel(), or after it was
+    closed for being idle. Playback end is estimated from the bytes written,
+    since the pipe and ALSA buffers hide when audio actually leaves.
+    """
+
+    def __init__(self, device: str = "default"):
+        self.device = device
+        self._proc  = None
+        self._rate  = 0
+        self._end   = 0.0    # monotonic time the written audio finishes playing
+        self._lk    = threading.Lock()
+        self._idle  = None
+
+    def _open(self, rate: int):
+        if self._proc is not None and self._proc.poll() is None and self._rate == rate:
+            return self._proc
+        self._close_locked()
+        try:
+            self._proc = subprocess.Popen(
+                ['aplay', '-D', self.device, '-q', '-t', 'raw', '-f', 'S16_LE',
+                 '-r', str(rate), '-c', '1', '-'],
+                stdin=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("aplay not found — run: sudo apt install alsa-utils")
+        self._rate, self._end = rate, time.monotonic()
+        return self._proc
+
+    def write(self, pcm: bytes, rate: int) -> None:
+        with self._lk:
+            if self._idle:
+                self._idle.cancel()
+                self._idle = None
+            proc = self._open(rate)
+            self._end = max(self._end, time.monotonic()) + len(pcm) / (2 * rate)
+        try:
+            proc.stdin.write(pcm)
+            proc.stdin.flush()
+        except (BrokenPipeError, ValueError, OSError):
+            raise Cancelled()
+
+    def wait(self, cancelled) -> bool:
+        """Block until written audio has played; False if cancelled() turns true first."""
+        while True:
+            left = self._end - time.monotonic()
+            if cancelled():
+                return False
+            if left <= 0:
+                break
+            time.sleep(min(left, 0.05))
+        with self._lk:
+            if self._idle is None and self._proc is not None:
+                self._idle = threading.Timer(SINK_IDLE_SECS, self.close)
+                self._idle.daemon = True
+                self._idle.start()
+        return True
+
+    def _close_locked(self) -> None:
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=2)
+            except Exception:
+                self._proc.kill()
+            self._proc = None
+
+    def close(self) -> None:
+        """Let aplay finish what it has and exit."""
+        with self._lk:
+            self._idle = None
+            self._close_locked()
+
+    def drain(self, cancelled) -> bool:
+        """
+        Close aplay's stdin and wait for it to play out and exit.
+
+        Unlike wait(), this returns only once the audio has actually left
+        ALSA. False if cancelled() turns true, aplay was reset, or it did not
+        exit within DRAIN_SLACK of the estimated end (it is killed then).
+        """
+        with self._lk:
+            if self._idle:
+                self._idle.cancel()
+                self._idle = None
+            proc, self._proc = self._proc, None
+            deadline = max(self._end, time.monotonic()) + DRAIN_SLACK
+            self._end = 0.0
+        if proc is None:
+            return not cancelled()
+        try:
+            proc.stdin.close()
+        except (BrokenPipeError, ValueError, OSError):
+            pass
+        while proc.poll() is None:
+            if cancelled() or time.monotonic() > deadline:
+                proc.kill()
+                proc.wait()
+                return False
+            time.sleep(0.05)
+        return proc.returncode == 0 and not cancelled()
+
+    def reset(self) -> None:
+        """Kill aplay immediately, dropping buffered audio."""
+        proc, self._proc = self._proc, None
+        self._end = 0.0
+        if proc is not None:
+            proc.kill()
+
+
+# =============================
+# Engine
+# =============================
+
+class SpeechEngine:
+    """libespeak worker thread plus a shared PCM sink."""
+
+    def __init__(self, lib=None, device: str = "default"):
+        self.sink      = PCMSink(device)
+        self.rate      = 0
+        self._lib      = lib if lib is not None else _load_library()
+        self._jobs     = queue.Queue()
+        self._gen      = 0       # bumped by cancel(); jobs from older generations abort
+        self._voice    = None
+        self._on_pcm   = None
+        self._cb_error = None
+        self._job_gen  = 0
+        self._play_lk  = threading.Lock()
+        self._callback = _SYNTH_CALLBACK(self._synth_callback)   # keep a reference
+        self.available = False
+        if self._lib is not None:
+            ready = Future()
+            threading.Thread(target=self._worker, args=(ready,), daemon=True, name="speech").start()
+            self.available = ready.result()
+
+    # ── worker thread ──
+
+    def _worker(self, ready: Future) -> None:
+        try:
+            self.rate = self._lib.espeak_Initialize(AUDIO_OUTPUT_SYNCHRONOUS, 200, None, 0)
+            if self.rate <= 0:
+                raise OSError("espeak_Initialize failed")
+            self._lib.espeak_SetSynthCallback(self._callback)
+        except Exception:
+            ready.set_result(False)
+            return
+        ready.set_result(True)
+        while True:
+            fn, args, fut = self._jobs.get()
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(fn(*args))
+                except BaseException as ex:
+                    fut.set_exception(ex)
+
+    def _synth_callback(self, wav, numsamples, events) -> int:
+        if self._job_gen != self._gen:
+            return 1   # abort
+        if numsamples > 0 and wav:
+            try:
+                self._on_pcm(ctypes.string_at(wav, numsamples * 2))
+            except Exception as ex:
+                self._cb_error = ex
+                return 1
+        return 0
+
+    def _synth(self, gen: int, text: str, speed: int, pitch: int, voice: str, on_pcm) -> bool:
+        if gen != self._gen:
+            return False
+        voice = voice or "en"
+        if voice != self._voice:
+            if self._lib.espeak_SetVoiceByName(voice.encode()) != 0:
+                raise RuntimeError(f"espeak voice not found: {voice!r}")
+            self._voice = voice
+        self._lib.espeak_SetParameter(espeakRATE, int(speed), 0)
+        self._lib.espeak_SetParameter(espeakPITCH, int(pitch), 0)
+        data = text.encode("utf-8")
+        self._job_gen, self._on_pcm, self._cb_error = gen, on_pcm, None
+        try:
+            if self._lib.espeak_Synth(data, len(data) + 1, 0, POS_CHARACTER, 0,
+                                      espeakCHARS_UTF8 | espeakENDPAUSE, None, None) != 0:
+                raise RuntimeError("espeak_Synth failed")
+            self._lib.espeak_Synchronize()
+        finally:
+            self._on_pcm = None
+        err = self._cb_error
+        if err is not None and not isinstance(err, Cancelled):
+            raise err
+        return gen == self._gen and err is None
+
+    def _call(self, fn, *args):
+        fut = Future()
+        self._jobs.put((fn, args, fut))
+        return fut.result()
+
+    # ── public API ──
+
+    def stream(self, text: str, speed: int, pitch: int, voice: str, on_pcm) -> bool:
+        """Synthesise text, calling on_pcm(bytes) with S16 mono chunks at self.rate. False if cancelled."""
+        if not self.available:
+            raise RuntimeError("libespeak not available")
+        return self._call(self._synth, self._gen, text, speed, pitch, voice, on_pcm)
+
+    def synthesize(self, text: str, speed: int, pitch: int, voice: str = "") -> bytes:
+        """Whole utterance as S16 mono PCM at self.rate."""
+        chunks = []
+        if not self.stream(text, speed, pitch, voice, chunks.append):
+            raise Cancelled()
+        return b"".join(chunks)
+
+    def write_wav(self, path, text: str, speed: int, pitch: int, voice: str = "") -> None:
+        pcm = self.synthesize(text, speed, pitch, voice)
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.rate)
+            w.writeframes(pcm)
+
+    def speak(self, text: str, speed: int, pitch: int, voice: str = "") -> bool:
+        """Speak text to the sink as it is synthesised. False if cancelled."""
+        gen = self._gen
+        with self._play_lk:
+            ok = self.stream(text, speed, pitch, voice, lambda pcm: self.sink.write(pcm, self.rate))
+            return ok and self.sink.wait(lambda: gen != self._gen)
+
+    def play_wav(self, path, chunk_ms: int = 100, drain: bool = False) -> bool:
+        """
+        Stream a mono S16 WAV file to the sink and wait for it to finish. False if cancelled.
+
+        With drain, aplay is closed and waited for instead of estimating the
+        end, for callers that must not act until the last sample has played.
+        """
+        gen = self._gen
+        with self._play_lk, wave.open(str(path), "rb") as w:
+            if w.getnchannels() != 1 or w.getsampwidth() != 2:
+                raise RuntimeError(f"{path}: expected mono 16-bit WAV")
+            rate   = w.getframerate()
+            frames = max(1, rate * chunk_ms // 1000)
+            try:
+                while gen == self._gen:
+                    pcm = w.readframes(frames)
+                    if not pcm:
+                        break
+                    self.sink.write(pcm, rate)
+            except Cancelled:
+                return False
+            if gen != self._gen:
+                return False
+            if drain:
+                return self.sink.drain(lambda: gen != self._gen)
+            return self.sink.wait(lambda: gen != self._gen)
+
+    def cancel(self) -> None:
+        """Abort any synthesis in progress and silence the sink."""
+        self._gen += 1
+        self.sink.reset()
+
+
+_engine    = None
+_engine_lk = threading.Lock()
+
+def engine() -> SpeechEngine:
+    """The process-wide speech engine, started on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lk:
+            if _engine is None:
+                _engine = SpeechEngine()
+    return _engine
+
+
+def cancel() -> None:
+    """Cancel speech in progress, if the engine has been started."""
+    if _engine is not None:
+        _engine.cancel()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of synthesised TTS announcements.
+
+Clips are content-addressed: the file name is the sha256 of
+(text, speed, pitch, voice), so the weekly RWT or a repeated DMO is only
+synthesised once. Entries are WAV files under <alerts_dir>/tts_cache; a hit
+refreshes the file's mtime and the oldest clips are evicted once the
+directory grows past its size budget.
+
+Synthesis runs before the TFT is put into record mode, so the record window
+only spans playback of a ready-made file. Clips are rendered by the
+persistent speech engine when libespeak is available, else by the espeak CLI.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+import speech
+
+
+class TTSCache:
+    """Size-bounded LRU cache of espeak WAV clips in one directory."""
+
+    def __init__(self, directory, max_bytes: int = 50 * 1024 * 1024):
+        self.dir       = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self._lk       = threading.Lock()
+        self._inflight = {}   # key → Event set when that clip's synthesis finishes
+        self._sizes    = {}   # key → bytes, for entries on disk
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for p in self.dir.glob("*.wav"):
+            try:
+                self._sizes[p.stem] = p.stat().st_size
+            except OSError:
+                pass
+
+    @staticmethod
+    def key(text: str, speed: int, pitch: int, voice: str = "") -> str:
+        raw = json.dumps([text, int(speed), int(pitch), voice or ""], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.dir / f"{key}.wav"
+
+    def lookup(self, key: str) -> Path | None:
+        """Path of a cached clip (refreshing its LRU position), or None."""
+        p = self.path(key)
+        try:
+            os.utime(p)
+        except OSError:
+            return None
+        return p
+
+    def get(self, text: str, speed: int, pitch: int, voice: str = "") -> Path:
+        """
+        Path to a WAV of text spoken with these settings, synthesising it on a miss.
+
+        Concurrent requests for the same clip wait for one synthesis.
+
+        Raises:
+            RuntimeError: if espeak is missing or fails.
+        """
+        key = self.key(text, speed, pitch, voice)
+        while True:
+            with self._lk:
+                p = self.lookup(key)
+                if p is not None:
+                    self.hits += 1
+                    if key not in self._sizes:   # written by another process
+                        self._sizes[key] = p.stat().st_size
+                    return p
+                done = self._inflight.get(key)
+                if done is None:
+                    done = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            done.wait()
+            # the other synthesis finished (or failed) — look again
+
+        try:
+            p = self._synthesize(key, text, speed, pitch, voice)
+        finally:
+            with self._lk:
+                self._inflight.pop(key, None)
+            done.set()
+        self._evict(keep=key)
+        return p
+
+    def _synthesize(self, key: str, text: str, speed: int, pitch: int, voice: str) -> Path:
+        fd, tmp = tempfile.mkstemp(prefix=".tts.", suffix=".wav", dir=self.dir)
+        os.close(fd)
+        try:
+            engine = speech.engine()
+            if engine.available:
+                engine.write_wav(tmp, text, speed, pitch, voice)
+            else:
+                self._espeak_cli(tmp, text, speed, pitch, voice)
+            p = self.path(key)
+            os.replace(tmp, p)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lk:
+            self._sizes[key] = p.stat().st_size
+        return p
+
+    @staticmethod
+    def _espeak_cli(out: str, text: str, speed: int, pitch: int, voice: str) -> None:
+        cmd = ['espeak', '-s', str(speed), '-p', str(pitch)]
+        if voice:
+            cmd += ['-v', voice]
+        try:
+            r = subprocess.run(cmd + ['-w', out, text], capture_output=True, timeout=120)
+        except FileNotFoundError:
+            raise RuntimeError("espeak not found — run: sudo apt install espeak")
+        if r.returncode != 0 or os.path.getsize(out) == 0:
+            err = r.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"espeak failed: {err or f'exit {r.returncode}'}")
+
+    def _evict(self, keep: str = "") -> None:
+        with self._lk:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            aged = []
+            for key in self._sizes:
+                try:
+                    aged.append((self.path(key).stat().st_mtime, key))
+                except OSError:
+                    aged.append((0, key))
+            for _, key in sorted(aged):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                try:
+                    self.path(key).unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                total -= self._sizes.pop(key)
+
+    def stats(self) -> dict:
+        with self._lk:
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "entries":   len(self._sizes),
+                "bytes":     sum(self._sizes.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_caches    = {}
+_caches_lk = threading.Lock()
+
+def get_cache(directory, max_bytes: int) -> TTSCache:
+    """The process-wide cache for a directory (hit/miss counts survive COM3 reconnects)."""
+    d = str(Path(directory).resolve())
+    with _caches_lk:
+        c = _caches.get(d)
+        if c is None:
+            c = _caches[d] = TTSCache(d, max_bytes)
+        c.max_bytes = max_bytes
+        return c
@@ -4,13 +4,18 @@ Shared EAS/SAME utilities.
 Used by TFT_Control.py and web.py — no side effects on import.
 """
 
+import json
+import threading
 from datetime import datetime, timezone
+from functools import lru_cache
+from importlib.util import find_spec
 
-try:
-    from EAS2Text import EAS2Text
-    EAS2TEXT_AVAILABLE = True
-except ImportError:
-    EAS2TEXT_AVAILABLE = False
+import eas_lookup
+import eas_render
+
+# EAS2Text fetches and parses its whole dataset when first imported, so only
+# check that it is installed here and import it when a decode needs it.
+EAS2TEXT_AVAILABLE = find_spec("EAS2Text") is not None
 
 
 # Maps TFT duration codes to SAME header HHMM strings
@@ -46,18 +51,27 @@ def build_same_header(event: str, fips_list: list, duration_code: str,
     return f"ZCZC-{org}-{event}-{fips_part}+{dur}-{timestamp}-{callsign_p}-"
 
 
+@lru_cache(maxsize=1)
 def fips_table() -> dict:
     """
-    Return the complete FIPS→name dict from EAS2Text's internal data.
+    Return the complete FIPS→name dict.
     Keys are 5-digit strings (e.g. '36109'), values are 'County, ST'.
-    Returns empty dict if EAS2Text is unavailable.
+    Read from the eas_lookup.bin artifact when present, else from EAS2Text's
+    internal data. Loaded once per process and shared — treat as read-only.
+    Returns empty dict if neither is available.
     """
+    lk = eas_lookup.open_default()
+    if lk is not None:
+        return dict(lk.items("SAME"))
     if not EAS2TEXT_AVAILABLE:
         return {}
     try:
-        import json
         from EAS2Text import EAS2Text as _EAS2Text
-        return json.loads(_EAS2Text.__data__).get("SAME", {})
+        # Newer releases parse the dataset at class creation; older ones ship it as a JSON string
+        data = getattr(_EAS2Text, "same_us", None)
+        if data is None:
+            data = json.loads(_EAS2Text.__data__)
+        return data.get("SAME", {})
     except Exception:
         return {}
 
@@ -74,24 +88,108 @@ def parse_location_keys(locations: str) -> list[str]:
     return [c for c in locations if c.isdigit() and c != '0']
 
 
-def search_fips(query: str, limit: int = 10) -> list:
+class FipsIndex:
+    """
+    In-memory search index over the FIPS table for the county picker.
+
+    Names are lowercased once at build time. Queries of 3+ characters are
+    answered from trigram postings (intersected, then verified as substrings).
+    Shorter queries try the word-prefix postings first; those hold every
+    name- and word-prefix match, which rank first, so when they fill `limit`
+    they are the answer. Otherwise every name is scanned for the substring,
+    as before the index. Results are ranked: name prefix, then word prefix,
+    then any substring — alphabetical within each.
+    """
+
+    PREFIX_LEN = 2   # word-prefix postings cover queries shorter than a trigram
+
+    def __init__(self, table: dict):
+        items = sorted(table.items(), key=lambda kv: kv[1].lower())
+        self.fips   = [f"0{k}" for k, _ in items]
+        self.names  = [v for _, v in items]
+        self.lnames = [v.lower() for v in self.names]
+        # 'Tompkins County, NY' → 'ny'; statewide entries have no code
+        self.states = [n.rsplit(", ", 1)[1] if ", " in n else "" for n in self.lnames]
+        self._prefix:  dict = {}
+        self._trigram: dict = {}
+        for i, name in enumerate(self.lnames):
+            for word in name.replace(",", " ").split():
+                for n in range(1, min(len(word), self.PREFIX_LEN) + 1):
+                    self._add(self._prefix, word[:n], i)
+            for g in {name[j:j + 3] for j in range(len(name) - 2)}:
+                self._add(self._trigram, g, i)
+
+    @staticmethod
+    def _add(postings: dict, key: str, i: int) -> None:
+        ids = postings.setdefault(key, [])
+        if not ids or ids[-1] != i:
+            ids.append(i)
+
+    def _candidates(self, q: str, state: str | None, limit: int):
+        if len(q) < 3:
+            ids = self._prefix.get(q, [])
+            if "," not in q and sum(1 for i in ids if not state or self.states[i] == state) >= limit:
+                return ids
+            return [i for i, name in enumerate(self.lnames) if q in name]
+        grams = sorted((self._trigram.get(q[j:j + 3], []) for j in range(len(q) - 2)), key=len)
+        if not grams[0]:
+            return []
+        ids = set(grams[0])
+        for g in grams[1:]:
+            ids.intersection_update(g)
+            if not ids:
+                break
+        return [i for i in ids if q in self.lnames[i]]
+
+    def search(self, query: str, limit: int = 10, state: str | None = None) -> list:
+        q = " ".join(query.lower().split())
+        # 'cook, il' → name 'cook' within state IL
+        if state is None and ", " in q:
+            head, tail = q.rsplit(", ", 1)
+            if len(tail) == 2 and tail.isalpha():
+                q, state = head, tail
+        state = state.lower() if state else None
+        if not q:
+            return []
+        ranked = []
+        for i in self._candidates(q, state, limit):
+            if state and self.states[i] != state:
+                continue
+            name = self.lnames[i]
+            rank = 0 if name.startswith(q) else 1 if f" {q}" in name else 2
+            ranked.append((rank, i))
+        ranked.sort()
+        return [(self.fips[i], self.names[i]) for _, i in ranked[:limit]]
+
+
+_index    = None
+_index_lk = threading.Lock()
+
+def fips_index() -> FipsIndex:
+    """The process-wide FIPS search index, built on first use."""
+    global _index
+    if _index is None:
+        with _index_lk:
+            if _index is None:
+                _index = FipsIndex(fips_table())
+    return _index
+
+
+def search_fips(query: str, limit: int = 10, state: str | None = None) -> list:
     """
     Search the EAS2Text FIPS table by partial county or state name.
 
     Args:
         query: Partial name to search for, e.g. 'tompkins' or 'cook, il'
         limit: Maximum number of results to return.
+        state: Optional 2-letter state code to restrict results, e.g. 'NY'.
 
     Returns:
-        List of (fips_6digit, name) tuples, e.g. [('036109', 'Tompkins, NY'), ...]
+        List of (fips_6digit, name) tuples, e.g. [('036109', 'Tompkins County, NY'), ...]
         The 6-digit FIPS has a leading '0' (whole-county prefix) prepended.
+        Name-prefix matches come first, then word-prefix, then substring.
     """
-    q = query.lower().strip()
-    return [
-        (f"0{k}", v)
-        for k, v in fips_table().items()
-        if q in v.lower()
-    ][:limit]
+    return fips_index().search(query, limit, state)
 
 
 def decode_header(same_string: str, tz_offset: int | None = None) -> str:
@@ -104,10 +202,14 @@ def decode_header(same_string: str, tz_offset: int | None = None) -> str:
 
     Returns:
         Human-readable alert text as the TFT unit would display/speak it.
+        Rendered natively (eas_render) where possible, else by EAS2Text.
 
     Raises:
-        RuntimeError: if EAS2Text is not installed.
+        RuntimeError: if EAS2Text is needed but not installed.
     """
+    text = eas_render.render_tft(same_string, tz_offset)
+    if text is not None:
+        return text
     if not EAS2TEXT_AVAILABLE:
         raise RuntimeError("EAS2Text not installed — run: pip install EAS2Text-Remastered")
     from EAS2Text import EAS2Text as _EAS2Text
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Virtual TFT COM3 (J303) device on a pseudo-terminal.
+
+Emulates the TFT EAS 911 PC/DTMF interface closely enough to run
+TFTController against it without hardware: a pty stands in for the USB
+adapter (optionally behind a symlink such as /tmp/tft911-cmd), bytes are
+clocked in at the line's baud rate, and each complete `*...#` sequence drives
+a small state machine:
+
+  *PIN09#  record voice      *PIN11#  play voice       *PIN20#  live patch
+  *PIN21#  record announce   *PIN22#  play announce    #        stop
+  *PIN30#  RWT (no tone)     *PIN31#  RWT              *PIN43#  EOM
+  *PIN40#  originate, no audio / *PIN41# pre-recorded → *EV# → *KEYS# → *DD#
+  *PIN91#  reboot
+
+After accepting a command the device is busy for that command type's
+processing time (TIMINGS); any byte arriving while it is busy is lost, and so
+is the sequence it belongs to — which is how a real unit behaves when DTMF
+commands are sent too close together. Every sequence is logged with its
+arrival time and outcome.
+
+Usage:
+  python3 virtual_com3.py [--link PATH] [--pin PIN] [--log FILE] [--timing KIND=SECS ...]
+  python3 virtual_com3.py calibrate [--timing KIND=SECS ...]
+
+  serve      (default) run the device until Ctrl-C, printing each command
+  calibrate  run TFT_Control.calibrate_pacing() against an in-process device
+             and print the [pacing] values. They describe the emulator, not a
+             real unit, so they are never written to config.ini
+"""
+
+import os
+import sys
+import tty
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
+from typing import NamedTuple
+
+
+# Seconds the device needs after accepting each command type before it can
+# take the next byte. Emulation defaults — override with --timing.
+TIMINGS = {
+    "command": 0.10,   # *PINnn# operations
+    "step":    0.10,   # originate event / location / duration entries
+    "stop":    0.05,   # '#'
+    "reboot":  5.00,
+}
+
+# Operation code → (action, state entered)
+OPS = {
+    "09": ("record_voice",        "recording_voice"),
+    "11": ("play_voice",          "playing_voice"),
+    "20": ("live_patch",          "live_patch"),
+    "21": ("record_announcement", "recording_announcement"),
+    "22": ("play_announcement",   "playing_announcement"),
+    "30": ("rwt_no_tone",         "idle"),
+    "31": ("rwt",                 "idle"),
+    "40": ("originate_no_audio",  "originate_event"),
+    "41": ("originate_recorded",  "originate_event"),
+    "43": ("eom",                 "idle"),
+    "91": ("reboot",              "idle"),
+}
+
+_ORIGINATE_STEPS = ("originate_event", "originate_locations", "originate_duration")
+
+
+class Entry(NamedTuple):
+    """One received sequence."""
+    at:       float   # monotonic arrival time of the terminating '#'
+    wall:     float   # time.time() of the same moment
+    raw:      str
+    accepted: bool
+    action:   str     # what the device did, or why it ignored the sequence
+    state:    str     # device state afterwards
+
+    @property
+    def outcome(self) -> str:
+        if self.accepted:
+            return "ok"
+        return "LOST" if self.action.startswith("lost") else "REJ"
+
+
+# =============================
+# Device
+# =============================
+
+class VirtualCOM3:
+    """
+    A TFT COM3 interface served on a pty.
+
+    Usage:
+        with VirtualCOM3(link="/tmp/tft911-cmd") as dev:
+            tft = TFTController({... 'com3_port': dev.port ...})
+            ...
+            assert dev.verify()
+    """
+
+    def __init__(self, link: str = None, pin: str = "915", baud: int = 9600,
+                 timings: dict = None, log_path: str = None, echo=None):
+        self.link     = link
+        self.pin      = pin
+        self.baud     = baud
+        self.timings  = {**TIMINGS, **(timings or {})}
+        self.log_path = log_path
+        self.echo     = echo      # called with each Entry as it is logged
+        self.entries  = []
+        self.state    = "idle"
+        self.alert    = None      # {"event", "locations", "duration", "audio"} of the last origination
+        self._lk      = threading.Lock()
+        self._master  = self._slave = None
+        self._thread  = None
+        self._log     = None
+        self._checked = 0         # entries already covered by verify()
+        self._char_s  = 10 / baud # 8N1
+        self._rx_at   = 0.0       # arrival time of the previous byte at line speed
+        self._busy    = 0.0       # monotonic time the device is free again
+        self._buf     = ""
+        self._lost    = False     # current sequence lost a byte while busy
+        self._pending = {}        # originate entries collected so far
+
+    @property
+    def port(self) -> str:
+        """Path for serial.Serial(): the symlink if one was requested, else the pty."""
+        return self.link or os.ttyname(self._slave)
+
+    def start(self) -> "VirtualCOM3":
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)   # no echo or line editing — bytes pass as sent
+        if self.link:
+            try:
+                os.unlink(self.link)
+            except FileNotFoundError:
+                pass
+            os.symlink(os.ttyname(self._slave), self.link)
+        if self.log_path:
+            self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        self._thread = threading.Thread(target=self._reader, daemon=True, name="virtual-com3")
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    # ── inspection ──
+
+    def verify(self, quiet: float = 0.02) -> bool:
+        """
+        True if every sequence since the previous verify() was accepted.
+
+        Waits until no byte has arrived for `quiet` seconds first, so a
+        command still on the wire is included.
+        """
+        while time.monotonic() - self._rx_at < quiet:
+            time.sleep(quiet)
+        with self._lk:
+            new = self.entries[self._checked:]
+            self._checked = len(self.entries)
+        return all(e.accepted for e in new)
+
+    def stats(self) -> dict:
+        with self._lk:
+            accepted = sum(1 for e in self.entries if e.accepted)
+            return {"sequences": len(self.entries), "accepted": accepted,
+                    "lost": len(self.entries) - accepted, "state": self.state}   # lost includes rejected
+
+    # ── receive path ──
+
+    def _reader(self) -> None:
+        while True:
+            try:
+                data = os.read(self._master, 256)
+            except OSError:
+                return   # closed
+            if not data:
+                return
+            now = time.monotonic()
+            for b in data:
+                self._byte(chr(b), now)
+
+    def _byte(self, ch: str, now: float) -> None:
+        # Bytes written in one burst still arrive one character time apart.
+        at = self._rx_at = max(now, self._rx_at + self._char_s)
+        if at < self._busy:
+            self._lost = True
+        if ch == "#":
+            raw, lost = self._buf + ch, self._lost
+            self._buf, self._lost = "", False
+            if lost:
+                self._record(at, raw, False, "lost: arrived while busy")
+            else:
+                self._sequence(at, raw)
+        elif ch in "\r\n":
+            pass
+        else:
+            self._buf += ch
+
+    def _sequence(self, at: float, raw: str) -> None:
+        if raw == "#":
+            self._accept(at, raw, "stop", "stop", "idle")
+            self._pending = {}
+            return
+        body = raw[1:-1]
+        if not raw.startswith("*") or not body.isdigit():
+            self._record(at, raw, False, "rejected: malformed")
+            return
+
+        if self.state in _ORIGINATE_STEPS:
+            self._originate_step(at, raw, body)
+            return
+
+        if not body.startswith(self.pin):
+            self._record(at, raw, False, "rejected: bad PIN")
+            return
+        op = OPS.get(body[len(self.pin):])
+        if op is None:
+            self._record(at, raw, False, f"rejected: unknown operation {body[len(self.pin):]!r}")
+            return
+        action, state = op
+        if state == "originate_event":
+            self._pending = {"audio": "p" if action == "originate_recorded" else "n"}
+        kind = "reboot" if action == "reboot" else "command"
+        self._accept(at, raw, action, kind, state)
+
+    def _originate_step(self, at: float, raw: str, body: str) -> None:
+        step = self.state
+        if step == "originate_event" and 1 <= int(body) <= 50:
+            self._pending["event"] = body
+            self._accept(at, raw, f"event {body}", "step", "originate_locations")
+        elif step == "originate_locations" and "0" not in body:
+            self._pending["locations"] = body
+            self._accept(at, raw, f"locations {body}", "step", "originate_duration")
+        elif step == "originate_duration" and len(body) == 2:
+            self._pending["duration"] = body
+            self.alert, self._pending = self._pending, {}
+            self._accept(at, raw, "originated " + " ".join(f"{k}={v}" for k, v in self.alert.items()),
+                         "step", "idle")
+        else:
+            self._pending = {}
+            self.state = "idle"
+            self._record(at, raw, False, f"rejected: bad {step.removeprefix('originate_')} — origination aborted")
+
+    def _accept(self, at: float, raw: str, action: str, kind: str, state: str) -> None:
+        self.state = state
+        self._busy = at + self.timings[kind]
+        self._record(at, raw, True, action)
+
+    def _record(self, at: float, raw: str, accepted: bool, action: str) -> None:
+        e = Entry(at, time.time() - (time.monotonic() - at), raw, accepted, action, self.state)
+        with self._lk:
+            self.entries.append(e)
+        if self._log:
+            stamp = datetime.fromtimestamp(e.wall).strftime("%Y-%m-%d %H:%M:%S.%f")
+            self._log.write(f"{stamp}\t{raw}\t{e.outcome}\t{action}\t{e.state}\n")
+        if self.echo:
+            self.echo(e)
+
+
+# =============================
+# CLI
+# =============================
+
+def _timings(pairs: list) -> dict:
+    out = {}
+    for p in pairs or []:
+        kind, _, secs = p.partition("=")
+        if kind not in TIMINGS or not secs:
+            raise SystemExit(f"--timing expects KIND=SECS with KIND in {', '.join(TIMINGS)}")
+        out[kind] = float(secs)
+    return out
+
+
+def _print_entry(e: Entry) -> None:
+    stamp = datetime.fromtimestamp(e.wall).strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{stamp}] {e.raw:<12} {e.outcome:<4}  {e.action}  → {e.state}")
+
+
+def serve(args) -> int:
+    dev = VirtualCOM3(args.link, args.pin, args.baud, _timings(args.timing), args.log, echo=_print_entry)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)   # remove the symlink on kill too
+    with dev:
+        print(f"Virtual COM3 on {dev.port}"
+              + (f" → {os.ttyname(dev._slave)}" if args.link else "")
+              + f"  (PIN {args.pin}, {args.baud} baud) — Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    s = dev.stats()
+    print(f"\n{s['sequences']} sequences, {s['accepted']} accepted, {s['lost']} lost or rejected")
+    return 0
+
+
+def calibrate(args) -> int:
+    from TFT_Control import TFTController, load_config, calibrate_pacing
+
+    cfg = load_config()
+    cfg['pacing'] = dict(cfg['pacing'])
+    with VirtualCOM3(pin=cfg['com3_pin'], baud=cfg['com3_baud'], timings=_timings(args.timing)) as dev:
+        cfg['com3_port'] = dev.port
+        tft = TFTController(cfg)
+        tft.connect()
+        try:
+            print(f"Calibrating against the virtual COM3 ({', '.join(f'{k} {v:.3f} s' for k, v in dev.timings.items())})")
+            settle = calibrate_pacing(tft, dev.verify)
+        finally:
+            tft.disconnect()
+    print("\n[pacing]   ; emulator timings — not saved")
+    for kind, secs in settle.items():
+        print(f"{kind} = {secs:.3f}")
+    return 0
+
+
+def main(argv: list) -> int:
+    ap = argparse.ArgumentParser(description="Virtual TFT COM3 (PC/DTMF) device on a pty")
+    ap.add_argument("mode", nargs="?", default="serve", choices=("serve", "calibrate"))
+    ap.add_argument("--link",   help="symlink to create for the pty, e.g. /tmp/tft911-cmd")
+    ap.add_argument("--pin",    default="915")
+    ap.add_argument("--baud",   type=int, default=9600)
+    ap.add_argument("--log",    help="append a timestamped command log to this file")
+    ap.add_argument("--timing", action="append", metavar="KIND=SECS",
+                    help=f"processing time per command type ({', '.join(TIMINGS)})")
+    args = ap.parse_args(argv)
+    return calibrate(args) if args.mode == "calibrate" else serve(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,10 +2,25 @@
 """
 Virtual TFT Generator - Simulate EAS alerts and feed to logger
 Generates SAME headers and processes them like the main logger would
+
+Pty mode serves the J103 serial output on a pseudo-terminal instead, at real
+baud timing with 0xAB preambles, so the logger's serial read path is
+exercised. Runs are seeded, and the byte stream is a pure function of the
+options, so a run can serve as a performance regression scenario:
+
+  python3 virtual_tft.py pty --link /tmp/tft911-data --profile poisson --rate 20 --count 50
+  python3 TFT_logger.py --serial /tmp/tft911-data
+  python3 virtual_tft.py pty --dry-run ...   # timeline + stream digest, no pty
 """
 
+import os
 import sys
-from datetime import datetime, timezone
+import tty
+import time
+import random
+import hashlib
+import argparse
+from datetime import datetime, timezone, timedelta
 
 
 # ============================================================================
@@ -49,9 +64,10 @@ class SAMEHeaderGenerator:
         event="TOR",
         locations=None,
         duration_minutes=60,
-        sender="KITH_EAS"
+        sender="KITH_EAS",
+        when=None
     ) -> str:
-        """Generate a SAME header."""
+        """Generate a SAME header (issued now, or at `when`)."""
         if not locations:
             locations = ["006037"]  # Los Angeles County, CA
         
@@ -64,7 +80,7 @@ class SAMEHeaderGenerator:
         tttt = f"{hours:02d}{minutes:02d}"
         
         # Build timestamp JJJHHMM — EAS SAME spec requires UTC (FCC § 11.31)
-        now = datetime.now(timezone.utc)
+        now = when or datetime.now(timezone.utc)
         jjj = now.strftime("%j")  # Day of year (UTC)
         hhmm = now.strftime("%H%M")  # Hour and minute (UTC)
         
@@ -96,6 +112,210 @@ def output_burst_for_serial(header, repetitions=3):
     print(burst)
 
 
+# ============================================================================
+# Pty Serial Emulator
+# ============================================================================
+
+FILLER   = 0xAB
+PREAMBLE = 16             # filler bytes the TFT sends ahead of each burst
+SENDERS  = ["KITH_EAS", "NWS_OFC", "EAS_TEST", "WXL58   "]
+DURATIONS = [15, 30, 60, 90, 120]
+# Header times in a seeded run are offsets from this (use --now for real time)
+EPOCH    = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def arrivals(rng, profile, rate, storm_size=5):
+    """
+    Seconds between burst starts for an arrival process; `rate` is bursts/minute.
+
+    steady   fixed interval
+    poisson  exponential gaps
+    storm    clusters of storm_size bursts 1 s apart, clusters Poisson-spaced
+             so the long-run rate is still `rate`
+    """
+    mean = 60.0 / rate
+    if profile == "steady":
+        while True:
+            yield mean
+    elif profile == "poisson":
+        while True:
+            yield rng.expovariate(1 / mean)
+    elif profile == "storm":
+        while True:
+            yield rng.expovariate(1 / (mean * storm_size))
+            for _ in range(storm_size - 1):
+                yield 1.0
+    else:
+        raise ValueError(f"unknown profile {profile!r}")
+
+
+def _flip_bits(rng, data: bytes, ber: float) -> tuple[bytes, int]:
+    out, flips = bytearray(data), 0
+    for i in range(len(out)):
+        for bit in range(8):
+            if rng.random() < ber:
+                out[i] ^= 1 << bit
+                flips += 1
+    return bytes(out), flips
+
+
+def timeline(opts):
+    """
+    The run as (start seconds, kind, payload, note) events, in order.
+
+    kind is 'burst' (payload = bytes on the wire) or 'unplug' (payload = seconds
+    the port is gone). Start times already allow for each burst's wire time —
+    the line is serial, so a burst due mid-transmission waits.
+    """
+    rng     = random.Random(opts.seed)
+    gaps    = arrivals(rng, opts.profile, opts.rate, opts.storm_size)
+    char_s  = 10 / opts.baud
+    base    = datetime.now(timezone.utc) if opts.now else EPOCH
+    t = free = 0.0
+    for n in range(opts.count):
+        t = max(t + next(gaps), free)
+        header = SAMEHeaderGenerator.generate(
+            originator=rng.choice(list(SAMEHeaderGenerator.ORIGINATORS)),
+            event=rng.choice(list(SAMEHeaderGenerator.EVENTS)),
+            locations=rng.sample(list(SAMEHeaderGenerator.LOCATIONS), rng.randint(1, 3)),
+            duration_minutes=rng.choice(DURATIONS),
+            sender=rng.choice(SENDERS),
+            when=base + timedelta(seconds=t),
+        )
+        burst = SAMEHeaderGenerator.create_burst(header).encode("ascii")
+        notes = []
+        if opts.truncate and rng.random() < opts.truncate:
+            burst = burst[:rng.randint(5, len(burst) - 1)]
+            notes.append("truncated")
+        if opts.ber:
+            burst, flips = _flip_bits(rng, burst, opts.ber)
+            if flips:
+                notes.append(f"{flips} bit error{'s' if flips > 1 else ''}")
+        wire = bytes([FILLER]) * opts.preamble + burst
+        if opts.noise and rng.random() < opts.noise:
+            junk = bytes(rng.randrange(256) for _ in range(rng.randint(1, 20)))
+            wire = junk + wire
+            notes.append(f"{len(junk)} noise bytes")
+        yield t, "burst", wire, ", ".join(notes) or header
+        free = t + len(wire) * char_s
+        if opts.unplug_every and (n + 1) % opts.unplug_every == 0 and n + 1 < opts.count:
+            yield free, "unplug", opts.unplug_secs, f"unplugged {opts.unplug_secs:g} s"
+            free += opts.unplug_secs
+            t = max(t, free)
+
+
+class PtyPort:
+    """The J103 port as a pty, re-created after a simulated unplug."""
+
+    def __init__(self, link: str = None):
+        self.link   = link
+        self.master = self.slave = None
+        self.dropped = 0   # bytes written while nobody was reading and the pty buffer was full
+
+    @property
+    def path(self) -> str:
+        return self.link or os.ttyname(self.slave)
+
+    def plug(self) -> None:
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        if self.link:
+            if os.path.lexists(self.link):
+                os.unlink(self.link)
+            os.symlink(os.ttyname(self.slave), self.link)
+
+    def unplug(self) -> None:
+        if self.link and os.path.lexists(self.link):
+            os.unlink(self.link)
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+    def write(self, data: bytes) -> None:
+        try:
+            n = os.write(self.master, data)
+        except BlockingIOError:
+            n = 0
+        self.dropped += len(data) - n
+
+
+def serve_pty(argv: list) -> int:
+    ap = argparse.ArgumentParser(prog="virtual_tft.py pty",
+                                 description="Serve seeded SAME bursts on a pty at real baud timing")
+    ap.add_argument("--link",       help="symlink to the pty, e.g. /tmp/tft911-data (needed for --unplug-every)")
+    ap.add_argument("--seed",       type=int,   default=1)
+    ap.add_argument("--profile",    default="steady", choices=("steady", "poisson", "storm"))
+    ap.add_argument("--rate",       type=float, default=6.0, help="bursts per minute (default 6)")
+    ap.add_argument("--storm-size", type=int,   default=5)
+    ap.add_argument("--count",      type=int,   default=10, help="bursts to send")
+    ap.add_argument("--baud",       type=int,   default=1200)
+    ap.add_argument("--preamble",   type=int,   default=PREAMBLE, help="0xAB bytes before each burst")
+    ap.add_argument("--ber",        type=float, default=0.0, help="bit error rate per transmitted bit")
+    ap.add_argument("--noise",      type=float, default=0.0, help="chance of junk bytes before a burst")
+    ap.add_argument("--truncate",   type=float, default=0.0, help="chance a burst is cut short")
+    ap.add_argument("--unplug-every", type=int, default=0, help="unplug after every N bursts")
+    ap.add_argument("--unplug-secs",  type=float, default=3.0)
+    ap.add_argument("--now",        action="store_true", help="stamp headers with real time (changes the digest)")
+    ap.add_argument("--dry-run",    action="store_true", help="print the timeline and digest, open no pty")
+    opts = ap.parse_args(argv)
+    if opts.unplug_every and not opts.link and not opts.dry_run:
+        ap.error("--unplug-every needs --link so the logger can find the re-created port")
+
+    events = list(timeline(opts))
+    digest = hashlib.sha256()
+    for at, kind, payload, _ in events:
+        digest.update(f"{at:.6f}:{kind}:".encode())
+        digest.update(payload if kind == "burst" else str(payload).encode())
+    bursts = [e for e in events if e[1] == "burst"]
+    span   = events[-1][0] if events else 0.0
+
+    def show(at, kind, note):
+        print(f"  {at:9.3f}s  {kind:<6} {note}", flush=True)
+
+    if opts.dry_run:
+        for at, kind, _, note in events:
+            show(at, kind, note)
+    else:
+        port = PtyPort(opts.link)
+        port.plug()
+        print(f"Virtual J103 on {port.path}" + (f" → {os.ttyname(port.slave)}" if opts.link else "")
+              + f"  ({opts.baud} baud, {opts.profile}, seed {opts.seed}) — Ctrl-C to stop", flush=True)
+        chunk  = max(1, opts.baud // 10 // 20)   # ~50 ms of characters per write
+        char_s = 10 / opts.baud
+        start  = time.monotonic()
+        try:
+            for at, kind, payload, note in events:
+                delay = start + at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                show(at, kind, note)
+                if kind == "unplug":
+                    port.unplug()
+                    time.sleep(payload)
+                    port.plug()
+                    continue
+                for i in range(0, len(payload), chunk):
+                    # Pace against the clock so per-write overhead can't drift the baud rate
+                    delay = start + at + i * char_s - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    port.write(payload[i:i + chunk])
+            time.sleep(1.0)   # let the reader drain the last burst
+        except KeyboardInterrupt:
+            pass
+        finally:
+            port.unplug()
+        if port.dropped:
+            print(f"  {port.dropped} bytes dropped — nothing was reading the port")
+
+    faulty = sum(1 for e in bursts if not e[3].startswith("ZCZC"))
+    print(f"{len(bursts)} bursts ({faulty} with injected faults), "
+          f"{len(events) - len(bursts)} unplugs over {span:.1f}s | digest {digest.hexdigest()[:16]}")
+    return 0
+
+
 # ============================================================================
 # Test Scenarios
 # ============================================================================
@@ -242,6 +462,8 @@ if __name__ == "__main__":
             test_scenario_5_emergency()
         elif sys.argv[1] == "interactive":
             test_interactive_generator()
+        elif sys.argv[1] == "pty":
+            sys.exit(serve_pty(sys.argv[2:]))
         elif sys.argv[1] == "custom":
             # Custom: python3 virtual_tft.py custom TOR EAS 001001 60 TEST_STN
             event = sys.argv[2] if len(sys.argv) > 2 else "TOR"
@@ -251,7 +473,7 @@ if __name__ == "__main__":
             sender = sys.argv[6] if len(sys.argv) > 6 else "TEST_STN"
             test_custom(event, originator, location, duration, sender)
         else:
-            print(f"Usage: {sys.argv[0]} [1|2|3|4|5|all|interactive|custom]")
+            print(f"Usage: {sys.argv[0]} [1|2|3|4|5|all|interactive|custom|pty]")
     else:
         # No argument — behave like a serial port and emit all scenarios
         test_scenario_1_generic_eas_tornado()
@@ -5,23 +5,34 @@ Complete browser interface: live alert feed · TFT remote control ·
 PTT audio streaming · real-time log tail · config editor.
 """
 
-import json, os, struct, threading, subprocess, configparser
+import hmac, os, struct, threading, subprocess, time, uuid
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
 
-from flask import Flask, render_template_string, jsonify, request
-from flask_socketio import SocketIO
+from flask import Flask, Response, render_template_string, jsonify, request, g
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, join_room, leave_room
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from markupsafe import Markup
-from TFT_Control import TFTController, load_location_keys
-from utills import build_same_header, decode_header, search_fips, parse_location_keys
+from TFT_Control import TFTController, load_config as load_control_config, load_location_keys, \
+    setup_logging as setup_control_logging
+from utills import build_same_header, decode_header, search_fips
+from alert_record import AlertRecord
+import alert_trace
+import audio_transport
+import config_store
+import control_worker
+import jsoncodec
+import memwatch
+import metrics
+import profiler
+import speech
 
 
 # ── config ─────────────────────────────────────────────────────────────────
 
-CONFIG_PATH = Path(__file__).parent / "config.ini"
-
 def _load_web_config() -> dict:
     cfg = {
         'alerts_dir':  str(Path(__file__).parent / "alerts"),
@@ -29,15 +40,30 @@ def _load_web_config() -> dict:
         'web_port':    5000,
         'web_host':    '0.0.0.0',
         'serial_port': '/dev/ttyUSB0',
+        'audio_transport': 'auto',
+        'debug_profiling': False,
+        'debug_token':     '',
+        'memory_budget_mb':      0.0,
+        'memory_interval':       60.0,
+        'memory_tracemalloc':    False,
+        'memory_snapshot_every': 3600.0,
+        'memory_top':            10,
     }
-    if CONFIG_PATH.exists():
-        c = configparser.ConfigParser()
-        c.read(CONFIG_PATH)
+    if config_store.exists():
+        c = config_store.parser()
         cfg['alerts_dir']  = c.get('alerts',  'alerts_dir', fallback=cfg['alerts_dir'])
         cfg['log_dir']     = c.get('logging', 'log_dir',    fallback=cfg['log_dir'])
         cfg['web_port']    = c.getint('web',  'port',       fallback=cfg['web_port'])
         cfg['web_host']    = c.get('web',     'host',       fallback=cfg['web_host'])
         cfg['serial_port'] = c.get('serial',  'port',       fallback=cfg['serial_port'])
+        cfg['audio_transport'] = c.get('audio', 'transport', fallback=cfg['audio_transport'])
+        cfg['debug_profiling'] = c.getboolean('debug', 'profiling', fallback=cfg['debug_profiling'])
+        cfg['debug_token']     = c.get('debug', 'token', fallback=cfg['debug_token']).strip()
+        cfg['memory_budget_mb']      = c.getfloat('memory', 'web_budget_mb',  fallback=cfg['memory_budget_mb'])
+        cfg['memory_interval']       = c.getfloat('memory', 'interval',       fallback=cfg['memory_interval'])
+        cfg['memory_tracemalloc']    = c.getboolean('memory', 'tracemalloc',  fallback=cfg['memory_tracemalloc'])
+        cfg['memory_snapshot_every'] = c.getfloat('memory', 'snapshot_every', fallback=cfg['memory_snapshot_every'])
+        cfg['memory_top']            = c.getint('memory', 'top',              fallback=cfg['memory_top'])
     def resolve(p):
         p = os.path.expanduser(p)
         return p if os.path.isabs(p) else str(Path(__file__).parent / p)
@@ -47,70 +73,191 @@ def _load_web_config() -> dict:
 
 CONFIG   = _load_web_config()
 JSONL    = os.path.join(CONFIG['alerts_dir'], "events.jsonl")
-app      = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+TRACE    = os.path.join(CONFIG['alerts_dir'], alert_trace.TRACE_FILE)
 
 
-# ── TFT controller ─────────────────────────────────────────────────────────
+# ── metrics ────────────────────────────────────────────────────────────────
+# Served at /metrics (metrics.py). Emits are counted by a SocketIO subclass;
+# Prometheus derives emits per second from the counter.
 
-tft             = None
-_tft_lk         = threading.Lock()
-_tft_last_error = ""   # last connection error, exposed via /api/control/status
+REQUEST_SECONDS = metrics.histogram("tft911_web_request_seconds", "HTTP request latency by route",
+                                    ["route", "method", "status"])
+SOCKET_CLIENTS  = metrics.gauge("tft911_web_socket_clients", "Connected Socket.IO clients")
+SOCKET_EMITS    = metrics.counter("tft911_web_socket_emits_total", "Socket.IO events emitted", ["event"])
+JOB_SECONDS     = metrics.histogram("tft911_web_control_job_seconds", "TFT command run time by job", ["job"])
+JOB_WAIT        = metrics.histogram("tft911_web_control_queue_wait_seconds",
+                                    "Time a TFT job waited for the control worker", ["job"])
+JOBS            = metrics.counter("tft911_web_control_jobs_total", "Finished TFT jobs by outcome", ["job", "state"])
 
-def _connect_tft():
-    global tft, _tft_last_error
-    try:
-        t = TFTController()
-        t.connect()
-        tft = t
-        _tft_last_error = ""
-        print("[web] COM3 connected.")
-    except Exception as e:
-        tft = None
-        _tft_last_error = str(e)
-        print(f"[web] COM3 unavailable: {e}")
+class _MeteredSocketIO(SocketIO):
+    def emit(self, event, *args, **kwargs):
+        SOCKET_EMITS.labels(event=event).inc()
+        return super().emit(event, *args, **kwargs)
+
+class _CodecJSONProvider(DefaultJSONProvider):
+    """jsonify() and request.json through jsoncodec (orjson when installed)."""
+    def dumps(self, obj, **kwargs):
+        return jsoncodec.dumps(obj, indent=bool(kwargs.get("indent")), sort_keys=self.sort_keys,
+                               default=kwargs.get("default", self.default))
+
+    def loads(self, s, **kwargs):
+        return jsoncodec.loads(s)
+
+app      = Flask(__name__)
+app.json = _CodecJSONProvider(app)
+socketio = _MeteredSocketIO(app, cors_allowed_origins="*", async_mode='threading', json=jsoncodec)
+
+@app.before_request
+def _request_started():
+    g.t0 = time.perf_counter()
+
+@app.after_request
+def _request_finished(resp):
+    t0 = g.get("t0")
+    if t0 is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_SECONDS.labels(route=route, method=request.method, status=resp.status_code).observe(
+            time.perf_counter() - t0)
+    return resp
 
-_connect_tft()
+
+# ── TFT controller ─────────────────────────────────────────────────────────
+# One worker thread owns the controller (control_worker.py). Control routes
+# queue a job and answer 202 with its id at once; job progress is pushed to
+# the 'control' room as 'job' events.
+
+JOB_WAIT_SECS = 15   # how long PTT/recording start waits for the TFT to be free
+
+def _on_job(job) -> None:
+    socketio.emit('job', job.to_dict(), to="control")
+    if job.state == control_worker.RUNNING:
+        JOB_WAIT.labels(job=job.name).observe(job.started - job.created)
+    elif job.state in control_worker.FINISHED:
+        JOBS.labels(job=job.name, state=job.state).inc()
+        if job.started is not None:
+            JOB_SECONDS.labels(job=job.name).observe(job.finished - job.started)
+    if job.state in control_worker.FINISHED:
+        if job.name == "reconnect":
+            print("[web] COM3 connected." if control.connected else f"[web] COM3 unavailable: {control.last_error}")
+        refresh_control_status()
+    else:
+        status.update(control_jobs=control.summary())
+
+setup_control_logging()
+control = control_worker.ControlWorker(on_update=_on_job)
 
 def tft_ok() -> bool:
-    return tft is not None and getattr(getattr(tft, 'ser', None), 'is_open', False)
+    return control.connected
 
-def _tft_call(fn):
-    """Call zero-arg fn() under the TFT lock, return JSON result."""
+def _submit(name: str, run, priority: int = control_worker.NORMAL, prepare=None):
+    """Queue run(tft) on the control worker; 202 with the job, or 503 if COM3 is down."""
     if not tft_ok():
         return jsonify({"ok": False, "error": "COM3 not connected"}), 503
-    try:
-        with _tft_lk:
-            fn()
-        return jsonify({"ok": True})
-    except (ValueError, RuntimeError) as e:
-        return jsonify({"ok": False, "error": str(e)}), 400
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+    job = control.submit(name, run, priority, prepare)
+    return jsonify({"ok": True, "job": job.to_dict()}), 202
+
+def _run_now(name: str, run) -> str:
+    """
+    Run a job for a socket handler and wait for it; '' on success, else the error.
+
+    A job still queued after JOB_WAIT_SECS is withdrawn so it cannot fire
+    after the browser has given up on it.
+    """
+    if not tft_ok():
+        return "COM3 not connected"
+    job = control.submit(name, run)
+    if not job.wait(JOB_WAIT_SECS) and control.cancel(job):
+        return "TFT busy — try again when the current operation finishes"
+    job.wait()
+    return job.error if job.state != control_worker.DONE else ""
 
 
 # ── PTT state ──────────────────────────────────────────────────────────────
 
 _ptt_lk   = threading.Lock()
 _ptt_proc = None   # aplay subprocess while PTT is active
+_ptt_sid  = None   # socket that owns it
+
+
+# ── browser audio capture ──────────────────────────────────────────────────
+
+AUDIO_FRAME_MS = 20      # target capture frame length
+
+_audio_sessions: dict = {}   # socket sid → negotiated {"mode", "rate", "codec", "frame", "decoder"}
+
+def _audio_frame_size(rate: int) -> int:
+    """Samples per capture frame: ~20 ms, rounded to whole 128-sample render quanta."""
+    quanta = round(rate * AUDIO_FRAME_MS / 1000 / 128)
+    return max(2, min(quanta, 32)) * 128
+
+def _new_audio_session(sid: str, mode: str, rate: int | None = None) -> dict:
+    m    = audio_transport.MODES[mode]
+    rate = rate or m["rate"]
+    sess = {"mode": mode, "rate": rate, "codec": m["codec"], "frame": _audio_frame_size(rate),
+            "decoder": audio_transport.Decoder(rate, m["codec"])}
+    _audio_sessions[sid] = sess
+    return sess
+
+def _audio_session(sid: str) -> dict:
+    """Negotiated transport session for a socket; clients that never negotiate get pcm44."""
+    return _audio_sessions.get(sid) or _new_audio_session(sid, "pcm44")
+
+def _pcm_bytes(samples) -> bytes:
+    """Binary frame from the capture worklet, or a legacy list of Int16 ints."""
+    if isinstance(samples, (bytes, bytearray)):
+        return bytes(samples)
+    return struct.pack(f'{len(samples)}h', *samples)
+
+def _audio_decode(sid: str, samples) -> bytes:
+    return _audio_session(sid)["decoder"].decode(_pcm_bytes(samples))
 
 
 # ── data helpers ───────────────────────────────────────────────────────────
+# Alerts are held in memory as slotted AlertRecords (alert_record.py): the
+# newest ALERT_HISTORY are read once, then the watchdog appends new ones.
 
-def read_alerts(limit: int = 200) -> list:
+ALERT_HISTORY = 5000   # records kept in memory
+ALERT_PAGE    = 200    # records rendered into the dashboard/history pages
+
+def read_alerts(limit: int = ALERT_PAGE) -> list:
+    """The newest `limit` records in events.jsonl, newest first."""
     if not os.path.exists(JSONL):
         return []
     try:
         with open(JSONL, encoding="utf-8") as f:
-            lines = [l.strip() for l in f if l.strip()]
+            lines = deque((l for l in f if l.strip()), maxlen=limit)   # never holds the whole file
         out = []
-        for line in lines[-limit:]:
-            try: out.append(json.loads(line))
-            except: pass
+        for line in lines:
+            try: out.append(AlertRecord.from_json(line))
+            except Exception: pass   # one bad line must not blank the history
         return list(reversed(out))
     except Exception:
         return []
 
+class AlertCache:
+    def __init__(self, size: int):
+        self._lk   = threading.Lock()
+        self._recs = None   # deque, oldest first; loaded on first use
+        self._size = size
+
+    def _load(self) -> deque:
+        if self._recs is None:
+            self._recs = deque(reversed(read_alerts(self._size)), maxlen=self._size)
+        return self._recs
+
+    def add(self, rec: AlertRecord) -> None:
+        with self._lk:
+            self._load().append(rec)
+
+    def recent(self, limit: int = None) -> list:
+        """Newest first."""
+        with self._lk:
+            recs = self._load()
+            n = len(recs) if limit is None else min(limit, len(recs))
+            return [recs[-1 - i] for i in range(n)]
+
+alerts = AlertCache(ALERT_HISTORY)
+
 def logger_running() -> bool:
     try:
         return subprocess.run(
@@ -123,47 +270,148 @@ def logger_running() -> bool:
 def serial_connected() -> bool:
     return os.path.exists(CONFIG['serial_port'])
 
-def get_stats(alerts: list) -> dict:
-    today = datetime.now(timezone.utc).date()
-    today_count = sum(
-        1 for a in alerts
-        if a.get("received_utc") and
-        datetime.strptime(a["received_utc"], "%Y-%m-%dT%H:%M:%SZ")
-               .replace(tzinfo=timezone.utc).date() == today
-    )
+def alert_stats(recs: list) -> dict:
+    today = datetime.now(timezone.utc).date().isoformat()   # received_utc is ISO, so compare the date prefix
     return {
-        "today_count": today_count,
-        "last_alert":  alerts[0].get("received_local", "None") if alerts else "None",
-        "last_rwt":    next((a.get("received_local","") for a in alerts
-                             if a.get("event_code") == "RWT"), "None"),
-        "logger_ok":   logger_running(),
-        "serial_ok":   serial_connected(),
-        "control_ok":  tft_ok(),
-        "total":       len(alerts),
+        "today_count": sum(1 for a in recs if a.received_utc and a.received_utc[:10] == today),
+        "last_alert":  (recs[0].received_local or "None") if recs else "None",
+        "last_rwt":    next((a.received_local for a in recs if a.event_code == "RWT"), "None"),
+        "total":       len(recs),
     }
 
+def system_status() -> dict:
+    ok = tft_ok()
+    return {
+        "logger_ok":     logger_running(),
+        "serial_ok":     serial_connected(),
+        "control_ok":    ok,
+        "control_error": "" if ok else control.last_error,
+    }
+
+
+# ── status model ───────────────────────────────────────────────────────────
+# The server owns dashboard/control status. One monitor thread re-checks the
+# system every STATUS_POLL_SECS, alert counts are recomputed when the alert
+# file changes, and only fields that actually changed are pushed to the
+# 'status' room — open tabs never poll.
+
+STATUS_POLL_SECS = 10
+
+class StatusModel:
+    def __init__(self):
+        self._lk    = threading.Lock()
+        self._state = {}
+
+    def snapshot(self) -> dict:
+        with self._lk:
+            return dict(self._state)
+
+    def update(self, **fields) -> dict:
+        """Merge fields into the model; push and return only the changed ones."""
+        with self._lk:
+            delta = {k: v for k, v in fields.items() if k not in self._state or self._state[k] != v}
+            self._state.update(delta)
+        if delta:
+            socketio.emit("status", delta, to="status")
+        return delta
+
+status      = StatusModel()
+_stats_date = None   # UTC date today_count was computed for
+
+def refresh_alert_stats() -> None:
+    global _stats_date
+    _stats_date = datetime.now(timezone.utc).date()
+    status.update(**alert_stats(alerts.recent()))
+
+def refresh_system_status() -> None:
+    status.update(**system_status())
+
+def refresh_control_status() -> None:
+    ok, t = tft_ok(), control.tft
+    status.update(control_ok=ok, control_error="" if ok else control.last_error,
+                  tts_cache=t.tts_cache.stats() if t is not None else None,
+                  control_jobs=control.summary())
+
+control.reconnect()   # first COM3 open; the result reaches browsers via refresh_control_status
+
+def get_stats() -> dict:
+    snap = status.snapshot()   # control fields may already be in before the monitor's first pass
+    if "total" not in snap:
+        refresh_alert_stats()
+    if "logger_ok" not in snap:
+        refresh_system_status()
+    return status.snapshot()
+
+def start_status_monitor():
+    """Background loop: system checks, plus today_count rollover at UTC midnight."""
+    refresh_alert_stats()
+    while True:
+        refresh_system_status()
+        if _stats_date != datetime.now(timezone.utc).date():
+            refresh_alert_stats()
+        socketio.sleep(STATUS_POLL_SECS)
+
+
+# ── latency tracing ────────────────────────────────────────────────────────
+# Records carry the logger's trace stamps (alert_trace.py). The dashboard adds
+# 'received' and 'emitted' around the push and 'rendered' when the first
+# browser acknowledges painting the alert; rolling percentiles go out in the
+# status model as 'latency'.
+
+traces = alert_trace.TraceStore()
+
+def publish_latency() -> None:
+    status.update(latency=traces.percentiles())
+
+def emit_alert(rec: AlertRecord) -> None:
+    trace = rec.trace or {}
+    if trace.get("id"):
+        traces.merge(trace, event_code=rec.event_code, header=rec.canonical_header)
+        traces.stamp(trace["id"], "received")
+    alerts.add(rec)
+    socketio.emit("new_alert", rec.to_dict(), to="alerts")
+    if trace.get("id"):
+        traces.stamp(trace["id"], "emitted")
+        publish_latency()
+
 
 # ── watchdog ───────────────────────────────────────────────────────────────
+# New lines in events.jsonl are pushed as 'new_alert'; the logger's fsync
+# stamps arrive separately in trace.jsonl. A file smaller than last time was
+# rotated, so reading starts again from the top.
 
 class AlertFileHandler(FileSystemEventHandler):
     def __init__(self):
-        self._last_size = os.path.getsize(JSONL) if os.path.exists(JSONL) else 0
+        self._offsets = {p: os.path.getsize(p) if os.path.exists(p) else 0 for p in (JSONL, TRACE)}
+
+    def _new_lines(self, path: str) -> list:
+        sz = os.path.getsize(path)
+        start = self._offsets[path] if sz >= self._offsets[path] else 0
+        if sz == start:
+            return []
+        with open(path, encoding="utf-8") as f:
+            f.seek(start)
+            new = f.read()
+        self._offsets[path] = sz
+        return [l for l in new.strip().splitlines() if l.strip()]
 
     def on_modified(self, event):
-        if event.src_path != JSONL:
+        if event.src_path not in self._offsets:
             return
         try:
-            sz = os.path.getsize(JSONL)
-            if sz <= self._last_size:
+            lines = self._new_lines(event.src_path)
+            if not lines:
                 return
-            with open(JSONL, encoding="utf-8") as f:
-                f.seek(self._last_size)
-                new = f.read()
-            self._last_size = sz
-            for line in new.strip().splitlines():
-                if line.strip():
-                    try: socketio.emit("new_alert", json.loads(line))
+            if event.src_path == TRACE:
+                for line in lines:
+                    try: traces.merge(jsoncodec.loads(line))
                     except: pass
+                publish_latency()
+                return
+            for line in lines:
+                try: emit_alert(AlertRecord.from_json(line))
+                except: pass
+            refresh_alert_stats()
         except Exception:
             pass
 
@@ -177,126 +425,235 @@ def start_watchdog():
 
 
 # ── log streaming ──────────────────────────────────────────────────────────
+# One journalctl -f feeds a bounded ring of recent lines. /api/logs and the
+# socket-connect backlog are served from the ring (no subprocess per request),
+# and live lines are coalesced into one 'log_lines' frame per LOG_FLUSH_SECS.
+# Lines keep journald's timestamp (-o short), as /api/logs always returned them.
+
+LOG_RING_SIZE  = 500
+LOG_FLUSH_SECS = 0.1
+
+_log_lk      = threading.Lock()
+_log_ring    = deque(maxlen=LOG_RING_SIZE)
+_log_pending = deque(maxlen=LOG_RING_SIZE)   # lines not yet emitted
 
 def start_log_stream():
-    """Tail journalctl in a background thread and push each line via WebSocket."""
+    """Tail journalctl in a background thread, feeding the ring and the emit queue."""
     try:
         proc = subprocess.Popen(
-            ['journalctl', '-u', 'tft911-eas', '-f', '-n', '50', '--output=cat'],
+            ['journalctl', '-u', 'tft911-eas', '-f', '-n', str(LOG_RING_SIZE), '-o', 'short'],
             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
         )
         for line in proc.stdout:
-            socketio.emit('log_line', {'line': line.rstrip()})
+            line = line.rstrip()
+            with _log_lk:
+                _log_ring.append(line)
+                _log_pending.append(line)
     except Exception:
         pass
 
+def start_log_flusher():
+    """Push queued log lines to browsers as one coalesced frame per interval."""
+    while True:
+        socketio.sleep(LOG_FLUSH_SECS)
+        with _log_lk:
+            if not _log_pending:
+                continue
+            batch = list(_log_pending)
+            _log_pending.clear()
+        socketio.emit('log_lines', {'lines': batch}, to="logs")
+
+def recent_log_lines(n: int = LOG_RING_SIZE) -> list:
+    if n <= 0:
+        return []   # list[-0:] would be the whole ring
+    with _log_lk:
+        return list(_log_ring)[-n:]
+
 
 # ── config helpers ─────────────────────────────────────────────────────────
 
+# Never sent to the browser; a blank or redacted value posted back keeps the saved one
+_SECRET_KEYS = {("debug", "token")}
+REDACTED     = "********"
+
 def _read_config_dict() -> dict:
-    c = configparser.ConfigParser()
-    if CONFIG_PATH.exists():
-        c.read(CONFIG_PATH)
-    return {s: dict(c[s]) for s in c.sections()}
+    c = config_store.parser()
+    out = {s: dict(c[s]) for s in c.sections()}
+    for section, key in _SECRET_KEYS:
+        out.get(section, {}).pop(key, None)
+    return out
+
+# Station/TTS/pacing settings apply to the live controller as soon as config.ini
+# changes; port/baud/PIN still need a COM3 reconnect.
+_LIVE_CONTROL_KEYS = ('tts_speed', 'tts_pitch', 'tts_voice', 'tts_cache_dir', 'tts_cache_mb',
+                      'tz_offset', 'callsign', 'org', 'pacing')
+
+def _on_config_change(_parser) -> None:
+    t = control.tft
+    if t is not None:
+        fresh = load_control_config()
+        t.config.update({k: fresh[k] for k in _LIVE_CONTROL_KEYS})
+
+config_store.subscribe(_on_config_change)
 
 
 # ── routes — data ──────────────────────────────────────────────────────────
 
 @app.route("/")
 def index():
-    alerts = read_alerts()
-    return render_template_string(HTML, alerts=alerts, stats=get_stats(alerts))
+    return render_template_string(HTML, alerts=alerts.recent(ALERT_PAGE), stats=get_stats())
 
 @app.route("/api/alerts")
 def api_alerts():
-    from flask import Response
-    data = json.dumps(read_alerts(), ensure_ascii=False, indent=2)
+    data = jsoncodec.dumps([a.to_dict() for a in alerts.recent()], indent=True)
     return Response(data, mimetype="application/json",
                     headers={"Content-Disposition": "attachment; filename=eas-alerts.json"})
 
 @app.route("/api/stats")
 def api_stats():
-    return jsonify(get_stats(read_alerts()))
+    return jsonify(get_stats())
 
 @app.route("/api/logs")
 def api_logs():
+    n = request.args.get("n", 100, type=int)
+    return jsonify({"lines": recent_log_lines(max(0, min(n, LOG_RING_SIZE)))})
+
+@app.route("/metrics")
+def api_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route("/api/trace")
+def api_trace():
+    """Recent alert timelines, newest first, plus the rolling percentiles."""
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify({"traces": traces.recent(max(0, min(limit, alert_trace.TRACE_HISTORY))), "latency": traces.percentiles()})
+
+@app.route("/api/trace/<trace_id>")
+def api_trace_one(trace_id):
+    tl = traces.get(trace_id)
+    if tl is None:
+        return jsonify({"ok": False, "error": "unknown trace"}), 404
+    return jsonify({"ok": True, "trace": tl})
+
+
+# ── origination previews ───────────────────────────────────────────────────
+# /api/decode remembers what it previewed under a handle and starts
+# synthesising the text into the TTS cache straight away. Originating always
+# decodes the header it is about to send; the announcement's "at ... until"
+# times follow the clock, so the warm clip is only reused when that text is
+# byte-identical to the preview (same minute), otherwise it is synthesised anew.
+
+PREVIEW_TTL_SECS = 600
+PREVIEW_MAX      = 16
+
+_previews    = {}   # handle → {"key": (event, locations, duration), "text", "at"}
+_previews_lk = threading.Lock()
+
+def _prerender(text: str) -> None:
+    t = control.tft
+    if t is None:
+        return
     try:
-        r = subprocess.run(
-            ["journalctl", "-u", "tft911-eas", "-n", "100", "--no-pager", "-o", "short"],
-            capture_output=True, text=True, timeout=5
-        )
-        return jsonify({"lines": r.stdout.splitlines()})
+        t.tts_cache.get(text, t.config['tts_speed'], t.config['tts_pitch'], t.config.get('tts_voice', ''))
     except Exception as e:
-        return jsonify({"lines": [str(e)]})
+        print(f"[web] TTS pre-render failed: {e}")
+    refresh_control_status()
+
+def remember_preview(event: str, locations: str, duration: str, text: str) -> str:
+    handle = uuid.uuid4().hex[:12]
+    now    = time.monotonic()
+    with _previews_lk:
+        for h in [h for h, p in _previews.items() if now - p["at"] > PREVIEW_TTL_SECS]:
+            del _previews[h]
+        while len(_previews) >= PREVIEW_MAX:
+            del _previews[next(iter(_previews))]
+        _previews[handle] = {"key": (event, locations, duration), "text": text, "at": now}
+    threading.Thread(target=_prerender, args=(text,), daemon=True).start()
+    return handle
+
+def preview_text(handle, event: str, locations: str, duration: str):
+    """Previewed text for handle if it is recent and matches these parameters, else None."""
+    with _previews_lk:
+        p = _previews.get(handle or "")
+    if p is None or p["key"] != (event, locations, duration):
+        return None
+    if time.monotonic() - p["at"] > PREVIEW_TTL_SECS:
+        return None
+    return p["text"]
 
 
 # ── routes — control ───────────────────────────────────────────────────────
 
 @app.route("/api/control/status")
 def api_control_status():
-    ok = tft_ok()
-    return jsonify({"connected": ok, "error": "" if ok else _tft_last_error})
+    st = get_stats()
+    return jsonify({"connected": st["control_ok"], "error": st["control_error"]})
 
 @app.route("/api/control/reconnect", methods=["POST"])
 def api_reconnect():
-    global tft
-    with _tft_lk:
-        try: tft and tft.disconnect()
-        except: pass
-    _connect_tft()
-    ok = tft_ok()
-    return jsonify({"ok": ok, "connected": ok, "error": "" if ok else _tft_last_error})
+    job = control.reconnect()
+    return jsonify({"ok": True, "job": job.to_dict()}), 202
+
+@app.route("/api/control/jobs/<job_id>")
+def api_job(job_id):
+    job = control.job(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "unknown job"}), 404
+    return jsonify({"ok": True, "job": job.to_dict()})
 
 @app.route("/api/control/rwt", methods=["POST"])
 def api_rwt():
     tone = (request.json or {}).get("tone", True)
-    return _tft_call(lambda: tft.send_rwt(attention_tone=tone))
+    return _submit("rwt", lambda t: t.send_rwt(attention_tone=tone))
 
 @app.route("/api/control/eom", methods=["POST"])
 def api_eom():
-    return _tft_call(lambda: tft.send_eom())
+    return _submit("eom", lambda t: t.send_eom(), control_worker.URGENT)
 
 @app.route("/api/control/stop", methods=["POST"])
 def api_stop():
-    return _tft_call(lambda: tft.stop())
+    if not tft_ok():
+        speech.cancel()
+        return jsonify({"ok": False, "error": "COM3 not connected"}), 503
+    # Cancels queued jobs and cuts off TTS playback before '#' goes out
+    job = control.stop()
+    return jsonify({"ok": True, "job": job.to_dict()}), 202
 
 @app.route("/api/control/reboot", methods=["POST"])
 def api_reboot():
-    return _tft_call(lambda: tft.reboot())
+    return _submit("reboot", lambda t: t.reboot())
 
 @app.route("/api/control/voice/record", methods=["POST"])
 def api_voice_record():
-    return _tft_call(lambda: tft.record_voice())
+    return _submit("record_voice", lambda t: t.record_voice())
 
 @app.route("/api/control/voice/play", methods=["POST"])
 def api_voice_play():
-    return _tft_call(lambda: tft.play_voice())
+    return _submit("play_voice", lambda t: t.play_voice())
 
 @app.route("/api/control/announcement/record", methods=["POST"])
 def api_ann_record():
-    return _tft_call(lambda: tft.record_announcement())
+    return _submit("record_announcement", lambda t: t.record_announcement())
 
 @app.route("/api/control/announcement/play", methods=["POST"])
 def api_ann_play():
-    return _tft_call(lambda: tft.play_announcement())
+    return _submit("play_announcement", lambda t: t.play_announcement())
 
 @app.route("/api/control/patch", methods=["POST"])
 def api_patch():
-    return _tft_call(lambda: tft.live_patch())
+    return _submit("live_patch", lambda t: t.live_patch())
 
 @app.route("/api/control/announce", methods=["POST"])
 def api_announce():
-    if not tft_ok():
-        return jsonify({"ok": False, "error": "COM3 not connected"}), 503
     text = (request.json or {}).get("text", "").strip()
     if not text:
         return jsonify({"ok": False, "error": "No text provided"}), 400
-    return _tft_call(lambda: tft.record_announcement_tts(text))
+    # Synthesised into the TTS cache off the worker, so the port is only held for playback
+    return _submit("announce", lambda t, wav: t.record_announcement_tts(text, wav),
+                   prepare=lambda t: t.synthesize_tts(text))
 
 @app.route("/api/control/originate", methods=["POST"])
 def api_originate():
-    if not tft_ok():
-        return jsonify({"ok": False, "error": "COM3 not connected"}), 503
     d         = request.json or {}
     event     = d.get("event", "").upper()
     locations = d.get("locations", "")
@@ -306,15 +663,25 @@ def api_originate():
     if not locations:
         return jsonify({"ok": False, "error": "location keys required"}), 400
     if d.get("tts"):
-        try:
-            with _tft_lk:
-                text = tft.originate_with_tts(event, locations, duration)
-            return jsonify({"ok": True, "text": text})
-        except (ValueError, RuntimeError) as e:
-            return jsonify({"ok": False, "error": str(e)}), 400
-        except Exception as e:
-            return jsonify({"ok": False, "error": str(e)}), 500
-    return _tft_call(lambda: tft.originate(event, locations, duration, d.get("audio", "p")))
+        # Decode the header as of now; the TTS cache is keyed by text, so the
+        # preview's clip is picked up only when the text has not changed.
+        handle = d.get("handle")
+
+        def prepare(t):
+            text = t.announcement_text(event, locations, duration)
+            return text, t.synthesize_tts(text)
+
+        def run(t, prepared):
+            text, wav = prepared
+            fresh = t.announcement_text(event, locations, duration)
+            if fresh != text:   # the minute rolled over while queued
+                text, wav = fresh, None
+            return {"text": t.originate_with_tts(event, locations, duration, text=text, wav=wav),
+                    "previewed": text == preview_text(handle, event, locations, duration)}
+
+        return _submit("originate_tts", run, prepare=prepare)
+    audio = d.get("audio", "p")
+    return _submit("originate", lambda t: t.originate(event, locations, duration, audio))
 
 @app.route("/api/decode", methods=["POST"])
 def api_decode():
@@ -324,20 +691,18 @@ def api_decode():
     duration  = d.get("duration", "01")
     if not event or not locations:
         return jsonify({"ok": False, "error": "event and locations required"}), 400
-    loc_keys  = load_location_keys()
-    fips_list = []
-    for k in parse_location_keys(locations):
-        if k in loc_keys:
-            fips_list.extend(loc_keys[k]["fips"])
+    fips_list = config_store.fips_for_keys(locations)
     if not fips_list:
         return jsonify({"ok": False, "error": f"No FIPS codes for keys {locations!r}"}), 400
-    cfg  = tft.config if tft is not None else {}
+    t    = control.tft
+    cfg  = t.config if t is not None else {}
     same = build_same_header(event, fips_list, duration,
                              org=cfg.get("org", "EAS"),
                              callsign=cfg.get("callsign", "STATION"))
     try:
         text = decode_header(same, cfg.get("tz_offset"))
-        return jsonify({"ok": True, "text": text, "same": same})
+        handle = remember_preview(event, locations, duration, text)
+        return jsonify({"ok": True, "text": text, "same": same, "handle": handle})
     except RuntimeError as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
@@ -350,12 +715,16 @@ def api_fips_search():
     q = request.args.get("q", "").strip()
     if len(q) < 2:
         return jsonify([])
-    return jsonify(search_fips(q, limit=8))
+    return jsonify(search_fips(q, limit=8, state=request.args.get("state") or None))
+
+@app.route("/audio-capture.js")
+def audio_capture_js():
+    return Response(CAPTURE_WORKLET_JS, mimetype="application/javascript")
 
 # kept for backwards compat with existing JS
 @app.route("/api/control/play_announcement", methods=["POST"])
 def api_play_announcement():
-    return _tft_call(lambda: tft.play_announcement())
+    return _submit("play_announcement", lambda t: t.play_announcement())
 
 
 # ── routes — config ────────────────────────────────────────────────────────
@@ -367,9 +736,7 @@ def api_cfg_get():
 @app.route("/api/config", methods=["POST"])
 def api_cfg_post():
     data = request.json or {}
-    c = configparser.ConfigParser()
-    if CONFIG_PATH.exists():
-        c.read(CONFIG_PATH)
+    c = config_store.copy()
     for section, keys in data.items():
         if not c.has_section(section):
             c.add_section(section)
@@ -378,144 +745,348 @@ def api_cfg_post():
                 c.remove_option(section, opt)
         for k, v in keys.items():
             val = str(v).strip()
+            if (section, k) in _SECRET_KEYS and val in ("", REDACTED):
+                continue
             if val:
                 c.set(section, k, val)
             elif c.has_option(section, k):
                 c.remove_option(section, k)
     try:
-        with open(CONFIG_PATH, 'w') as f:
-            c.write(f)
+        config_store.write_config(c)
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+# ── debug ──────────────────────────────────────────────────────────────────
+# /debug/profile samples every thread of this process (profiler.py) and
+# returns collapsed stacks. Off unless [debug] profiling = true; with a
+# [debug] token set it is required, otherwise only localhost may profile.
+
+@app.route("/debug/profile")
+def debug_profile():
+    if not CONFIG['debug_profiling']:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    token = CONFIG['debug_token']
+    if token:
+        given = request.args.get("token") or request.headers.get("X-Debug-Token", "")
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return jsonify({"ok": False, "error": "bad token"}), 403
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({"ok": False, "error": "set [debug] token to profile from another host"}), 403
+    seconds = max(0.1, min(request.args.get("seconds", 10, type=float), profiler.MAX_SECONDS))
+    try:
+        text = profiler.profile(seconds)
+    except RuntimeError as ex:
+        return jsonify({"ok": False, "error": str(ex)}), 409
+    name = f"web-profile-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}.collapsed"
+    return Response(text, mimetype="text/plain",
+                    headers={"Content-Disposition": f"attachment; filename={name}"})
+
+
+def _memory_exceeded(rss: int) -> None:
+    """Over the memory budget: let a running TFT command finish, then exit for systemd to restart."""
+    deadline = time.monotonic() + memwatch.RESTART_GRACE - 5
+    while control.summary()["running"] and time.monotonic() < deadline:
+        time.sleep(0.5)
+    memwatch.restart(rss)
+
+
 # ── websocket handlers ─────────────────────────────────────────────────────
 
+# Clients join the topic rooms for what they are viewing; every broadcast goes
+# to one room. Audio replies (ptt_*/rec_*) go only to the sending session's
+# own sid room.
+TOPICS = ("alerts", "status", "logs", "control")
+
 @socketio.on("connect")
 def on_connect():
-    pass
+    SOCKET_CLIENTS.inc()
+
+@socketio.on("subscribe")
+def on_subscribe(data):
+    """Join topic rooms: {"topics": ["alerts", "logs", ...]}. Joining logs/status sends the current state."""
+    topics = [t for t in (data or {}).get("topics", []) if t in TOPICS]
+    for t in topics:
+        join_room(t)
+    if "logs" in topics:
+        socketio.emit('log_backlog', {'lines': recent_log_lines()}, to=request.sid)
+    if "status" in topics:
+        socketio.emit('status', get_stats(), to=request.sid)
+    return topics
+
+@socketio.on("unsubscribe")
+def on_unsubscribe(data):
+    topics = [t for t in (data or {}).get("topics", []) if t in TOPICS]
+    for t in topics:
+        leave_room(t)
+    return topics
+
+@socketio.on("trace_ack")
+def on_trace_ack(data):
+    """A browser has painted an alert: {"id": trace id}. Only the first ack counts."""
+    trace_id = data.get("id") if isinstance(data, dict) else None
+    if isinstance(trace_id, str) and trace_id and traces.stamp(trace_id, "rendered"):
+        publish_latency()
 
 @socketio.on("disconnect")
 def on_disconnect():
-    """Clean up PTT and VoIP recording if browser disconnects mid-transmission."""
-    global _ptt_proc, _rec_proc
+    """
+    Clean up PTT and VoIP recording if their browser disconnects mid-transmission.
+
+    Only the socket that started a session ends it; other viewers closing a
+    tab must not cut off the operator who is on the air.
+    """
+    SOCKET_CLIENTS.dec()
+    _audio_sessions.pop(request.sid, None)
+    ended = _end_ptt(request.sid)
+    ended = _end_rec(request.sid) or ended
+    if ended and tft_ok():
+        control.stop(cancel_queued=False, cancel_speech=False)
+
+@socketio.on("audio_probe")
+def on_audio_probe(payload):
+    """Throughput probe — the browser times the ack of a fixed-size binary message."""
+    return len(payload) if isinstance(payload, (bytes, bytearray)) else 0
+
+@socketio.on("audio_negotiate")
+def on_audio_negotiate(data):
+    """
+    Agree on transport mode, rate and frame size before PTT/recording starts.
+
+    The browser sends {"kbps": measured throughput}; the mode comes from
+    [audio] transport in config.ini, or from the measurement when 'auto'.
+    {"mode": ..., "rate": ...} asks for a mode directly; the rate may only be
+    lowered, never raised above the mode's, so the bitrate stays within what
+    was measured. Browsers whose AudioContext runs faster resample in the
+    capture worklet instead.
+    """
+    data = data or {}
+    mode = data.get("mode") or CONFIG['audio_transport']
+    if mode not in audio_transport.MODES:
+        mode = audio_transport.pick_mode(data.get("kbps"))
+    rate = None
+    if data.get("rate") is not None:
+        try:
+            rate = int(data["rate"])
+        except (TypeError, ValueError):
+            pass
+        if rate is not None and not 8000 <= rate <= audio_transport.MODES[mode]["rate"]:
+            rate = None
+    sess = _new_audio_session(request.sid, mode, rate)
+    return {k: sess[k] for k in ("mode", "rate", "codec", "frame")}
+
+def _claim_ptt(sid: str) -> bool:
+    """Make `sid` the owner of the PTT sink, closing its own earlier one; False if another socket has it."""
+    global _ptt_proc, _ptt_sid
     with _ptt_lk:
+        if _ptt_sid not in (None, sid):
+            return False
         if _ptt_proc:
             try: _ptt_proc.stdin.close()
             except: pass
-            _ptt_proc = None
-    with _rec_lk:
-        if _rec_proc:
-            try: _rec_proc.stdin.close()
-            except: pass
-            _rec_proc = None
-    if tft_ok():
-        try:
-            with _tft_lk: tft.stop()
-        except: pass
+        _ptt_proc, _ptt_sid = None, sid
+    return True
 
 @socketio.on("ptt_start")
 def on_ptt_start():
-    global _ptt_proc
-    if not tft_ok():
-        socketio.emit('ptt_error', {'error': 'COM3 not connected'})
-        return
-    try:
-        with _tft_lk:
-            tft.live_patch()
-    except Exception as e:
-        socketio.emit('ptt_error', {'error': str(e)})
-        return
+    """Patch CH1 live and open the sink. Acks True once chunks will be played."""
+    global _ptt_proc, _ptt_sid
+    if not _claim_ptt(request.sid):
+        socketio.emit('ptt_error', {'error': 'PTT in use by another browser'}, to=request.sid)
+        return False
+    err = _run_now("live_patch", lambda t: t.live_patch())
+    if err:
+        _end_ptt(request.sid)
+        socketio.emit('ptt_error', {'error': err}, to=request.sid)
+        return False
     with _ptt_lk:
+        if _ptt_sid != request.sid:   # stopped or disconnected meanwhile
+            return False
         try:
             _ptt_proc = subprocess.Popen(
-                ['aplay', '-r', '44100', '-f', 'S16_LE', '-c', '1', '-'],
+                _audio_session(request.sid)["decoder"].sink_args(),
                 stdin=subprocess.PIPE
             )
+            return True
         except FileNotFoundError:
-            socketio.emit('ptt_error', {'error': 'aplay not found — install alsa-utils'})
+            socketio.emit('ptt_error', {'error': 'aplay not found — install alsa-utils'}, to=request.sid)
         except Exception as e:
-            socketio.emit('ptt_error', {'error': str(e)})
+            socketio.emit('ptt_error', {'error': str(e)}, to=request.sid)
+        _ptt_sid = None
+    return False
 
 @socketio.on("ptt_chunk")
 def on_ptt_chunk(samples):
-    """Receive Int16 PCM samples from browser, write to aplay stdin."""
+    """Receive an audio frame from browser, decode to the sink format, write to aplay stdin.
+    The ack drives the client's latency stats."""
     with _ptt_lk:
-        if _ptt_proc and _ptt_proc.stdin:
+        if _ptt_proc and _ptt_proc.stdin and _ptt_sid == request.sid:
             try:
-                _ptt_proc.stdin.write(struct.pack(f'{len(samples)}h', *samples))
+                _ptt_proc.stdin.write(_audio_decode(request.sid, samples))
                 _ptt_proc.stdin.flush()
             except Exception:
                 pass
+    return True
 
-@socketio.on("ptt_stop")
-def on_ptt_stop():
-    global _ptt_proc
+def _end_ptt(sid: str) -> bool:
+    """Close the PTT sink if `sid` owns it; True if it did."""
+    global _ptt_proc, _ptt_sid
     with _ptt_lk:
+        if _ptt_sid != sid:
+            return False
         if _ptt_proc:
             try: _ptt_proc.stdin.close()
             except: pass
-            _ptt_proc = None
-    if tft_ok():
-        try:
-            with _tft_lk: tft.stop()
-        except: pass
+        _ptt_proc = _ptt_sid = None
+    return True
+
+@socketio.on("ptt_stop")
+def on_ptt_stop():
+    if _end_ptt(request.sid) and tft_ok():
+        control.stop(cancel_queued=False, cancel_speech=False)
 
 
 # ── VoIP announcement recording ────────────────────────────────────────────
 
 _rec_lk   = threading.Lock()
 _rec_proc = None   # aplay subprocess while browser is recording announcement
+_rec_sid  = None   # socket that owns it
+
+def _claim_rec(sid: str) -> bool:
+    """Make `sid` the owner of the recording sink, closing its own earlier one; False if another socket has it."""
+    global _rec_proc, _rec_sid
+    with _rec_lk:
+        if _rec_sid not in (None, sid):
+            return False
+        if _rec_proc:
+            try: _rec_proc.stdin.close()
+            except: pass
+        _rec_proc, _rec_sid = None, sid
+    return True
 
 @socketio.on("rec_start")
 def on_rec_start():
-    global _rec_proc
-    if not tft_ok():
-        socketio.emit('rec_error', {'error': 'COM3 not connected'})
-        return
-    try:
-        with _tft_lk:
-            tft.record_announcement()
-    except Exception as e:
-        socketio.emit('rec_error', {'error': str(e)})
-        return
+    """Start the TFT recording and open the sink. Acks True once chunks will be recorded."""
+    global _rec_proc, _rec_sid
+    if not _claim_rec(request.sid):
+        socketio.emit('rec_error', {'error': 'Recording in use by another browser'}, to=request.sid)
+        return False
+    err = _run_now("record_announcement", lambda t: t.record_announcement())
+    if err:
+        _end_rec(request.sid)
+        socketio.emit('rec_error', {'error': err}, to=request.sid)
+        return False
     with _rec_lk:
+        if _rec_sid != request.sid:   # stopped or disconnected meanwhile
+            return False
         try:
             _rec_proc = subprocess.Popen(
-                ['aplay', '-r', '44100', '-f', 'S16_LE', '-c', '1', '-'],
+                _audio_session(request.sid)["decoder"].sink_args(),
                 stdin=subprocess.PIPE
             )
-            socketio.emit('rec_ready')
+            socketio.emit('rec_ready', to=request.sid)
+            return True
         except FileNotFoundError:
-            socketio.emit('rec_error', {'error': 'aplay not found — install alsa-utils'})
+            socketio.emit('rec_error', {'error': 'aplay not found — install alsa-utils'}, to=request.sid)
         except Exception as e:
-            socketio.emit('rec_error', {'error': str(e)})
+            socketio.emit('rec_error', {'error': str(e)}, to=request.sid)
+        _rec_sid = None
+    return False
 
 @socketio.on("rec_chunk")
 def on_rec_chunk(samples):
-    """Receive Int16 PCM samples from browser, pipe to TFT CH1 via aplay."""
+    """Receive an audio frame from browser, decode and pipe to TFT CH1 via aplay."""
     with _rec_lk:
-        if _rec_proc and _rec_proc.stdin:
+        if _rec_proc and _rec_proc.stdin and _rec_sid == request.sid:
             try:
-                _rec_proc.stdin.write(struct.pack(f'{len(samples)}h', *samples))
+                _rec_proc.stdin.write(_audio_decode(request.sid, samples))
                 _rec_proc.stdin.flush()
             except Exception:
                 pass
+    return True
 
-@socketio.on("rec_stop")
-def on_rec_stop():
-    global _rec_proc
+def _end_rec(sid: str) -> bool:
+    """Close the recording sink if `sid` owns it; True if it did."""
+    global _rec_proc, _rec_sid
     with _rec_lk:
+        if _rec_sid != sid:
+            return False
         if _rec_proc:
             try: _rec_proc.stdin.close()
             except: pass
-            _rec_proc = None
-    if tft_ok():
-        try:
-            with _tft_lk: tft.stop()
-        except: pass
-    socketio.emit('rec_done')
+        _rec_proc = _rec_sid = None
+    return True
+
+@socketio.on("rec_stop")
+def on_rec_stop():
+    if _end_rec(request.sid) and tft_ok():
+        control.stop(cancel_queued=False, cancel_speech=False)
+    socketio.emit('rec_done', to=request.sid)
+
+
+# ── audio capture worklet ──────────────────────────────────────────────────
+# Runs on the browser's audio rendering thread: converts Float32 input to Int16
+# (or µ-law for the ulaw8 transport) frames of the negotiated size and transfers
+# each frame's buffer (no copy) to the page, which forwards it to the server as
+# a binary socket message. The AudioContext is opened at the negotiated rate so
+# the browser downsamples; one that only runs at its native rate gets a box-filter
+# decimator here instead, so the wire rate (and bitrate) stays as negotiated.
+
+CAPTURE_WORKLET_JS = r"""
+function ulaw(s) {   // Int16 → G.711 µ-law byte
+  const sign = (s >> 8) & 0x80;
+  if (sign) s = -s;
+  if (s > 32635) s = 32635;
+  s += 0x84;
+  let exp = 7;
+  for (let m = 0x4000; (s & m) === 0 && exp > 0; exp--, m >>= 1);
+  return ~(sign | (exp << 4) | ((s >> (exp + 3)) & 0x0F)) & 0xFF;
+}
+class PcmCapture extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    const o    = options.processorOptions;
+    this.frame = o.frame;
+    this.ulaw  = o.codec === 'ulaw';
+    this.step  = sampleRate / (o.rate || sampleRate);   // input samples per wire sample
+    this.acc   = 0;
+    this.n     = 0;
+    this.pos   = 0;
+    this.buf   = this.alloc();
+    this.fill  = 0;
+    this.seq   = 0;
+    this.done  = false;
+    this.port.onmessage = e => { if (e.data === 'stop') this.done = true; };
+  }
+  alloc() { return this.ulaw ? new Uint8Array(this.frame) : new Int16Array(this.frame); }
+  process(inputs) {
+    if (this.done) return false;
+    const ch = inputs[0] && inputs[0][0];
+    if (!ch) return true;
+    for (let i = 0; i < ch.length; i++) {
+      if (this.step === 1) { this.push(ch[i]); continue; }
+      // Average the input samples that fall in each output period
+      this.acc += ch[i]; this.n++; this.pos++;
+      if (this.pos < this.step) continue;
+      const v = this.acc / this.n;
+      for (; this.pos >= this.step; this.pos -= this.step) this.push(v);
+      this.acc = 0; this.n = 0;
+    }
+    return true;
+  }
+  push(f) {
+    const s = f <= -1 ? -32768 : f >= 1 ? 32767 : (f * 32768) | 0;
+    this.buf[this.fill++] = this.ulaw ? ulaw(s) : s;
+    if (this.fill === this.frame) {
+      this.port.postMessage({seq: this.seq++, t: currentTime, pcm: this.buf.buffer}, [this.buf.buffer]);
+      this.buf  = this.alloc();
+      this.fill = 0;
+    }
+  }
+}
+registerProcessor('pcm-capture', PcmCapture);
+"""
 
 
 # ── HTML template ──────────────────────────────────────────────────────────
@@ -650,6 +1221,7 @@ HTML = r"""<!DOCTYPE html>
   .ptt-btn:hover { border-color: var(--border2); color: var(--text); }
   .ptt-btn.active { border-color: var(--danger); background: rgba(226,75,74,.12); color: #f07877; box-shadow: 0 0 24px rgba(226,75,74,.25); }
   .ptt-status { font-size: 11px; font-family: var(--mono); color: var(--muted); }
+  .audio-stats { font-size: 10px; font-family: var(--mono); color: var(--muted); min-height: 14px; }
 
   /* ── log viewer ── */
   .log-box { background: #0a0a0c; border: 1px solid var(--border); border-radius: 8px; padding: 12px; font-family: var(--mono); font-size: 11px; color: #8a8a90; height: 450px; overflow-y: auto; white-space: pre-wrap; word-break: break-all; }
@@ -709,7 +1281,7 @@ HTML = r"""<!DOCTYPE html>
 <div class="nav">
   <div class="nav-item active" onclick="showPage('dashboard',this)">Dashboard</div>
   <div class="nav-item" onclick="showPage('history',this)">History</div>
-  <div class="nav-item" onclick="showPage('panel',this); refreshPanelStatus()">Panel</div>
+  <div class="nav-item" onclick="showPage('panel',this)">Panel</div>
   <div class="nav-item" onclick="showPage('control',this)">Control</div>
   <div class="nav-item" onclick="showPage('logs',this)">Logs</div>
   <div class="nav-item" onclick="showPage('config',this); loadSettings()">Settings</div>
@@ -752,9 +1324,15 @@ HTML = r"""<!DOCTYPE html>
       <div class="panel">
         <div class="panel-header">system status</div>
         <div style="padding:4px 16px">
-          <div class="status-row"><span class="status-key">logger</span><span class="status-val {{ 'ok' if stats.logger_ok else 'err' }}">{{ 'running' if stats.logger_ok else 'stopped' }}</span></div>
-          <div class="status-row"><span class="status-key">serial J103</span><span class="status-val {{ 'ok' if stats.serial_ok else 'err' }}">{{ 'connected' if stats.serial_ok else 'disconnected' }}</span></div>
-          <div class="status-row"><span class="status-key">com3 control</span><span class="status-val {{ 'ok' if stats.control_ok else 'warn' }}">{{ 'connected' if stats.control_ok else 'not connected' }}</span></div>
+          <div class="status-row"><span class="status-key">logger</span><span class="status-val {{ 'ok' if stats.logger_ok else 'err' }}" data-status="logger_ok">{{ 'running' if stats.logger_ok else 'stopped' }}</span></div>
+          <div class="status-row"><span class="status-key">serial J103</span><span class="status-val {{ 'ok' if stats.serial_ok else 'err' }}" data-status="serial_ok">{{ 'connected' if stats.serial_ok else 'disconnected' }}</span></div>
+          <div class="status-row"><span class="status-key">com3 control</span><span class="status-val {{ 'ok' if stats.control_ok else 'warn' }}" data-status="control_ok">{{ 'connected' if stats.control_ok else 'not connected' }}</span></div>
+        </div>
+      </div>
+      <div class="panel">
+        <div class="panel-header"><span>alert latency</span><span id="latency-n"></span></div>
+        <div style="padding:4px 16px" id="latency">
+          <div class="status-row"><span class="status-key">no traced alerts yet</span></div>
         </div>
       </div>
       <div class="panel">
@@ -857,9 +1435,9 @@ HTML = r"""<!DOCTYPE html>
       <div class="panel">
         <div class="panel-header">com3 status</div>
         <div style="padding:4px 16px">
-          <div class="status-row"><span class="status-key">connection</span><span class="status-val" id="panel-com3-status">checking…</span></div>
-          <div class="status-row"><span class="status-key">logger</span><span class="status-val {{ 'ok' if stats.logger_ok else 'err' }}">{{ 'running' if stats.logger_ok else 'stopped' }}</span></div>
-          <div class="status-row"><span class="status-key">serial J103</span><span class="status-val {{ 'ok' if stats.serial_ok else 'err' }}">{{ 'connected' if stats.serial_ok else 'disconnected' }}</span></div>
+          <div class="status-row"><span class="status-key">connection</span><span class="status-val {{ 'ok' if stats.control_ok else 'warn' }}" data-status="control_ok">{{ 'connected' if stats.control_ok else 'not connected' }}</span></div>
+          <div class="status-row"><span class="status-key">logger</span><span class="status-val {{ 'ok' if stats.logger_ok else 'err' }}" data-status="logger_ok">{{ 'running' if stats.logger_ok else 'stopped' }}</span></div>
+          <div class="status-row"><span class="status-key">serial J103</span><span class="status-val {{ 'ok' if stats.serial_ok else 'err' }}" data-status="serial_ok">{{ 'connected' if stats.serial_ok else 'disconnected' }}</span></div>
         </div>
       </div>
       <div class="panel">
@@ -983,6 +1561,7 @@ HTML = r"""<!DOCTYPE html>
         <button class="action-btn" id="orig-rec-btn" style="width:auto;padding:6px 18px;margin:0" onclick="toggleVoipRec()">⏺ Start Recording</button>
         <span id="orig-rec-status" style="font-size:11px;font-family:var(--mono);color:var(--muted)">Idle</span>
       </div>
+      <div class="audio-stats" id="orig-rec-audio-stats" style="margin-top:4px"></div>
     </div>
     <div style="display:flex;gap:8px;flex-wrap:wrap">
       <button class="action-btn" onclick="originateAlert()">originate alert</button>
@@ -1012,6 +1591,7 @@ HTML = r"""<!DOCTYPE html>
           <span>PTT</span>
         </button>
         <div class="ptt-status" id="ptt-status">Idle — hold to talk</div>
+        <div class="audio-stats" id="ptt-audio-stats"></div>
       </div>
     </div>
 
@@ -1174,8 +1754,23 @@ setInterval(updateCountdowns, 1000);
 updateCountdowns();
 
 // ── socket ─────────────────────────────────────────────────────────────────
+// Room subscriptions follow the visible page so a kiosk on the alert feed
+// never receives journal lines. Alerts and status stay subscribed on every page.
+const PAGE_TOPICS = {panel:['control'], control:['control'], logs:['logs']};
+let _page = 'dashboard', _subscribed = new Set();
+function syncSubscriptions() {
+  if (!socket.connected) return;
+  const want = new Set(['alerts', 'status', ...(PAGE_TOPICS[_page] || [])]);
+  const add  = [...want].filter(t => !_subscribed.has(t));
+  const drop = [..._subscribed].filter(t => !want.has(t));
+  if (add.length)  socket.emit('subscribe',   {topics: add});
+  if (drop.length) socket.emit('unsubscribe', {topics: drop});
+  _subscribed = want;
+}
 socket.on('connect', () => {
   document.getElementById('conn-status').innerHTML = '<span class="dot dot-green"></span>live';
+  _subscribed = new Set();   // server forgets rooms on reconnect
+  syncSubscriptions();
 });
 socket.on('disconnect', () => {
   document.getElementById('conn-status').innerHTML = '<span class="dot dot-red"></span>disconnected';
@@ -1183,32 +1778,91 @@ socket.on('disconnect', () => {
 socket.on('new_alert', alert => {
   prependAlert(alert, document.getElementById('alert-feed'));
   updateFeedCount();
-  document.getElementById('stat-today').textContent  = +document.getElementById('stat-today').textContent + 1;
-  document.getElementById('stat-last').textContent   = alert.received_local || '';
-  document.getElementById('stat-total').textContent  = +document.getElementById('stat-total').textContent + 1;
-  if (alert.event_code === 'RWT') document.getElementById('stat-rwt').textContent = alert.received_local || '';
+  // Acknowledge once painted: rAF runs before the next paint, the timeout just after it.
+  // Hidden tabs don't paint, so they leave the ack to a visible one.
+  if (alert.trace && document.visibilityState === 'visible')
+    requestAnimationFrame(() => setTimeout(() => socket.emit('trace_ack', {id: alert.trace.id}), 0));
+});
+
+// ── status (server push) ───────────────────────────────────────────────────
+// Full snapshot on subscribe, then only changed fields.
+const _status = {};
+const STATUS_ROWS = {
+  logger_ok:  ['running',   'stopped',       'err'],
+  serial_ok:  ['connected', 'disconnected',  'err'],
+  control_ok: ['connected', 'not connected', 'warn'],
+};
+socket.on('status', delta => {
+  Object.assign(_status, delta);
+  const set = (id, v) => { const el = document.getElementById(id); if (el && v !== undefined) el.textContent = v; };
+  set('stat-today', delta.today_count);
+  set('stat-last',  delta.last_alert);
+  set('stat-total', delta.total);
+  set('stat-rwt',   delta.last_rwt);
+  for (const [k, [on, off, bad]] of Object.entries(STATUS_ROWS)) {
+    if (!(k in delta)) continue;
+    document.querySelectorAll(`[data-status="${k}"]`).forEach(el => {
+      el.textContent = delta[k] ? on : off;
+      el.className   = 'status-val ' + (delta[k] ? 'ok' : bad);
+    });
+  }
+  if ('control_ok' in delta || 'control_error' in delta || 'tts_cache' in delta || 'control_jobs' in delta) renderControlStatus();
+  if ('latency' in delta) renderLatency();
 });
+// Milliseconds from the burst leaving the serial line to each stage (p50 / p95).
+const LATENCY_ROWS = [['parsed','parsed'], ['decoded','decoded'], ['notified','notified'], ['fsynced','on disk'],
+                      ['received','web read'], ['emitted','pushed'], ['rendered','on screen']];
+function renderLatency() {
+  const el = document.getElementById('latency'), l = _status.latency;
+  if (!el || !l || !l.n) return;
+  const ms = v => v >= 1000 ? (v / 1000).toFixed(2) + ' s' : v.toFixed(1) + ' ms';
+  document.getElementById('latency-n').textContent = `last ${l.n}`;
+  el.innerHTML = LATENCY_ROWS.filter(([k]) => l.stages[k]).map(([k, label]) =>
+    `<div class="status-row"><span class="status-key">${label}</span><span class="status-val" title="p99 ${ms(l.stages[k].p99)} · ${l.stages[k].n} samples">${ms(l.stages[k].p50)} / ${ms(l.stages[k].p95)}</span></div>`
+  ).join('');
+}
+function renderControlStatus() {
+  const el = document.getElementById('control-status');
+  if (!el) return;
+  const c = _status.tts_cache, q = _status.control_jobs;
+  const busy = q && (q.running || q.queued)
+    ? `<br><span style="font-size:10px">${q.running ? `Running: ${q.running}` : 'Idle'}${q.queued ? ` · ${q.queued} queued` : ''}</span>`
+    : '';
+  const cache = c
+    ? `<br><span style="font-size:10px">TTS cache: ${c.hits} hit${c.hits === 1 ? '' : 's'} · ${c.misses} miss${c.misses === 1 ? '' : 'es'} · ${c.entries} clip${c.entries === 1 ? '' : 's'} (${(c.bytes / 1048576).toFixed(1)} / ${Math.round(c.max_bytes / 1048576)} MB)</span>`
+    : '';
+  el.innerHTML = (_status.control_ok
+    ? '<span style="color:var(--success)">● COM3 connected</span>'
+    : `<span style="color:var(--warn)">● COM3 not connected</span>${_status.control_error ? `<br><span style="font-size:10px;color:var(--danger)">${_status.control_error}</span>` : ''}`) + busy + cache;
+}
 socket.on('ptt_error', ({error}) => {
   toast('PTT: ' + error, false);
   pttCleanup();
 });
 
 // ── log streaming ──────────────────────────────────────────────────────────
-socket.on('log_line', ({line}) => {
-  const box = document.getElementById('log-box');
-  if (!box) return;
-  // Clear placeholder text on first real line
-  if (box.firstChild && box.firstChild.textContent === 'Waiting for log lines…') box.innerHTML = '';
+// The server sends the recent backlog on connect, then batches of new lines.
+function logSpan(line) {
   const span = document.createElement('span');
   span.className = (line.includes('ERROR')||line.includes('CRIT')) ? 'log-line-error'
                  : line.includes('WARN') ? 'log-line-warning' : 'log-line-info';
-  span.textContent = line;
-  box.appendChild(span);
-  box.appendChild(document.createTextNode('\n'));
+  span.textContent = line + '\n';
+  return span;
+}
+function appendLogLines(lines, replace=false) {
+  const box = document.getElementById('log-box');
+  if (!box || (!lines.length && !replace)) return;
+  // Clear placeholder text on first real line
+  if (replace || (box.firstChild && box.firstChild.textContent === 'Waiting for log lines…')) box.innerHTML = '';
+  const frag = document.createDocumentFragment();
+  lines.forEach(l => frag.appendChild(logSpan(l)));
+  box.appendChild(frag);
   while (box.childNodes.length > 800) box.removeChild(box.firstChild);
   if (document.getElementById('page-logs').classList.contains('active'))
     box.scrollTop = box.scrollHeight;
-});
+}
+socket.on('log_backlog', ({lines}) => { if (lines.length) appendLogLines(lines, true); });
+socket.on('log_lines',   ({lines}) => appendLogLines(lines));
 
 // ── alert rendering ────────────────────────────────────────────────────────
 function prependAlert(alert, container) {
@@ -1240,7 +1894,8 @@ function showPage(name, el) {
   document.querySelectorAll('.nav-item').forEach(n => n.classList.remove('active'));
   document.getElementById('page-' + name).classList.add('active');
   el.classList.add('active');
-  if (name === 'control') checkControlStatus();
+  _page = name;
+  syncSubscriptions();
   if (name === 'logs') document.getElementById('log-box').scrollTop = document.getElementById('log-box').scrollHeight;
 }
 function filterHistory() {
@@ -1278,36 +1933,69 @@ async function apiFetch(url) {
   }
 }
 async function panelCall(url, successMsg) {
-  const r = await post(url);
+  const r = await runJob(url);
   toast(r.ok ? successMsg : r.error, r.ok);
 }
 
+// ── control jobs ───────────────────────────────────────────────────────────
+// Control routes answer 202 with a queued job; its progress arrives as 'job'
+// events on the control room. runJob() posts and resolves when the job
+// finishes, polling /api/control/jobs/<id> in case the socket is down.
+const JOB_FINISHED = new Set(['done', 'error', 'cancelled']), JOB_POLL_MS = 3000;
+const _jobs = new Map(), _jobWatch = new Map();   // id → last seen state / {resolve, onState}
+function _jobSeen(j) {
+  _jobs.set(j.id, j);
+  const w = _jobWatch.get(j.id);
+  if (!w) return;
+  if (w.onState) w.onState(j);
+  if (JOB_FINISHED.has(j.state)) { _jobWatch.delete(j.id); w.resolve(j); }
+}
+socket.on('job', _jobSeen);
+function awaitJob(job, onState) {
+  return new Promise(resolve => {
+    const seen = _jobs.get(job.id) || job;
+    if (JOB_FINISHED.has(seen.state)) { resolve(seen); return; }
+    _jobWatch.set(job.id, {resolve, onState});
+    const poll = setInterval(async () => {
+      if (!_jobWatch.has(job.id)) { clearInterval(poll); return; }
+      const r = await apiFetch(`/api/control/jobs/${job.id}`);
+      if (r && r.job) _jobSeen(r.job);
+    }, JOB_POLL_MS);
+  });
+}
+async function runJob(url, body={}, onState) {
+  const r = await post(url, body);
+  if (!r.ok || !r.job) return r;
+  const j = await awaitJob(r.job, onState);
+  return {ok: j.state === 'done',
+          error: j.error || (j.state === 'cancelled' ? `${j.name} cancelled` : ''), ...(j.result || {})};
+}
+
 // ── control actions ────────────────────────────────────────────────────────
 async function sendRWT(tone=true) {
-  const r = await post('/api/control/rwt', {tone});
+  const r = await runJob('/api/control/rwt', {tone});
   toast(r.ok ? (tone?'RWT sent with tone':'RWT sent without tone') : r.error, r.ok);
 }
 async function sendEOM() {
-  const r = await post('/api/control/eom');
+  const r = await runJob('/api/control/eom');
   toast(r.ok ? 'EOM sent' : r.error, r.ok);
 }
 async function confirmReboot() {
   if (!confirm('Reboot the TFT unit?')) return;
-  const r = await post('/api/control/reboot');
+  const r = await runJob('/api/control/reboot');
   toast(r.ok ? 'Reboot command sent' : r.error, r.ok);
 }
 async function reconnectCOM3() {
   toast('Reconnecting COM3…', true);
-  const r = await post('/api/control/reconnect');
+  const r = await runJob('/api/control/reconnect');
   toast(r.connected ? 'COM3 reconnected' : (r.error || 'COM3 still unavailable'), r.connected);
-  checkControlStatus();
-  refreshPanelStatus();
 }
 async function recordAnnouncement() {
   const text = document.getElementById('tts-text').value.trim();
   if (!text) { toast('Enter announcement text first', false); return; }
-  toast('Recording TTS announcement…', true);
-  const r = await post('/api/control/announce', {text});
+  toast('Generating TTS…', true);
+  const r = await runJob('/api/control/announce', {text},
+    j => { if (j.state === 'running') toast('Recording TTS announcement…', true); });
   toast(r.ok ? 'Announcement recorded' : r.error, r.ok);
 }
 function _getCheckedLocs(checksId, manualId) {
@@ -1344,29 +2032,86 @@ async function previewAnnouncement() {
   if (!event || !locs) { toast('Select an event and location key(s) to preview', false); return; }
   const r = await post('/api/decode', {event, locations:locs, duration:dur});
   const el = document.getElementById('orig-preview-text');
+  // The server starts synthesising the previewed text; originating in the same
+  // minute with the same parameters reuses that audio.
+  _preview = r.ok ? {handle: r.handle, event, locs, dur} : null;
   if (r.ok && el) { el.textContent = r.text; el.style.display = 'block'; }
   else toast(r.error || 'Preview failed', false);
 }
+let _preview = null;
+
+// ── audio capture (AudioWorklet) ───────────────────────────────────────────
+// Mic → worklet (Float32→Int16/µ-law off the main thread) → binary frames over
+// the socket. Before each session a probe measures link throughput and the
+// server picks a transport mode (44.1/16/8 kHz PCM or 8 kHz µ-law). Each frame
+// is acked; unacked frames beyond MAX_INFLIGHT are dropped rather than queued
+// so a slow link can't build up unbounded delay. start() readies the mic and
+// worklet; the mic is only connected by open(), once the server has acked
+// ptt_start/rec_start, so no speech is sent before the sink can take it.
+const MAX_INFLIGHT = 8, PROBE_BYTES = 32768;
+function negotiate(body) { return new Promise(res => socket.emit('audio_negotiate', body, res)); }
+function startAck(ev)    { return new Promise(res => socket.emit(ev, res)); }
+async function probeThroughput() {
+  const t0 = performance.now();
+  await new Promise(res => socket.emit('audio_probe', new ArrayBuffer(PROBE_BYTES), res));
+  return PROBE_BYTES * 8 / Math.max(1, performance.now() - t0);   // bits/ms == kbit/s
+}
+class AudioCapture {
+  constructor(chunkEvent, statsId) {
+    this.chunkEvent = chunkEvent;
+    this.statsId    = statsId;
+    this.ctx = this.stream = this.node = this.source = null;
+    this.inflight = 0; this.sent = 0; this.dropouts = 0; this.rtt = 0; this.frameMs = 0; this.mode = '';
+  }
+  async start() {
+    this.stream = await navigator.mediaDevices.getUserMedia({audio:true, video:false});
+    const cfg = await negotiate({kbps: await probeThroughput()});
+    // A browser that ignores the requested rate runs at its own; the worklet resamples
+    this.ctx = new (window.AudioContext || window.webkitAudioContext)({sampleRate: cfg.rate});
+    await this.ctx.audioWorklet.addModule('/audio-capture.js');
+    this.mode    = cfg.mode;
+    this.frameMs = 1000 * cfg.frame / cfg.rate;
+    this.node = new AudioWorkletNode(this.ctx, 'pcm-capture',
+      {numberOfInputs: 1, numberOfOutputs: 0, processorOptions: {frame: cfg.frame, codec: cfg.codec, rate: cfg.rate}});
+    this.node.port.onmessage = e => this._send(e.data.pcm);
+    this.source = this.ctx.createMediaStreamSource(this.stream);
+    this._report();
+  }
+  open() { this.source.connect(this.node); }
+  _send(pcm) {
+    if (this.inflight >= MAX_INFLIGHT) { this.dropouts++; this._report(); return; }
+    this.inflight++;
+    const t0 = performance.now();
+    socket.emit(this.chunkEvent, pcm, () => {
+      this.inflight--;
+      const rtt = performance.now() - t0;
+      this.rtt  = this.rtt ? this.rtt * 0.9 + rtt * 0.1 : rtt;
+      if (++this.sent % 10 === 0) this._report();
+    });
+  }
+  _report() {
+    const el = document.getElementById(this.statsId);
+    if (el) el.textContent = `${this.mode} · latency ~${Math.round(this.frameMs + this.rtt / 2)} ms · dropouts ${this.dropouts}`;
+  }
+  stop() {
+    if (this.source) { this.source.disconnect(); this.source = null; }
+    if (this.node)   { this.node.port.postMessage('stop'); this.node.disconnect(); this.node = null; }
+    if (this.ctx)    { this.ctx.close(); this.ctx = null; }
+    if (this.stream) { this.stream.getTracks().forEach(t=>t.stop()); this.stream = null; }
+  }
+}
 
 // ── VoIP announcement recording ──────────────────────────────────────────
-let _recCtx = null, _recStream = null, _recProc = null, _recActive = false, _recTimer = null;
+let _recCap = null, _recActive = false, _recStarting = false, _recTimer = null;
 function toggleVoipRec() { if (_recActive) stopVoipRec(); else startVoipRec(); }
 async function startVoipRec() {
-  if (_recActive) return;
+  if (_recActive || _recStarting) return;
+  _recStarting = true;
   try {
-    _recStream = await navigator.mediaDevices.getUserMedia({audio: true});
-    _recCtx    = new AudioContext({sampleRate: 44100});
-    const src  = _recCtx.createMediaStreamSource(_recStream);
-    _recProc   = _recCtx.createScriptProcessor(4096, 1, 1);
-    _recProc.onaudioprocess = e => {
-      const f32 = e.inputBuffer.getChannelData(0);
-      const i16 = new Int16Array(f32.length);
-      for (let i = 0; i < f32.length; i++) i16[i] = Math.max(-32768, Math.min(32767, f32[i] * 32767));
-      socket.emit('rec_chunk', Array.from(i16));
-    };
-    src.connect(_recProc);
-    _recProc.connect(_recCtx.destination);
-    socket.emit('rec_start');
+    _recCap = new AudioCapture('rec_chunk', 'orig-rec-audio-stats');
+    await _recCap.start();
+    if (!await startAck('rec_start')) { _recCap.stop(); _recCap = null; return; }   // rec_error toasts
+    _recCap.open();
     _recActive = true;
     const btn = document.getElementById('orig-rec-btn');
     const sts = document.getElementById('orig-rec-status');
@@ -1378,14 +2123,17 @@ async function startVoipRec() {
       const s = document.getElementById('orig-rec-status');
       if (s) s.textContent = `● REC ${_recSecs}s`;
     }, 1000);
-  } catch(e) { toast('Microphone: ' + e.message, false); }
+  } catch(e) {
+    if (_recCap) { _recCap.stop(); _recCap = null; }
+    toast('Microphone: ' + e.message, false);
+  } finally {
+    _recStarting = false;
+  }
 }
 function stopVoipRec() {
   if (!_recActive) return;
-  if (_recTimer)  { clearInterval(_recTimer); _recTimer = null; }
-  if (_recProc)   { _recProc.disconnect();    _recProc  = null; }
-  if (_recCtx)    { _recCtx.close();          _recCtx   = null; }
-  if (_recStream) { _recStream.getTracks().forEach(t=>t.stop()); _recStream = null; }
+  if (_recTimer) { clearInterval(_recTimer); _recTimer = null; }
+  if (_recCap)   { _recCap.stop(); _recCap = null; }
   socket.emit('rec_stop');
   _recActive = false;
   const btn = document.getElementById('orig-rec-btn');
@@ -1403,20 +2151,24 @@ async function originateAlert() {
   if (!event || !locs) { toast('Enter event code and select/enter location keys', false); return; }
   if (mode === 'tts') {
     toast('Generating TTS and originating…', true);
-    const r = await post('/api/control/originate', {event, locations:locs, duration:dur, tts:true});
+    const p = _preview;
+    const handle = p && p.event === event && p.locs === locs && p.dur === dur ? p.handle : undefined;
+    const r = await runJob('/api/control/originate', {event, locations:locs, duration:dur, tts:true, handle},
+      j => { if (j.state === 'running') toast('Recording announcement and originating…', true); });
     if (r.ok) {
       const el = document.getElementById('orig-preview-text');
       if (el) { el.textContent = r.text; el.style.display = 'block'; }
-      toast(`${event} originated with TTS`, true);
+      toast(r.previewed === false ? `${event} originated with TTS (announcement times updated)`
+                                  : `${event} originated with TTS`, true);
     } else { toast(r.error, false); }
   } else if (mode === 'voip') {
     const sts = document.getElementById('orig-rec-status');
     if (!sts || !sts.textContent.startsWith('✓')) { toast('Record your announcement first', false); return; }
-    const r = await post('/api/control/originate', {event, locations:locs, duration:dur, audio:'p'});
+    const r = await runJob('/api/control/originate', {event, locations:locs, duration:dur, audio:'p'});
     toast(r.ok ? `${event} originated with VoIP recording` : r.error, r.ok);
     if (r.ok && sts) { sts.textContent = 'Idle'; sts.style.color = 'var(--muted)'; }
   } else {
-    const r = await post('/api/control/originate', {event, locations:locs, duration:dur, audio:mode});
+    const r = await runJob('/api/control/originate', {event, locations:locs, duration:dur, audio:mode});
     toast(r.ok ? `${event} originated` : r.error, r.ok);
   }
 }
@@ -1426,62 +2178,43 @@ async function panelOriginate() {
   const dur   = document.getElementById('p-orig-dur').value;
   const audio = document.getElementById('p-orig-audio').value;
   if (!event || !locs) { toast('Enter event code and select/enter location keys', false); return; }
-  const r = await post('/api/control/originate', {event, locations:locs, duration:dur, audio});
+  const r = await runJob('/api/control/originate', {event, locations:locs, duration:dur, audio});
   toast(r.ok ? `${event} originated` : r.error, r.ok);
 }
-async function checkControlStatus() {
-  const d = await apiFetch('/api/control/status');
-  if (!d) return;
-  const el = document.getElementById('control-status');
-  if (el) el.innerHTML = d.connected
-    ? '<span style="color:var(--success)">● COM3 connected</span>'
-    : `<span style="color:var(--warn)">● COM3 not connected</span>${d.error ? `<br><span style="font-size:10px;color:var(--danger)">${d.error}</span>` : ''}`;
-}
-async function refreshPanelStatus() {
-  const d = await apiFetch('/api/control/status');
-  if (!d) return;
-  const el = document.getElementById('panel-com3-status');
-  if (el) { el.textContent = d.connected ? 'connected' : 'not connected'; el.className = 'status-val ' + (d.connected?'ok':'warn'); }
-}
-setInterval(checkControlStatus, 30000);
 
 // ── PTT ────────────────────────────────────────────────────────────────────
-let _pttActive = false, _pttCtx = null, _pttStream = null, _pttProc = null;
+let _pttActive = false, _pttStarting = false, _pttReleased = false, _pttCap = null;
 
 async function startPTT() {
-  if (_pttActive) return;
+  if (_pttActive || _pttStarting) return;
+  _pttStarting = true;
+  _pttReleased = false;
   try {
-    _pttStream = await navigator.mediaDevices.getUserMedia({audio:true, video:false});
-    _pttCtx    = new (window.AudioContext || window.webkitAudioContext)({sampleRate: 44100});
-    const src  = _pttCtx.createMediaStreamSource(_pttStream);
-    _pttProc   = _pttCtx.createScriptProcessor(2048, 1, 1);
-    _pttProc.onaudioprocess = e => {
-      const f32 = e.inputBuffer.getChannelData(0);
-      const i16 = new Int16Array(f32.length);
-      for (let i = 0; i < f32.length; i++)
-        i16[i] = Math.max(-32768, Math.min(32767, f32[i] * 32768 | 0));
-      socket.emit('ptt_chunk', Array.from(i16));
-    };
-    src.connect(_pttProc);
-    _pttProc.connect(_pttCtx.destination);
-    socket.emit('ptt_start');
+    _pttCap = new AudioCapture('ptt_chunk', 'ptt-audio-stats');
+    await _pttCap.start();
+    if (_pttReleased) { pttCleanup(); return; }   // button let go during mic/worklet setup
+    if (!await startAck('ptt_start')) { pttCleanup(); return; }   // ptt_error toasts
+    if (_pttReleased) { pttCleanup(); socket.emit('ptt_stop'); return; }
+    _pttCap.open();
     _pttActive = true;
     document.getElementById('ptt-btn').classList.add('active');
     document.getElementById('ptt-status').textContent = '● TRANSMITTING';
     document.getElementById('ptt-status').style.color = 'var(--danger)';
   } catch(e) {
+    pttCleanup();
     toast('Microphone: ' + e.message, false);
+  } finally {
+    _pttStarting = false;
   }
 }
 function stopPTT() {
+  if (_pttStarting) _pttReleased = true;
   if (!_pttActive) return;
   pttCleanup();
   socket.emit('ptt_stop');
 }
 function pttCleanup() {
-  if (_pttProc)   { _pttProc.disconnect();  _pttProc = null; }
-  if (_pttCtx)    { _pttCtx.close();        _pttCtx  = null; }
-  if (_pttStream) { _pttStream.getTracks().forEach(t=>t.stop()); _pttStream = null; }
+  if (_pttCap) { _pttCap.stop(); _pttCap = null; }
   _pttActive = false;
   const btn = document.getElementById('ptt-btn');
   const sts = document.getElementById('ptt-status');
@@ -1668,7 +2401,13 @@ app.jinja_env.globals['badge'] = badge
 
 if __name__ == "__main__":
     os.makedirs(CONFIG['alerts_dir'], exist_ok=True)
+    os.makedirs(CONFIG['log_dir'], exist_ok=True)
     threading.Thread(target=start_watchdog,  daemon=True).start()
     threading.Thread(target=start_log_stream, daemon=True).start()
+    threading.Thread(target=start_log_flusher, daemon=True).start()
+    threading.Thread(target=start_status_monitor, daemon=True).start()
+    memwatch.MemoryWatch("web", CONFIG['log_dir'], CONFIG['memory_interval'], CONFIG['memory_budget_mb'],
+                         CONFIG['memory_tracemalloc'], CONFIG['memory_snapshot_every'], CONFIG['memory_top'],
+                         on_exceed=_memory_exceeded).start()
     print(f"EAS Monitor starting on http://{CONFIG['web_host']}:{CONFIG['web_port']}")
     socketio.run(app, host=CONFIG['web_host'], port=CONFIG['web_port'], debug=False)